@@ -0,0 +1,364 @@
+"""Benchmarks for the calculator app.
+
+Suites:
+
+``startup``  cold start: each page's first run in a fresh interpreter, checked
+             against a budget (``--startup-budget-ms``, and no pandas/NumPy
+             before the first calculation)
+``rerun``    per-rerun latency of the calculator pages via Streamlit's AppTest
+``micro``    the pure cost functions in ``wos``
+``load``     concurrent AppTest sessions: p50/p99 rerun latency and memory per session
+
+Results are written as JSON; ``--compare`` reports changes against an
+earlier result file so regressions show up between commits::
+
+    python benchmarks/bench.py --out bench/HEAD.json
+    python benchmarks/bench.py --suite micro --compare bench/HEAD.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PAGES = [
+    "home.py",
+    "pages/building_upgrade.py",
+    "pages/troops_calculator.py",
+    "pages/fire_crystals_requirements.py",
+    "pages/hero_gear.py",
+    "pages/chief_gear.py",
+    "pages/svs.py",
+    "pages/hoc.py",
+]
+
+
+def _percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(round(q / 100 * (len(samples) - 1))))]
+
+
+def _summary(samples_ms):
+    return {
+        "n": len(samples_ms),
+        "p50_ms": statistics.median(samples_ms),
+        "p99_ms": _percentile(samples_ms, 99),
+        "mean_ms": statistics.fmean(samples_ms),
+    }
+
+
+def _rss_bytes():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+# --- Startup ---
+
+# First paint must stay within this budget and must not import these modules;
+# they are loaded by the first calculation instead.
+STARTUP_BUDGET_MS = 500
+STARTUP_FORBIDDEN = ("pandas", "numpy")
+
+_STARTUP_SCRIPT = """
+import json, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t1 = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=60).run()
+t2 = time.perf_counter()
+print(json.dumps({"streamlit_import_ms": (t1 - t0) * 1e3, "first_run_ms": (t2 - t1) * 1e3,
+                  "modules": sorted(m for m in ("pandas", "numpy", "wos") if m in sys.modules)}))
+"""
+
+
+def bench_startup(repeat=3):
+    results = {}
+    for page in PAGES:
+        runs = []
+        for _ in range(repeat):
+            out = subprocess.run(
+                [sys.executable, "-c", _STARTUP_SCRIPT, os.path.join(ROOT, page)],
+                cwd=ROOT, capture_output=True, text=True, check=True,
+                env={**os.environ, "PYTHONPATH": ROOT},
+            )
+            runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+        results[page] = {
+            "first_run_ms": statistics.median(r["first_run_ms"] for r in runs),
+            "streamlit_import_ms": statistics.median(r["streamlit_import_ms"] for r in runs),
+            "modules_loaded": runs[-1]["modules"],
+        }
+    return results
+
+
+def startup_violations(results, budget_ms=STARTUP_BUDGET_MS):
+    """Pages whose first run is over budget or loads a forbidden module."""
+    violations = []
+    for page, r in results.items():
+        if r["first_run_ms"] > budget_ms:
+            violations.append(f"{page}: first run {r['first_run_ms']:.0f} ms > {budget_ms} ms")
+        loaded = [m for m in STARTUP_FORBIDDEN if m in r["modules_loaded"]]
+        if loaded:
+            violations.append(f"{page}: imports {', '.join(loaded)} before any calculation")
+    return violations
+
+
+# --- Reruns ---
+
+def _building_session():
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(ROOT, "pages/building_upgrade.py"), default_timeout=60).run()
+    for name in ("Furnace", "Embassy", "Infantry Camp"):
+        at.toggle(key=f"toggle_{name}").set_value(True)
+    at.run()
+    at.selectbox(key="Furnace_curr").set_value(30)
+    at.radio[0].set_value(3)
+    at.radio[1].set_value(2)
+    at.checkbox[0].check()
+    at.run()
+
+    def step(i):
+        at.selectbox(key="Furnace_target").set_value(31 + i % 20)
+        at.button[0].click()
+        at.run()
+    return at, step
+
+
+def _troops_session():
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(ROOT, "pages/troops_calculator.py"), default_timeout=60).run()
+    at.button[1].click().run()  # Upgrade Troops
+    for toggle in at.toggle:
+        toggle.set_value(True)
+    at.run()
+    for number in at.number_input[:3]:
+        number.set_value(5000)
+    at.run()
+
+    def step(i):
+        at.selectbox(key="Infantry_upgrade_start").set_value(1 + i % 9)
+        [b for b in at.button if b.label == "Calculate"][0].click()
+        at.run()
+    return at, step
+
+
+def _fire_crystals_session():
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(ROOT, "pages/fire_crystals_requirements.py"), default_timeout=60).run()
+    for toggle in at.toggle:
+        toggle.set_value(True)
+    at.run()
+
+    def step(i):
+        at.number_input(key="Furnace_end").set_value(31 + i % 24)
+        at.button[0].click()
+        at.run()
+    return at, step
+
+
+SESSIONS = {
+    "building_upgrade": _building_session,
+    "troops_calculator": _troops_session,
+    "fire_crystals_requirements": _fire_crystals_session,
+}
+
+
+def _time_steps(step, n, offset=0):
+    samples = []
+    for i in range(n):
+        t = time.perf_counter()
+        step(offset + i)
+        samples.append((time.perf_counter() - t) * 1e3)
+    return samples
+
+
+def bench_rerun(n=30):
+    results = {}
+    for name, make in SESSIONS.items():
+        at, step = make()
+        step(0)  # warm up
+        results[name] = _summary(_time_steps(step, n, 1))
+        assert not at.exception, at.exception
+    return results
+
+
+# --- Micro ---
+
+def bench_micro(number=2000):
+    from wos import calculators, inverse, scheduler, specs, training
+    from wos.constants import BUILDING_NAMES, TROOP_TYPES
+
+    lines = [(n, 1, 55, 1) for n in BUILDING_NAMES * 1000]
+    cases = {
+        "range_cost": lambda: specs.BUILDINGS.line_costs([("Furnace", 30, 55, 1)]),
+        "range_costs_7000": lambda: specs.BUILDINGS.line_costs(lines),
+        "upgrade_costs_3": lambda: specs.TROOPS.line_costs([("Infantry", 1, 11, 1000), ("Lancers", 4, 10, 2000),
+                                                            ("Marksmen", 7, 9, 3000)]),
+        "building_upgrade_uncached": lambda: calculators.building_upgrade.uncached(
+            {n: (1, 30) for n in BUILDING_NAMES}, base_bonus=25, zinman_level=3, pet_level=2),
+        "building_upgrade_cached": lambda: calculators.building_upgrade(
+            {n: (1, 30) for n in BUILDING_NAMES}, base_bonus=25, zinman_level=3, pet_level=2),
+        "reachable_level": lambda: inverse.reachable_level("Furnace", 30, {"firecrystals": 1000}),
+        "schedule_7x55_2q": lambda: scheduler.schedule({n: (1, 55) for n in BUILDING_NAMES}, queues=2),
+        "training_sim_9m_troops": lambda: training.simulate(
+            [{"troop": t, "level": 10, "number": 3_000_000} for t in TROOP_TYPES], 500, 120,
+            [{"start": d * 86400, "end": d * 86400 + 6 * 3600, "speed": 50} for d in range(90)],
+            [{"start": w * 7 * 86400, "end": w * 7 * 86400 + 86400, "multiplier": 3} for w in range(13)]),
+    }
+    results = {}
+    for name, fn in cases.items():
+        fn()
+        loops = max(1, number // 100) if name.startswith(("schedule", "training")) else number
+        results[name] = {"us_per_call": min(timeit.repeat(fn, number=loops, repeat=3)) / loops * 1e6}
+    return results
+
+
+# --- Load ---
+
+def _load_worker(page, reruns, offset, barrier, queue):
+    rss_before = _rss_bytes()
+    at, step = SESSIONS[page]()
+    step(offset)
+    memory = _rss_bytes() - rss_before
+    barrier.wait()
+    samples = _time_steps(step, reruns, offset + 1)
+    queue.put((samples, memory, repr(at.exception) if at.exception else None))
+
+
+def bench_load(sessions=8, reruns=20, page="building_upgrade"):
+    """Run ``sessions`` concurrent sessions of ``page``, each doing ``reruns`` reruns.
+
+    AppTest sessions cannot share a process across threads, so every
+    session runs in its own forked process; they start rerunning together.
+    The libraries are imported before forking so the memory figure is what
+    each session adds on top of a warm server.
+    """
+    import pandas  # noqa: F401
+    import streamlit.testing.v1  # noqa: F401
+    import wos.calculators  # noqa: F401
+
+    ctx = multiprocessing.get_context("fork")
+    barrier = ctx.Barrier(sessions + 1)
+    queue = ctx.Queue()
+    procs = [ctx.Process(target=_load_worker, args=(page, reruns, i, barrier, queue)) for i in range(sessions)]
+    for p in procs:
+        p.start()
+    barrier.wait()
+    start = time.perf_counter()
+    outcomes = [queue.get() for _ in procs]
+    wall = time.perf_counter() - start
+    for p in procs:
+        p.join()
+
+    errors = [e for _, _, e in outcomes if e]
+    if errors:
+        raise RuntimeError(f"Sessions failed: {errors[0]}")
+    samples = [s for samples, _, _ in outcomes for s in samples]
+    return {
+        "page": page,
+        "sessions": sessions,
+        **_summary(samples),
+        "reruns_per_s": len(samples) / wall,
+        "memory_per_session_kb": statistics.fmean(m for _, m, _ in outcomes) / 1024,
+    }
+
+
+SUITES = {
+    "startup": bench_startup,
+    "rerun": bench_rerun,
+    "micro": bench_micro,
+    "load": bench_load,
+}
+
+
+def _flatten(tree, prefix=""):
+    for k, v in tree.items():
+        if isinstance(v, dict):
+            yield from _flatten(v, f"{prefix}{k}.")
+        elif isinstance(v, (int, float)) and not isinstance(v, bool):
+            yield f"{prefix}{k}", v
+
+
+def compare(current, previous, threshold=0.10):
+    """Print metrics that moved by more than ``threshold``; return regressions."""
+    old = dict(_flatten(previous.get("results", {})))
+    regressions = []
+    for key, value in _flatten(current["results"]):
+        if key not in old or not old[key] or key.endswith((".n", ".sessions")):
+            continue
+        change = value / old[key] - 1
+        # Throughput is better when higher; everything else when lower.
+        worse = -change if key.endswith("_per_s") else change
+        if abs(change) > threshold:
+            flag = "REGRESSION" if worse > 0 else "improved"
+            print(f"{flag:>10}  {key}: {old[key]:.3f} -> {value:.3f} ({change:+.0%})")
+            if worse > 0:
+                regressions.append(key)
+    return regressions
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--suite", action="append", choices=list(SUITES), help="suite(s) to run (default: all)")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change to report (default 0.10)")
+    parser.add_argument("--sessions", type=int, default=8, help="concurrent sessions for the load suite")
+    parser.add_argument("--startup-budget-ms", type=float, default=STARTUP_BUDGET_MS,
+                        help=f"first-run budget per page (default {STARTUP_BUDGET_MS})")
+    args = parser.parse_args(argv)
+
+    os.chdir(ROOT)
+    results = {}
+    for suite in args.suite or list(SUITES):
+        print(f"running {suite}...", file=sys.stderr)
+        results[suite] = bench_load(args.sessions) if suite == "load" else SUITES[suite]()
+
+    report = {
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    failed = False
+    if "startup" in results:
+        for violation in startup_violations(results["startup"], args.startup_budget_ms):
+            print(f"    BUDGET  {violation}")
+            failed = True
+    if args.compare:
+        with open(args.compare) as f:
+            failed = bool(compare(report, json.load(f), args.threshold)) or failed
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
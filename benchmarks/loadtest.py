@@ -0,0 +1,183 @@
+"""Load test for ``python -m wos.serve``: rerun throughput versus worker count.
+
+For each worker count it starts the server, then opens ``--clients`` browser
+sessions through the proxy. Like a browser, each session fetches ``/`` to
+get its affinity cookie, opens the Streamlit websocket and then reruns the
+Building Upgrade page with two buildings active and Calculate pressed, back
+to back, for ``--duration`` seconds. It reports reruns per second, p50/p99
+rerun latency and the scaling efficiency against one worker. It needs the
+``websockets`` client, which the app itself does not::
+
+    pip install websockets
+    python benchmarks/loadtest.py --workers 1 2 4 --clients 16 --out bench/scaling.json
+
+The clients run in one asyncio process, so leave a core free for it. On a
+machine with fewer cores than workers, throughput cannot scale.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGE = "building_upgrade"
+TOGGLES = ("toggle_Furnace", "toggle_Embassy")
+BUTTON = "Calculate Upgrades Cost"
+
+
+def _percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(round(q / 100 * (len(samples) - 1))))]
+
+
+def _wait_until_up(ports, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    for port in ports:
+        while True:
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1).read()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"Server on port {port} did not come up")
+                time.sleep(0.2)
+
+
+class Session:
+    """One browser session speaking Streamlit's websocket protocol."""
+
+    def __init__(self, port):
+        self.port = port
+        self.widgets = {}  # user key or label -> widget id
+        self.ws = None
+
+    async def open(self):
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(None, urllib.request.urlopen, f"http://127.0.0.1:{self.port}/")
+        cookie = (response.headers.get("Set-Cookie") or "").split(";")[0]
+        self.worker = cookie.partition("=")[2]
+        self.ws = await websockets.connect(
+            f"ws://127.0.0.1:{self.port}/_stcore/stream", subprotocols=["streamlit"],
+            additional_headers={"Cookie": cookie} if cookie else None, max_size=None,
+        )
+
+    async def rerun(self, toggles=(), click=None):
+        msg = BackMsg()
+        msg.rerun_script.page_name = PAGE
+        for key in toggles:
+            if key in self.widgets:
+                state = msg.rerun_script.widget_states.widgets.add()
+                state.id = self.widgets[key]
+                state.bool_value = True
+        if click in self.widgets:
+            state = msg.rerun_script.widget_states.widgets.add()
+            state.id = self.widgets[click]
+            state.trigger_value = True
+        await self.ws.send(msg.SerializeToString())
+        while True:
+            fm = ForwardMsg()
+            fm.ParseFromString(await self.ws.recv())
+            kind = fm.WhichOneof("type")
+            if kind == "delta" and fm.delta.WhichOneof("type") == "new_element":
+                element = fm.delta.new_element
+                widget = getattr(element, element.WhichOneof("type") or "", None)
+                if widget is not None and getattr(widget, "id", ""):
+                    self.widgets[widget.id.rsplit("-", 1)[-1]] = widget.id
+                    if getattr(widget, "label", ""):
+                        self.widgets[widget.label] = widget.id
+            elif kind == "script_finished":
+                return fm.script_finished
+
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+
+
+async def _client(port, stop_at, latencies):
+    session = Session(port)
+    await session.open()
+    try:
+        await session.rerun()
+        await session.rerun(TOGGLES)  # draws the level selectors and the Calculate button
+        while time.monotonic() < stop_at:
+            start = time.perf_counter()
+            await session.rerun(TOGGLES, click=BUTTON)
+            latencies.append((time.perf_counter() - start) * 1e3)
+    finally:
+        await session.close()
+    return session.worker
+
+
+async def _drive(port, clients, duration):
+    latencies = []
+    stop_at = time.monotonic() + duration
+    start = time.perf_counter()
+    workers = await asyncio.gather(*(_client(port, stop_at, latencies) for _ in range(clients)))
+    wall = time.perf_counter() - start
+    return latencies, wall, workers
+
+
+def run(workers, clients, duration, port=8701, worker_port=8801):
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "wos.serve", "--workers", str(workers), "--port", str(port),
+         "--worker-port", str(worker_port)],
+        cwd=ROOT, env=dict(os.environ, PYTHONPATH=ROOT), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_until_up([worker_port + i for i in range(workers)] + [port])
+        asyncio.run(_drive(port, clients, 2.0))  # warm every worker up
+        latencies, wall, pinned = asyncio.run(_drive(port, clients, duration))
+    finally:
+        proc.terminate()
+        proc.wait()
+    return {
+        "workers": workers,
+        "clients": clients,
+        "reruns": len(latencies),
+        "reruns_per_s": len(latencies) / wall,
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": _percentile(latencies, 99),
+        "sessions_per_worker": {w: pinned.count(w) for w in sorted(set(pinned))},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="worker counts to test")
+    parser.add_argument("--clients", type=int, default=16, help="concurrent browser sessions")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds of load per worker count")
+    parser.add_argument("--out", help="write results JSON here")
+    args = parser.parse_args(argv)
+
+    results = []
+    for n in args.workers:
+        print(f"running {n} worker(s)...", file=sys.stderr)
+        result = run(n, args.clients, args.duration)
+        base = results[0] if results else result
+        result["efficiency"] = result["reruns_per_s"] / (base["reruns_per_s"] * n / base["workers"])
+        results.append(result)
+        print(f"{n:>3} workers  {result['reruns_per_s']:8.1f} reruns/s  p50 {result['p50_ms']:7.1f} ms  "
+              f"p99 {result['p99_ms']:7.1f} ms  efficiency {result['efficiency']:.0%}", file=sys.stderr)
+
+    report = {"cpus": os.cpu_count(), "results": results}
+    text = json.dumps(report, indent=2)
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+import os
+
 import streamlit as st
 
 # Page config (title and icon)
@@ -22,7 +24,7 @@ with col1:
     st.page_link("pages/building_upgrade.py", label="Building Upgrade Calculator", icon="📈")
     st.page_link("pages/fire_crystals_requirements.py", label="🔥 Fire Crystal Cost")
     st.page_link("pages/hero_gear.py", label="🔵 Hero Gear [Coming soon...]")
-    st.page_link("pages/svs.py", label="⚔️ State vs State Prep Phase [Coming soon...]")
+    st.page_link("pages/svs.py", label="⚔️ State vs State Prep Phase")
 
 
 with col2:
@@ -31,6 +33,10 @@ with col2:
     st.page_link("pages/chief_gear.py", label="🔵 Chief Gear [Coming soon...]")
     st.page_link("pages/hoc.py", label="📅 Hall of Chief [Coming soon...]")
 
+# Client-side mode: built with `python -m wos.bundle`, served with --server.enableStaticServing
+bundle = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "index.html")
+if st.get_option("server.enableStaticServing") and os.path.exists(bundle):
+    st.link_button("⚡ Instant calculator (runs in your browser)", "app/static/index.html")
 
 st.markdown(
     """
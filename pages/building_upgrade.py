@@ -1,34 +1,43 @@
 import streamlit as st
-import pandas as pd
-from datetime import timedelta
-import os
+import io
+
+# Only plain-Python modules at the top: pandas, NumPy and the data tables are
+# imported where a calculation first needs them, so the page paints quickly.
+from wos import metrics, profiles
+from wos.constants import (
+    BUILDING_NAMES,
+    DOUBLE_TIME_BONUS,
+    PET_SPEED_BONUSES,
+    PRESIDENT_BONUS,
+    RESOURCES,
+    VICE_PRESIDENT_BONUS,
+    ZINMAN_COST_REDUCTION,
+)
+from wos.fixed import format_seconds
 
 st.set_page_config(page_title="Upgrade Cost Calculator", page_icon="📈")
 
 # --- Helper functions ---
 
-def format_seconds(seconds: float) -> str:
-    td = timedelta(seconds=int(seconds))
-    days = td.days
-    hours, remainder = divmod(td.seconds, 3600)
-    minutes, seconds = divmod(remainder, 60)
-    if days > 0:
-        return f"{days}d {hours:02d}:{minutes:02d}:{seconds:02d}"
-    else:
-        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-
-def get_csv_filename(building_name: str) -> str:
-    filename = building_name.lower().replace(" ", "") + ".csv"
-    return os.path.join("data", filename)
-
 def load_building_data(name):
-    filename = get_csv_filename(name)
+    from wos.catalog import get_table
+
     try:
-        return pd.read_csv(filename)
-    except FileNotFoundError:
-        st.warning(f"Data file '{filename}' for {name} not found in the 'data' folder.")
+        with metrics.span("load_building_data", building=name):
+            return get_table(name)
+    except FileNotFoundError as e:
+        metrics.count("errors", page="building_upgrade", kind="data_file_not_found")
+        st.warning(f"Data file '{e.filename}' for {name} not found in the 'data' folder.")
         return None
 
+# --- Player profile (restored before any widget is drawn) ---
+PROFILE_KEYS = (
+    ["base_bonus", "zinman_level", "pet_level", "president", "vice_president", "double_time"]
+    + [f"toggle_{b}" for b in BUILDING_NAMES]
+    + [f"{b}_{end}" for b in BUILDING_NAMES for end in ("curr", "target")]
+)
+profiles.sidebar(st, PROFILE_KEYS)
+
 # --- Bonuses & Skills Section ---
 
 st.title("📈 Building Upgrade Calculator")
@@ -36,17 +45,20 @@ st.markdown("Set your bonuses first, then select buildings you want to upgrade."
 
 st.header("Bonus & Skills")
 
+st.session_state.setdefault("base_bonus", "0")
 base_construction_bonus_str = st.text_input(
     "Base Construction Speed Bonus",
-    value="0"
+    key="base_bonus"
 )
 
 try:
     base_construction_bonus = float(base_construction_bonus_str)
     if base_construction_bonus < 0:
+        metrics.count("errors", page="building_upgrade", kind="negative_bonus")
         st.warning("Base Construction Speed Bonus cannot be negative. Reset to 0.")
         base_construction_bonus = 0.0
 except ValueError:
+    metrics.count("errors", page="building_upgrade", kind="invalid_bonus")
     st.warning("Invalid input for Base Construction Speed Bonus. Reset to 0.")
     base_construction_bonus = 0.0
 
@@ -57,7 +69,8 @@ with col1:
         "Zinman Skill Level",
         options=[0, 1, 2, 3, 4, 5],
         index=0,
-        horizontal=True
+        horizontal=True,
+        key="zinman_level"
     )
 
 with col2:
@@ -65,35 +78,24 @@ with col2:
         "Pet Skill Level",
         options=[0, 1, 2, 3, 4, 5],
         index=0,
-        horizontal=True
+        horizontal=True,
+        key="pet_level"
     )
 
-# --- Zinman cost multipliers ---
-zinman_cost_reduction = {
-    0: 1.00,
-    1: 0.97,
-    2: 0.94,
-    3: 0.91,
-    4: 0.88,
-    5: 0.85,
-}
-
-speed_bonus_percent_zinman = zinman_level * 3
-cost_bonus_percent_zinman = zinman_cost_reduction[zinman_level]
+# --- Zinman cost reduction (percent) and pet speed bonus, for the breakdown ---
+speed_bonus_percent_zinman = round((1 - ZINMAN_COST_REDUCTION[zinman_level]) * 100)
+speed_bonus_percent_pet = PET_SPEED_BONUSES[pet_level]
 
-pet_speed_bonuses = [0, 5, 7, 9, 12, 15]
-speed_bonus_percent_pet = pet_speed_bonuses[pet_level]
+president_skill = st.checkbox("President Skill (+10%)", value=False, key="president")
+vice_president_skill = st.checkbox("Vice President Appointment (+10%)", value=False, key="vice_president")
+double_time = st.checkbox("Double Construction Time (20%)", value=False, key="double_time")
 
-president_skill = st.checkbox("President Skill (+10%)", value=False)
-vice_president_skill = st.checkbox("Vice President Appointment (+10%)", value=False)
-double_time = st.checkbox("Double Construction Time (20%)", value=False)
+speed_bonus_percent_president = PRESIDENT_BONUS if president_skill else 0
+speed_bonus_percent_vice_president = VICE_PRESIDENT_BONUS if vice_president_skill else 0
+speed_bonus_double_time = DOUBLE_TIME_BONUS if double_time else 0
 
-speed_bonus_percent_president = 10 if president_skill else 0
-speed_bonus_percent_vice_president = 10 if vice_president_skill else 0
-speed_bonus_double_time = 20 if double_time else 0
-
-# Calculate total speed bonus
-total_speed_bonus_percent = (
+# Calculate total speed bonus (same sum as wos.bonuses.construction_speed_bonus)
+total_speed_bonus_percent = float(
     base_construction_bonus +
     speed_bonus_percent_pet +
     speed_bonus_percent_president +
@@ -121,16 +123,33 @@ with st.expander("Active bonus details"):
 st.markdown("---")
 
 
+# --- Batch planning ---
+with st.expander("Alliance batch planning (CSV / Parquet upload)"):
+    st.markdown(
+        "One row per plan item with a `player` column. Building rows use `building`, "
+        "`current_level`, `target_level` and the bonus columns `base_bonus`, `zinman`, `pet`, "
+        "`president`, `vice_president`, `double_time`. Troop rows use `troop`, `start_level` "
+        "(empty to train), `end_level`, `number` and `training_speed`."
+    )
+    plans_file = st.file_uploader("Plans file", type=["csv", "parquet"])
+    if plans_file is not None:
+        from wos.batch import run_batch
+
+        rows_buffer = io.StringIO()
+        metrics.count("calculations", calculator="batch")
+        try:
+            with metrics.span("calculate", calculator="batch"):
+                summary = run_batch(plans_file, rows_buffer)
+        except (ValueError, KeyError, ImportError) as e:
+            metrics.count("errors", page="building_upgrade", kind="batch_file")
+            st.error(f"Could not process plans file: {e}")
+        else:
+            st.dataframe(summary, hide_index=True)
+            st.download_button("Download per-player totals", summary.to_csv(index=False), "summary.csv", "text/csv")
+            st.download_button("Download per-row results", rows_buffer.getvalue(), "rows.csv", "text/csv")
+
 # --- Buildings selection ---
-building_names = [
-    "Furnace",
-    "Embassy",
-    "Infantry Camp",
-    "Marksman Camp",
-    "Lancer Camp",
-    "Command Center",
-    "Infirmary"
-]
+building_names = BUILDING_NAMES
 
 # Initialize session_state for active_buildings if not set
 if "active_buildings" not in st.session_state:
@@ -154,11 +173,11 @@ if not st.session_state.active_buildings:
 upgrade_selections = {}
 for bname in st.session_state.active_buildings:
     st.subheader(bname)
-    df = load_building_data(bname)
-    if df is None:
+    table = load_building_data(bname)
+    if table is None:
         continue
 
-    levels = df["level"].tolist()
+    levels = table.levels.tolist()
     min_level, max_level = min(levels), max(levels)
 
     col1, col2 = st.columns(2)
@@ -171,7 +190,7 @@ for bname in st.session_state.active_buildings:
             continue
         target_level = st.selectbox(f"{bname} Target Level", options=possible_targets, key=f"{bname}_target")
 
-    upgrade_selections[bname] = (current_level, target_level, df)
+    upgrade_selections[bname] = (current_level, target_level)
 
 if not upgrade_selections:
     st.info("Please select valid upgrade levels.")
@@ -180,48 +199,202 @@ if not upgrade_selections:
 
 # --- Add Calculate button ---
 if st.button("Calculate Upgrades Cost"):
+    import pandas as pd
+    from wos.calculators import building_upgrade
+
+    resources = list(RESOURCES)
+    metrics.count("calculations", calculator="building_upgrade")
+    # Zinman cost reduction, speed bonus and double time are applied by the shared calculator
+    with metrics.span("calculate", calculator="building_upgrade"):
+        result = building_upgrade(
+            upgrade_selections,
+            base_bonus=base_construction_bonus,
+            zinman_level=zinman_level,
+            pet_level=pet_level,
+            president=president_skill,
+            vice_president=vice_president_skill,
+            double_time=double_time,
+        )
+
+    with metrics.span("render", page="building_upgrade"):
+        # Format output nicely
+        total_resources = result["resources"]
+        total_time_str = format_seconds(result["time"])
+
+        # Display results in a nice table
+        st.header("🧾 Total Upgrade Summary")
+        # Format numbers with commas except the 'Time' row which is already a string
+        formatted_costs = [
+            f"{total_resources[r]:,}" for r in resources
+        ] + [total_time_str]
+        result_df = pd.DataFrame({
+            "Resource": [r.capitalize() for r in resources] + ["Time"],
+            "Total Cost": formatted_costs
+        })
+
+        # Display costs as numbers, time as string
+        # Show in the order: meat, wood, coal, iron, fire crystals, time
+        st.table(result_df.set_index("Resource"))
+
+
+# --- Scenario comparison ---
+with st.expander("⚖️ Compare bonus scenarios"):
+    st.caption("Each column is one bonus configuration, starting from the settings above. "
+               "Costs are summed once; a column is only recalculated when its own settings change.")
+    scenario_count = st.number_input("Scenarios", min_value=2, max_value=4, value=2, step=1, key="scenario_count")
+    scenarios = []
+    for i, col in enumerate(st.columns(int(scenario_count))):
+        with col:
+            st.markdown(f"**Scenario {i + 1}**")
+            scenarios.append({
+                "name": f"Scenario {i + 1}",
+                "base_bonus": base_construction_bonus,
+                "zinman_level": st.selectbox("Zinman", options=list(ZINMAN_COST_REDUCTION), index=zinman_level,
+                                             key=f"scenario_{i}_zinman"),
+                "pet_level": st.selectbox("Pet", options=list(range(len(PET_SPEED_BONUSES))), index=pet_level,
+                                          key=f"scenario_{i}_pet"),
+                "president": st.checkbox("President", value=president_skill, key=f"scenario_{i}_president"),
+                "vice_president": st.checkbox("Vice President", value=vice_president_skill,
+                                              key=f"scenario_{i}_vice_president"),
+                "double_time": st.checkbox("Double Time", value=double_time, key=f"scenario_{i}_double_time"),
+            })
+
+    if st.toggle("Show comparison", key="scenario_show"):
+        from wos.calculators import building_scenarios
+
+        metrics.count("calculations", calculator="building_scenarios")
+        with metrics.span("calculate", calculator="building_scenarios"):
+            compared = building_scenarios(upgrade_selections, scenarios)
+        with metrics.span("render", page="building_upgrade"):
+            matrix = {"Resource": [r.capitalize() for r in RESOURCES] + ["Time", "Speed Bonus"]}
+            for result in compared:
+                matrix[result["name"]] = (
+                    [f"{result['resources'][r]:,}" for r in RESOURCES]
+                    + [format_seconds(result["time"]), f"{result['speed_bonus']:.2f}%"]
+                )
+            st.dataframe(matrix, hide_index=True)
+
+
+# --- Build order schedule ---
+with st.expander("🗓️ Build order schedule (builder queues & resource income)"):
+    queues = st.number_input("Builder queues", min_value=1, max_value=4, value=2, step=1)
+    st.caption("Hourly production and current stockpile. Leave all at 0 to ignore resources.")
+    income, stock = {}, {}
+    for r in RESOURCES:
+        col1, col2 = st.columns(2)
+        with col1:
+            income[r] = st.number_input(f"{r.capitalize()} per hour", min_value=0, step=1, key=f"income_{r}")
+        with col2:
+            stock[r] = st.number_input(f"{r.capitalize()} on hand", min_value=0, step=1, key=f"stock_{r}")
+
+    if st.button("Plan Schedule"):
+        from wos.scheduler import schedule
+
+        use_resources = any(income.values()) or any(stock.values())
+        metrics.count("calculations", calculator="schedule")
+        try:
+            with metrics.span("calculate", calculator="schedule"):
+                plan = schedule(
+                    upgrade_selections,
+                    queues=int(queues),
+                    income=income if use_resources else None,
+                    stock=stock if use_resources else None,
+                    base_bonus=base_construction_bonus,
+                    zinman_level=zinman_level,
+                    pet_level=pet_level,
+                    president=president_skill,
+                    vice_president=vice_president_skill,
+                    double_time=double_time,
+                )
+        except ValueError as e:
+            metrics.count("errors", page="building_upgrade", kind="unaffordable_schedule")
+            st.error(str(e))
+        else:
+            col1, col2 = st.columns(2)
+            col1.metric("Completion", format_seconds(plan["makespan"]))
+            col2.metric("Single queue", format_seconds(plan["serial_time"]))
+            st.caption(f"No schedule can finish before {format_seconds(plan['lower_bound'])}.")
+            st.dataframe(
+                {
+                    "Building": [s["building"] for s in plan["steps"]],
+                    "Level": [s["level"] for s in plan["steps"]],
+                    "Queue": [s["queue"] for s in plan["steps"]],
+                    "Start": [format_seconds(s["start"]) for s in plan["steps"]],
+                    "End": [format_seconds(s["end"]) for s in plan["steps"]],
+                    "Waiting for resources": [format_seconds(s["wait"]) for s in plan["steps"]],
+                },
+                hide_index=True,
+            )
+
+    # Recomputed on every change so the projection follows the level selectors.
+    if st.toggle("Show when each step is affordable", key="projection_show"):
+        from wos.calculators import building_affordability
+
+        metrics.count("calculations", calculator="building_affordability")
+        with metrics.span("calculate", calculator="building_affordability"):
+            projection = building_affordability(upgrade_selections, income, stock, zinman_level=zinman_level)
+        with metrics.span("render", page="building_upgrade"):
+            steps = projection["steps"]
+            if projection["afford_at"] is None:
+                never = sorted({s["bottleneck"] for s in steps if s["afford_at"] is None})
+                st.warning(f"Some steps can never be afforded: no income for {', '.join(never)}.")
+            else:
+                st.metric("Whole plan affordable in", format_seconds(projection["afford_at"]))
+            limiting = {r: n for r, n in projection["bottlenecks"].items() if n}
+            if limiting:
+                st.caption("Bottleneck steps: " + ", ".join(f"{r.capitalize()} {n}" for r, n in limiting.items()))
+            affordable = [s for s in steps if s["afford_at"] is not None]
+            if affordable:
+                st.line_chart(
+                    {"Hours": [s["afford_at"] / 3600 for s in affordable]},
+                    x_label="Upgrade step", y_label="Hours until affordable",
+                )
+            st.dataframe(
+                {
+                    "Building": [s["building"] for s in steps],
+                    "Level": [s["level"] for s in steps],
+                    "Affordable in": [
+                        "never" if s["afford_at"] is None else format_seconds(s["afford_at"]) for s in steps
+                    ],
+                    "Bottleneck": [(s["bottleneck"] or "-").capitalize() for s in steps],
+                },
+                hide_index=True,
+            )
+
+
+# --- Inverse mode: highest levels reachable with what you have ---
+with st.expander("🔎 What can I reach with my stockpile?"):
+    st.caption("Enter what you have on hand. Leave a field empty for no limit; 0 means you have none.")
+    on_hand = {}
+    cols = st.columns(3)
+    for idx, r in enumerate(RESOURCES):
+        on_hand[r] = cols[idx % 3].number_input(f"{r.capitalize()}", value=None, min_value=0, step=1,
+                                                key=f"have_{r}")
+    speedup_hours = cols[len(RESOURCES) % 3].number_input(
+        "Construction time available (hours)", value=None, min_value=0.0, step=1.0, key="have_hours"
+    )
 
-    resources = ["meat", "wood", "coal", "iron", "firecrystals"]
-    total_resources = pd.Series(dtype=float)
-    total_base_time = 0.0
-
-    for bname, (cur_lvl, tgt_lvl, df) in upgrade_selections.items():
-        upgrade_df = df[(df["level"] > cur_lvl) & (df["level"] <= tgt_lvl)]
-        if upgrade_df.empty:
-            continue
-
-        # Apply Zinman cost reduction only to all resources except firecrystals
-        cost_df = upgrade_df[resources].copy()
-        # Apply multiplier except on 'firecrystals'
-        cost_df.loc[:, cost_df.columns != "firecrystals"] *= cost_bonus_percent_zinman
-
-        total_resources = total_resources.add(cost_df.sum(), fill_value=0)
-        total_base_time += upgrade_df["time"].sum()
-
-    # Apply speed bonus to time, including double time option
-    reduction = 1 / (1 + total_speed_bonus_percent / 100)
-    final_time = total_base_time * reduction
-    if double_time:
-        final_time *= 2
-
-    # Format output nicely
-    total_resources = total_resources.fillna(0).astype(int)
-    total_time_str = format_seconds(final_time)
-
-    # Display results in a nice table
-    st.header("🧾 Total Upgrade Summary")
-    # Format numbers with commas except the 'Time' row which is already a string
-    formatted_costs = [
-        f"{total_resources[r]:,}" for r in resources
-    ] + [total_time_str]
-    result_df = pd.DataFrame({
-        "Resource": [r.capitalize() for r in resources] + ["Time"],
-        "Total Cost": formatted_costs
-    })
-
-    # Display costs as numbers, time as string
-    # Show in the order: meat, wood, coal, iron, fire crystals, time
-    st.table(result_df.set_index("Resource"))
+    if st.button("Find Reachable Levels"):
+        from wos.inverse import reachable_level
+
+        stock_limits = {r: v for r, v in on_hand.items() if v is not None}
+        metrics.count("calculations", calculator="reachable_level")
+        rows = []
+        for bname, (cur_lvl, _) in upgrade_selections.items():
+            reach = reachable_level(
+                bname, cur_lvl, stock_limits,
+                time_budget=None if speedup_hours is None else speedup_hours * 3600,
+                zinman_level=zinman_level,
+                speed_bonus=total_speed_bonus_percent,
+                double_time=double_time,
+            )
+            rows.append({
+                "Building": bname,
+                "Current Level": cur_lvl,
+                "Reachable Level": reach["level"],
+                "Limited By": ", ".join(reach["limited_by"]),
+            })
+        st.dataframe(rows, hide_index=True)
 
 
 if st.button("🏠 Back to Homepage"):
@@ -1,6 +1,7 @@
 import streamlit as st
-import pandas as pd
-import os
+
+from wos import metrics
+from wos.constants import BUILDING_NAMES
 
 st.title("🔥 Fire Crystal Calculator")
 st.markdown("""Calculate how many Fire Crystals are needed to upgrade selected buildings.
@@ -8,21 +9,10 @@ st.markdown("""Calculate how many Fire Crystals are needed to upgrade selected b
 Every 5 levels = 1 FC level (For example: Furnace level 35 = FC1)
 """)
 
-# Mapping of building names to their CSV filenames
-BUILDINGS = {
-    "Furnace": "furnace.csv",
-    "Embassy": "embassy.csv",
-    "Infirmary": "infirmary.csv",
-    "Command Center": "commandcenter.csv",
-    "Infantry Camp": "infantrycamp.csv",
-    "Lancer Camp": "lancercamp.csv",
-    "Marksman Camp": "marksmancamp.csv",
-}
-
 selected_buildings = {}
 
 # Toggle and input for each building
-for name, filename in BUILDINGS.items():
+for name in BUILDING_NAMES:
     with st.expander(name):
         use_building = st.toggle(f"Upgrade {name}")
         if use_building:
@@ -31,7 +21,7 @@ for name, filename in BUILDINGS.items():
                 start_level = st.number_input(f"{name} Start Level", min_value=30, max_value=54, key=f"{name}_start")
             with col2:
                 end_level = st.number_input(f"{name} Target Level", min_value=31, max_value=55, key=f"{name}_end")
-            selected_buildings[name] = (filename, start_level, end_level)
+            selected_buildings[name] = (start_level, end_level)
 
 # Calculate button
 st.markdown("""
@@ -44,25 +34,93 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 if st.button("Calculate"):
-    total_crystals = 0
-    details = []
-    for name, (filename, start, end) in selected_buildings.items():
+    from wos.calculators import fire_crystals
+
+    ranges = {}
+    for name, (start, end) in selected_buildings.items():
         if start >= end:
+            metrics.count("errors", page="fire_crystals_requirements", kind="invalid_range")
             st.warning(f"{name}: Start level must be less than target level.")
             continue
-        try:
-            df = pd.read_csv(f"data/{filename}")
-            df = df[(df['level'] > start) & (df['level'] <= end)]
-            cost = df['firecrystals'].sum()
-            total_crystals += cost
-            details.append(f"🔹 {name}: {int(cost)} Fire Crystals")
-        except Exception as e:
-            st.error(f"Error loading {name} data: {e}")
+        ranges[name] = (start, end)
+
+    metrics.count("calculations", calculator="fire_crystals")
+    try:
+        with metrics.span("calculate", calculator="fire_crystals"):
+            result = fire_crystals(ranges)
+    except (OSError, ValueError) as e:
+        metrics.count("errors", page="fire_crystals_requirements", kind="data_error")
+        st.error(f"Error loading building data: {e}")
+        result = {"buildings": {}, "total": 0}
+    total_crystals = result["total"]
+    details = [f"🔹 {name}: {int(cost)} Fire Crystals" for name, cost in result["buildings"].items()]
 
     st.subheader("Fire Crystal Summary")
     st.write("\n".join(details))
     st.success(f"**Total Fire Crystals Required: {int(total_crystals)}**")
 
 
+# --- Planner: cheapest valid path to a furnace level ---
+st.markdown("---")
+st.header("🧭 Furnace FC Planner")
+st.markdown("Furnace level L needs the Embassy at L-1, and no building can be above the Furnace. "
+            "Enter your current levels to get the cheapest valid upgrade path.")
+
+current_levels = {}
+cols = st.columns(3)
+for idx, name in enumerate(BUILDING_NAMES):
+    current_levels[name] = cols[idx % 3].number_input(
+        f"{name} level", min_value=1, max_value=55, value=30, key=f"plan_{name}"
+    )
+col1, col2 = st.columns(2)
+with col1:
+    plan_target = st.number_input("Target Furnace level", min_value=31, max_value=55, value=35, key="plan_target")
+with col2:
+    plan_budget = st.number_input("Fire Crystals on hand (leave empty for no limit)", value=None, min_value=0,
+                                  step=10, key="plan_budget")
+
+if st.button("Plan"):
+    from wos.calculators import fire_crystal_plan
+    from wos.fc_planner import fc_label
+
+    metrics.count("calculations", calculator="fire_crystal_plan")
+    try:
+        with metrics.span("calculate", calculator="fire_crystal_plan"):
+            plan = fire_crystal_plan(current_levels, plan_target, plan_budget)
+    except (OSError, ValueError) as e:
+        metrics.count("errors", page="fire_crystals_requirements", kind="plan_error")
+        st.error(str(e))
+    else:
+        with metrics.span("render", page="fire_crystals_requirements"):
+            col1, col2 = st.columns(2)
+            col1.metric(f"Fire Crystals to {fc_label(plan['target'])}", f"{plan['firecrystals']:,}")
+            col2.metric("Base construction time", f"{plan['time'] / 86400:.1f} days")
+            if plan["reachable"] is not None:
+                if plan["affordable"]:
+                    st.success(f"Affordable. Your budget reaches Furnace {fc_label(plan['reachable'])}.")
+                else:
+                    st.warning(f"Not enough Fire Crystals. Your budget reaches Furnace {fc_label(plan['reachable'])}.")
+            st.subheader("Upgrade order")
+            st.dataframe(
+                {
+                    "Building": [s["building"] for s in plan["steps"]],
+                    "Level": [fc_label(s["level"]) for s in plan["steps"]],
+                    "Fire Crystals": [s["firecrystals"] for s in plan["steps"]],
+                },
+                hide_index=True,
+            )
+            st.subheader("Next upgrades by Fire Crystals per hour of construction")
+            st.dataframe(
+                {
+                    "Building": [a["building"] for a in plan["alternatives"]],
+                    "Upgrade": [f"{fc_label(a['from'])} → {fc_label(a['to'])}" for a in plan["alternatives"]],
+                    "Fire Crystals": [a["firecrystals"] for a in plan["alternatives"]],
+                    "FC per hour": [round(a["fc_per_hour"] or 0, 2) for a in plan["alternatives"]],
+                    "Affordable": [a["affordable"] for a in plan["alternatives"]],
+                },
+                hide_index=True,
+            )
+
+
 if st.button("🏠 Back to Homepage"):
     st.switch_page("home.py")
@@ -1 +1,144 @@
+import streamlit as st
 
+# The optimizer, NumPy and the data tables are imported on Optimize, not at startup.
+from wos import metrics, profiles
+from wos.constants import BUILDING_NAMES, SVS_POINTS, TROOP_RESOURCES, TROOP_TYPES, ZINMAN_COST_REDUCTION
+from wos.fixed import format_seconds
+
+st.set_page_config(page_title="SvS Prep Phase Optimizer", page_icon="⚔️")
+
+# --- Player profile (restored before any widget is drawn) ---
+SPEEDUPS = {"construction": "Construction", "training": "Training", "general": "General"}
+PROFILE_KEYS = (
+    [f"svs_{s}_hours" for s in SPEEDUPS]
+    + [f"svs_{r}" for r in TROOP_RESOURCES + ("firecrystals",)]
+    + ["svs_construction_speed", "svs_training_speed", "svs_zinman"]
+    + [f"svs_use_{b}" for b in BUILDING_NAMES]
+    + [f"svs_{b}_{end}" for b in BUILDING_NAMES for end in ("curr", "target")]
+    + [f"svs_{t}_{field}" for t in TROOP_TYPES for field in ("max_tier", "owned_tier", "owned")]
+)
+profiles.sidebar(st, PROFILE_KEYS)
+
+st.title("⚔️ SvS Prep Phase Optimizer")
+st.markdown(
+    "Enter your speedups, resources and fire crystals. The optimizer splits them between construction, "
+    "troop training and troop promotion to score the most prep phase points."
+)
+st.caption(
+    f"Points used: {SVS_POINTS['speedup_minute']} per speedup minute, {SVS_POINTS['fire_crystal']:,} per fire "
+    f"crystal, {SVS_POINTS['troop_power']} per troop power gained."
+)
+
+# --- Inventory ---
+st.header("Inventory")
+cols = st.columns(3)
+speedup_hours = {}
+for idx, (key, label) in enumerate(SPEEDUPS.items()):
+    speedup_hours[key] = cols[idx].number_input(f"{label} speedups (hours)", min_value=0.0, step=1.0,
+                                                key=f"svs_{key}_hours")
+
+cols = st.columns(3)
+stock = {}
+for idx, r in enumerate(TROOP_RESOURCES + ("firecrystals",)):
+    label = "Fire Crystals" if r == "firecrystals" else r.capitalize()
+    stock[r] = cols[idx % 3].number_input(label, min_value=0, step=1, key=f"svs_{r}")
+
+# --- Bonuses ---
+st.header("Bonuses")
+col1, col2 = st.columns(2)
+construction_speed = col1.number_input("Construction speed (%)", min_value=0.0, step=1.0, key="svs_construction_speed")
+training_speed = col2.number_input("Training speed (%)", min_value=0.0, step=1.0, key="svs_training_speed")
+zinman_level = st.radio("Zinman Skill Level", options=list(ZINMAN_COST_REDUCTION), horizontal=True, key="svs_zinman")
+
+# --- Buildings ---
+st.header("Buildings")
+buildings = {}
+for name in BUILDING_NAMES:
+    with st.expander(name):
+        if st.toggle(f"Upgrade {name}", key=f"svs_use_{name}"):
+            col1, col2 = st.columns(2)
+            current = col1.number_input(f"{name} Current Level", min_value=1, max_value=54, key=f"svs_{name}_curr")
+            target = col2.number_input(f"{name} Highest Target Level", min_value=2, max_value=55,
+                                       key=f"svs_{name}_target")
+            if target > current:
+                buildings[name] = (int(current), int(target))
+            else:
+                st.warning(f"Target level must be above the current level for {name}.")
+
+# --- Troops ---
+st.header("Troops")
+troops = {}
+for troop in TROOP_TYPES:
+    with st.expander(troop):
+        col1, col2, col3 = st.columns(3)
+        max_tier = col1.number_input("Highest tier you can train", min_value=0, max_value=11,
+                                     key=f"svs_{troop}_max_tier", help="0 = do not train or promote")
+        owned_tier = col2.number_input("Owned troops tier", min_value=1, max_value=10, key=f"svs_{troop}_owned_tier")
+        owned = col3.number_input("Owned troops to promote", min_value=0, step=100, key=f"svs_{troop}_owned")
+        if max_tier:
+            troops[troop] = {"max_tier": int(max_tier), "owned": {int(owned_tier): int(owned)} if owned else {}}
+
+# --- Optimize ---
+if st.button("Optimize"):
+    from wos.calculators import svs_plan
+
+    inventory = {**stock, **{f"{k}_minutes": v * 60 for k, v in speedup_hours.items()}}
+    metrics.count("calculations", calculator="svs_plan")
+    try:
+        with metrics.span("calculate", calculator="svs_plan"):
+            plan = svs_plan(inventory, buildings, troops, construction_speed, training_speed, zinman_level)
+    except ValueError as e:
+        metrics.count("errors", page="svs", kind="invalid_plan")
+        st.error(str(e))
+    else:
+        with metrics.span("render", page="svs"):
+            col1, col2 = st.columns(2)
+            col1.metric("Prep phase points", f"{plan['points']:,}")
+            col2.metric("Best possible", f"{plan['upper_bound']:,}", help="No allocation can score more than this.")
+            st.caption(
+                " · ".join(f"{k.capitalize()}: {v:,}" for k, v in plan["points_by_source"].items())
+                + f" — within {plan['gap']:.1%} of the best possible"
+            )
+            if plan["buildings"]:
+                st.subheader("🏗️ Construction")
+                st.dataframe(
+                    {
+                        "Building": list(plan["buildings"]),
+                        "From": [b["from"] for b in plan["buildings"].values()],
+                        "To": [b["to"] for b in plan["buildings"].values()],
+                        "Fire Crystals": [b["firecrystals"] for b in plan["buildings"].values()],
+                        "Speedups": [format_seconds(b["minutes"] * 60) for b in plan["buildings"].values()],
+                        "Points": [f"{b['points']:,.0f}" for b in plan["buildings"].values()],
+                    },
+                    hide_index=True,
+                )
+            for title, rows, tier_columns in (
+                ("🪖 Training", plan["training"], {"Tier": "tier"}),
+                ("⬆️ Promotion", plan["promotion"], {"From": "from", "To": "to"}),
+            ):
+                if rows:
+                    st.subheader(title)
+                    st.dataframe(
+                        {
+                            "Troop": [r["troop"] for r in rows],
+                            **{label: [r[k] for r in rows] for label, k in tier_columns.items()},
+                            "Number": [f"{r['number']:,}" for r in rows],
+                            "Speedups": [format_seconds(r["minutes"] * 60) for r in rows],
+                            "Points": [f"{r['points']:,.0f}" for r in rows],
+                        },
+                        hide_index=True,
+                    )
+            st.subheader("Left over")
+            st.dataframe(
+                {
+                    "Item": [k.replace("_", " ").replace("firecrystals", "fire crystals").capitalize() for k in plan["left"]],
+                    "Amount": [
+                        format_seconds(v * 60) if k.endswith("_minutes") else f"{v:,.0f}"
+                        for k, v in plan["left"].items()
+                    ],
+                },
+                hide_index=True,
+            )
+
+if st.button("🏠 Back to Homepage"):
+    st.switch_page("home.py")
@@ -1,36 +1,17 @@
 import streamlit as st
-import pandas as pd
-from datetime import timedelta
-import os
+
+# pandas, NumPy and the troop tables are imported on Calculate, not at startup.
+from wos import metrics, profiles
+from wos.constants import TROOP_RESOURCES
+from wos.fixed import format_seconds
 
 st.set_page_config(page_title="Troops Training & Promotion", page_icon="🪖")
 
 st.title("Troops Training & Promotion")
 st.markdown("Select if you want to train or upgrade troops, the fill the required fields and select how many troops you want to train/upgrade in total")
 
-# --- Helper functions ---
-def format_seconds(seconds: float) -> str:
-    td = timedelta(seconds=int(seconds))
-    days = td.days
-    hours, remainder = divmod(td.seconds, 3600)
-    minutes, seconds = divmod(remainder, 60)
-    if days > 0:
-        return f"{days}d {hours:02d}:{minutes:02d}:{seconds:02d}"
-    else:
-        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-
-base_train_time ={1:   12, 
-                  2:   17,
-                  3:   24,
-                  4:   32,
-                  5:   44,
-                  6:   60,
-                  7:   83,
-                  8:  113,
-                  9:  131,
-                  10: 152,
-                  11: 180}
-
+# --- Player profile (restored before any widget is drawn) ---
+profiles.sidebar(st, ["action", "training_speed", "training_capacity", "capacity_bonus"])
 
 # --- First define what to do: train or upgrade ---
 # Create two columns for buttons
@@ -53,20 +34,41 @@ if st.session_state.action in ["train", "upgrade"]:
     st.subheader(f"{st.session_state.action.capitalize()} Parameters")
 
     param_col1, param_col2 = st.columns(2)
+    st.session_state.setdefault("training_speed", "10")
+    st.session_state.setdefault("training_capacity", "100")
     with param_col1:
-        training_speed_input = st.text_input("Training Speed", value="10")
+        training_speed_input = st.text_input("Training Speed", key="training_speed")
     with param_col2:
-        training_capacity_input = st.text_input("Training Capacity", value="100")
-    capacity_bonus = st.checkbox("3x Capacity city bonus", value=False)
-    # Validate inputs
+        training_capacity_input = st.text_input("Training Capacity", key="training_capacity")
+    capacity_bonus = st.checkbox("3x Capacity city bonus", value=False, key="capacity_bonus")
+    with st.expander("Timed events (optional)"):
+        st.caption("Events apply to batches that start while they are active.")
+        ev_col1, ev_col2, ev_col3 = st.columns(3)
+        event_speed = ev_col1.number_input("Speedup event (+% speed)", min_value=0.0, step=5.0, key="event_speed")
+        event_speed_start = ev_col2.number_input("Starts in (hours)", min_value=0.0, step=1.0, key="event_speed_start")
+        event_speed_hours = ev_col3.number_input("Lasts (hours)", min_value=0.0, step=1.0, key="event_speed_hours")
+        ev_col1, ev_col2, ev_col3 = st.columns(3)
+        event_capacity = ev_col1.number_input("Capacity event (x capacity)", min_value=1.0, step=0.5,
+                                              key="event_capacity")
+        event_capacity_start = ev_col2.number_input("Starts in (hours)", min_value=0.0, step=1.0,
+                                                    key="event_capacity_start")
+        event_capacity_hours = ev_col3.number_input("Lasts (hours)", min_value=0.0, step=1.0,
+                                                    key="event_capacity_hours")
+    # Validate inputs: costs need the speed, only the queue simulation needs the capacity
     try:
         training_speed = float(training_speed_input)
+    except ValueError:
+        metrics.count("errors", page="troops_calculator", kind="invalid_speed_or_capacity")
+        st.error("Please enter a valid number for the training speed.")
+        st.stop()
+    try:
         training_capacity = int(training_capacity_input)
         if capacity_bonus: 
             training_capacity = training_capacity * 3 
-
     except ValueError:
-        st.error("Please enter valid values for both speed and capacity.")
+        metrics.count("errors", page="troops_calculator", kind="invalid_speed_or_capacity")
+        st.error("Please enter a whole number for the training capacity.")
+        training_capacity = None
 
 st.title("Select Troops")
 
@@ -135,102 +137,117 @@ for troop in troops:
                     "number": number
                 }
 
-# Load CSVs into a dict keyed by troop name (lowercase)
-troop_data = {}
-for troop in ["infantry", "lancer", "marksman"]:
-    file_path = f"data/{troop}.csv"
-    if os.path.exists(file_path):
-        troop_data[troop] = pd.read_csv(file_path)
-    else:
-        st.warning(f"File {file_path} not found!")
-
 if st.button("Calculate"):
     if not troop_params:
         st.warning("Select at least one troop and specify parameters.")
     else:
-        total_resources = {"Meat": 0, "Wood": 0, "Coal": 0, "Iron": 0}
-        total_base_time_sec = 0  # Total base training time in seconds
-        troop_key_map = {"Infantry": "infantry", "Lancers": "lancer", "Marksmen": "marksman"}
-
-        for troop, params in troop_params.items():
-            troop_df = troop_data[troop_key_map[troop]]
+        import pandas as pd
+        from wos.calculators import troop_promotion, troop_training
+        from wos.training import simulate
+
+        # Price every selected troop in one call to the shared calculator
+        orders = [{"troop": troop, **params} for troop, params in troop_params.items()]
+        calculate = troop_training if st.session_state.action == "train" else troop_promotion
+        metrics.count("calculations", calculator=calculate.__name__)
+        try:
+            with metrics.span("calculate", calculator=calculate.__name__):
+                result = calculate(orders, training_speed)
+        except FileNotFoundError as e:
+            metrics.count("errors", page="troops_calculator", kind="data_file_not_found")
+            st.error(f"File {e.filename} not found!")
+            st.stop()
+        except ValueError as e:
+            metrics.count("errors", page="troops_calculator", kind="level_data_missing")
+            st.error(str(e))
+            st.stop()
+
+        total_resources = {r.capitalize(): v for r, v in result["resources"].items()}
+        total_base_time_sec = result["base_time"]  # Total base training time in seconds
+        total_reduced_time_sec = result["time"]
+
+        with metrics.span("render", page="troops_calculator"):
+            # Display resource totals
+            st.subheader("Total Resource Cost")
+            total_df = pd.DataFrame(total_resources.items(), columns=["Resource", "Total Amount"])
+            st.table(total_df)
+
+            # Display training times
+            st.subheader("Training Time")
+            st.markdown(f"**Total Base Training Time:** {format_seconds(total_base_time_sec)}")
+            st.markdown(f"**Reduced Training Time:** {format_seconds(total_reduced_time_sec)}")
+
+        # Simulate the camps: batches of training_capacity, one camp per troop type in parallel
+        if training_capacity is None:
+            st.info("Enter a whole number for the training capacity to simulate the training queue.")
+        else:
+            speedups = []
+            if event_speed > 0 and event_speed_hours > 0:
+                speedups.append({"start": event_speed_start * 3600,
+                                 "end": (event_speed_start + event_speed_hours) * 3600, "speed": event_speed})
+            capacity_events = []
+            if event_capacity > 1 and event_capacity_hours > 0:
+                capacity_events.append({"start": event_capacity_start * 3600,
+                                        "end": (event_capacity_start + event_capacity_hours) * 3600,
+                                        "multiplier": event_capacity})
+            try:
+                with metrics.span("calculate", calculator="training_queue"):
+                    queue = simulate(orders, training_capacity, training_speed, speedups, capacity_events)
+            except ValueError as e:
+                metrics.count("errors", page="troops_calculator", kind="training_queue")
+                st.error(str(e))
+                st.stop()
+
+            with metrics.span("render", page="troops_calculator"):
+                st.subheader("Training Queue")
+                st.markdown(f"**All camps done in:** {format_seconds(queue['end'])} ({queue['batches']:,} batches)")
+                camp_cols = st.columns(max(1, len(queue["camps"])))
+                for col, (troop, camp) in zip(camp_cols, queue["camps"].items()):
+                    col.metric(f"{troop} camp", format_seconds(camp["end"]), f"{camp['batches']:,} batches",
+                               delta_color="off")
+                runs = [run for camp in queue["camps"].values() for run in camp["runs"]]
+                st.dataframe(
+                    {
+                        "Camp": [r["troop"] for r in runs],
+                        "Batches": [r["batches"] for r in runs],
+                        "Troops per batch": [r["size"] for r in runs],
+                        "Speed": [f"{r['speed']:g}%" for r in runs],
+                        "First batch starts": [format_seconds(r["start"]) for r in runs],
+                        "Each batch takes": [format_seconds(r["duration"]) for r in runs],
+                        "Last batch ends": [format_seconds(r["end"]) for r in runs],
+                    },
+                    hide_index=True,
+                )
 
-            def parse_int(x):
-                if isinstance(x, str):
-                    return int(x.replace(",", ""))
-                return int(x)
 
+# --- Inverse mode: how many troops can my stockpile pay for? ---
+if st.session_state.action in ["train", "upgrade"]:
+    with st.expander("🔎 How many troops can I afford?"):
+        st.caption("Enter what you have on hand. Leave a field empty for no limit; 0 means you have none.")
+        on_hand = {}
+        cols = st.columns(len(TROOP_RESOURCES))
+        for idx, r in enumerate(TROOP_RESOURCES):
+            on_hand[r] = cols[idx].number_input(r.capitalize(), value=None, min_value=0, step=1, key=f"have_{r}")
+        speedup_hours = st.number_input(
+            "Training time available (hours)", value=None, min_value=0.0, step=1.0, key="have_hours"
+        )
+        if st.session_state.action == "upgrade":
+            from_level = st.selectbox("Promote from level", options=list(range(1, 11)), key="have_from_level")
+
+        if st.button("Find Max Troops"):
+            import pandas as pd
+            from wos.inverse import max_promotable, max_trainable
+
+            stock_limits = {r: v for r, v in on_hand.items() if v is not None}
+            time_budget = None if speedup_hours is None else speedup_hours * 3600
+            metrics.count("calculations", calculator="max_troops")
             if st.session_state.action == "train":
-                level = params["level"]
-                number = params["number"]
-
-                row = troop_df[troop_df["Level"] == level]
-                if row.empty:
-                    st.error(f"Level {level} not found for {troop}")
-                    continue
-                row = row.iloc[0]
-
-                meat_cost = parse_int(row["Meat"])
-                wood_cost = parse_int(row["Wood"])
-                coal_cost = parse_int(row["Coal"])
-                iron_cost = parse_int(row["Iron"])
-
-                total_resources["Meat"] += meat_cost * number
-                total_resources["Wood"] += wood_cost * number
-                total_resources["Coal"] += coal_cost * number
-                total_resources["Iron"] += iron_cost * number
-
-                base_time_per_troop = base_train_time[level]
-                total_base_time_sec += base_time_per_troop * number
-
-            elif st.session_state.action == "upgrade":
-                start = params["start_level"]
-                end = params["end_level"]
-                number = params["number"]
-
-                for lvl in range(start + 1, end + 1):
-                    row_now = troop_df[troop_df["Level"] == lvl]
-                    row_prev = troop_df[troop_df["Level"] == lvl - 1]
-
-                    if row_now.empty or row_prev.empty:
-                        st.error(f"Level data missing for level {lvl} or {lvl-1} in {troop}")
-                        continue
-
-                    row_now = row_now.iloc[0]
-                    row_prev = row_prev.iloc[0]
-
-                    meat_cost = parse_int(row_now["Meat"]) - parse_int(row_prev["Meat"])
-                    wood_cost = parse_int(row_now["Wood"]) - parse_int(row_prev["Wood"])
-                    coal_cost = parse_int(row_now["Coal"]) - parse_int(row_prev["Coal"])
-                    iron_cost = parse_int(row_now["Iron"]) - parse_int(row_prev["Iron"])
-                    time_cost = base_train_time[lvl] - base_train_time[lvl - 1]
-
-                    total_resources["Meat"] += meat_cost * number
-                    total_resources["Wood"] += wood_cost * number
-                    total_resources["Coal"] += coal_cost * number
-                    total_resources["Iron"] += iron_cost * number
-                    total_base_time_sec += time_cost * number
-
-        # Calculate reduced training time
-        reduction_factor = 1 / (1 + training_speed / 100)
-        total_reduced_time_sec = total_base_time_sec * reduction_factor
-
-        # Format time
-        def format_time(seconds):
-            hours = int(seconds // 3600)
-            minutes = int((seconds % 3600) // 60)
-            secs = int(seconds % 60)
-            return f"{hours}h {minutes}m {secs}s"
-
-        # Display resource totals
-        st.subheader("Total Resource Cost")
-        total_df = pd.DataFrame(total_resources.items(), columns=["Resource", "Total Amount"])
-        st.table(total_df)
-
-        # Display training times
-        st.subheader("Training Time")
-        st.markdown(f"**Total Base Training Time:** {format_time(total_base_time_sec)}")
-        st.markdown(f"**Reduced Training Time:** {format_time(total_reduced_time_sec)}")
+                counts = max_trainable(stock_limits, time_budget, training_speed)
+                index_label = "Level"
+            else:
+                counts = max_promotable(from_level, stock_limits, time_budget, training_speed)
+                index_label = "Target Level"
+            max_df = pd.DataFrame(counts).rename_axis(index_label)
+            st.table(max_df.map(lambda n: "unlimited" if pd.isna(n) else f"{int(n):,}"))
 
 
 if st.button("🏠 Back to Homepage"):
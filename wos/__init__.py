@@ -0,0 +1 @@
+"""Shared calculation core for the WoS calculator pages."""
@@ -0,0 +1,196 @@
+"""Minimal ASGI JSON API over :mod:`wos.calculators`.
+
+Endpoints (all ``POST`` with a JSON body, except ``/health``)::
+
+    /buildings        {"buildings": {"Furnace": [30, 35]}, "base_bonus": 0,
+                       "zinman": 0, "pet": 0, "president": false,
+                       "vice_president": false, "double_time": false}
+    /buildings/scenarios
+                      {"buildings": {...}, "scenarios": [{"name": "Zinman 5",
+                       "zinman": 5, ...}, ...]}  same bonus keys per scenario
+    /buildings/affordability
+                      {"buildings": {...}, "income": {"meat": 500000, ...},
+                       "stock": {"meat": 2000000, ...}, "zinman": 0}  income per hour
+    /fire-crystals    {"buildings": {"Furnace": [30, 35]}}
+    /fire-crystals/plan
+                      {"current": {"Furnace": 30, "Embassy": 30}, "target": 40,
+                       "budget": 3000}
+    /svs/plan         {"inventory": {"meat": 1e8, ..., "firecrystals": 500,
+                                     "construction_minutes": 43200, ...},
+                       "buildings": {"Furnace": [30, 40]},
+                       "troops": {"Infantry": {"max_tier": 10, "owned": {"8": 20000}}},
+                       "construction_speed": 50, "training_speed": 50, "zinman": 0}
+    /troops/train     {"orders": [{"troop": "Infantry", "level": 10, "number": 100}],
+                       "training_speed": 0}
+    /troops/promote   {"orders": [{"troop": "Infantry", "start_level": 9,
+                                   "end_level": 10, "number": 100}],
+                       "training_speed": 0}
+    GET /health
+    GET /cache        result cache hit/miss counters
+    GET /metrics      Prometheus metrics (when WOS_METRICS=1)
+
+Numbers are taken as sent and checked by the calculators; invalid input
+comes back as ``400 {"error": "..."}``. The app has no dependencies
+beyond the calculators; run it with any ASGI server, e.g.::
+
+    python -m wos.api --port 8000          # needs uvicorn
+    uvicorn wos.api:app --workers 4
+"""
+
+import argparse
+import json
+
+from wos import calculators, metrics
+from wos.cache import results
+
+
+def _bonuses(body):
+    return {
+        "base_bonus": body.get("base_bonus", 0),
+        "zinman_level": body.get("zinman", 0),
+        "pet_level": body.get("pet", 0),
+        "president": bool(body.get("president", False)),
+        "vice_president": bool(body.get("vice_president", False)),
+        "double_time": bool(body.get("double_time", False)),
+    }
+
+
+def _selections(value):
+    if not isinstance(value, dict):
+        raise ValueError("buildings must be an object of name: [current, target]")
+    return {name: tuple(levels) if isinstance(levels, list) else levels for name, levels in value.items()}
+
+
+def _buildings(body):
+    return calculators.building_upgrade(_selections(body["buildings"]), **_bonuses(body))
+
+
+def _building_scenarios(body):
+    if not isinstance(body["scenarios"], list) or not all(isinstance(s, dict) for s in body["scenarios"]):
+        raise ValueError("scenarios must be a list of objects")
+    scenarios = [{**_bonuses(s), **({"name": s["name"]} if "name" in s else {})} for s in body["scenarios"]]
+    return {"scenarios": calculators.building_scenarios(_selections(body["buildings"]), scenarios)}
+
+
+def _building_affordability(body):
+    return calculators.building_affordability(
+        _selections(body["buildings"]), body["income"], body.get("stock", {}), body.get("zinman", 0),
+    )
+
+
+def _fire_crystals(body):
+    return calculators.fire_crystals(_selections(body["buildings"]))
+
+
+def _fire_crystal_plan(body):
+    return calculators.fire_crystal_plan(body.get("current", {}), body["target"], body.get("budget"))
+
+
+def _svs_plan(body):
+    return calculators.svs_plan(
+        body.get("inventory", {}),
+        _selections(body.get("buildings", {})),
+        body.get("troops", {}),
+        body.get("construction_speed", 0),
+        body.get("training_speed", 0),
+        body.get("zinman", 0),
+    )
+
+
+def _train(body):
+    return calculators.troop_training(body["orders"], body.get("training_speed", 0))
+
+
+def _promote(body):
+    return calculators.troop_promotion(body["orders"], body.get("training_speed", 0))
+
+
+ROUTES = {
+    "/buildings": _buildings,
+    "/buildings/scenarios": _building_scenarios,
+    "/buildings/affordability": _building_affordability,
+    "/fire-crystals": _fire_crystals,
+    "/fire-crystals/plan": _fire_crystal_plan,
+    "/svs/plan": _svs_plan,
+    "/troops/train": _train,
+    "/troops/promote": _promote,
+}
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+async def _send(send, status, body: bytes, content_type: bytes):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", content_type), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def handle(path: str, method: str, body: bytes):
+    """Dispatch one request; returns ``(status, payload)``."""
+    if path == "/health":
+        return 200, {"status": "ok"}
+    if path == "/cache":
+        return 200, results.stats()
+    handler = ROUTES.get(path)
+    if handler is None:
+        return 404, {"error": f"Unknown endpoint: {path}"}
+    if method != "POST":
+        return 405, {"error": "Use POST"}
+    metrics.count("calculations", calculator=path.strip("/").replace("/", "_").replace("-", "_"))
+    try:
+        payload = json.loads(body or b"{}")
+        if not isinstance(payload, dict):
+            raise ValueError("Request body must be a JSON object")
+        with metrics.span("api_request", path=path):
+            return 200, handler(payload)
+    except KeyError as e:
+        metrics.count("errors", page="api", kind="KeyError")
+        return 400, {"error": f"missing field: {e.args[0]}"}
+    except (ValueError, TypeError) as e:
+        metrics.count("errors", page="api", kind=type(e).__name__)
+        return 400, {"error": str(e)}
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    if scope["type"] != "http":
+        return
+    body = await _read_body(receive)
+    if scope["path"] == "/metrics":
+        await _send(send, 200, metrics.render().encode(), b"text/plain; version=0.0.4")
+        return
+    status, payload = handle(scope["path"], scope["method"], body)
+    await _send(send, status, json.dumps(payload).encode(), b"application/json")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m wos.api", description="Serve the calculators as JSON.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args(argv)
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("Serving the API requires uvicorn (pip install uvicorn)")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
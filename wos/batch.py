@@ -0,0 +1,267 @@
+"""Batch planning: price a whole file of player upgrade plans at once.
+
+Input is a CSV or Parquet file with one plan item per row:
+
+``player``
+    Player name or id (required).
+``building``, ``current_level``, ``target_level``
+    A building upgrade. Bonus columns ``base_bonus``, ``zinman``, ``pet``,
+    ``president``, ``vice_president`` and ``double_time`` apply to it.
+``troop``, ``start_level``, ``end_level``, ``number``
+    A troop order. With ``start_level`` empty or 0 the row trains ``number``
+    troops at ``end_level``, otherwise it promotes them. ``training_speed``
+    applies to it.
+
+Missing bonus columns default to 0. Every row is checked as the
+calculators check their input; an invalid value raises ``ValueError``
+naming the row (counting from 1 after the header) and the column.
+
+The file is read in chunks; each chunk is priced with a handful of array
+operations, per-row results are streamed out and only the per-player sums
+are kept in memory. Costs and times come from the :mod:`wos.specs`
+calculators, and a player's totals apply each set of bonuses once to the
+summed costs, so they equal the calculators' answer for the same plan.
+
+Usage::
+
+    python -m wos.batch plans.csv --rows rows.csv --summary summary.csv
+"""
+
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from wos import specs
+from wos.calculators import _check_amount, _check_building, _check_building_name, _check_troop, _check_zinman, _whole
+from wos.constants import MAX_BUILDING_LEVEL, MAX_TIER, MAX_TROOPS, PET_SPEED_BONUSES, RESOURCES
+
+OUTPUT_COLUMNS = ["player", "kind", "item", *RESOURCES, "base_time", "time"]
+NUMERIC_DEFAULTS = {
+    "base_bonus": 0.0,
+    "zinman": 0,
+    "pet": 0,
+    "president": False,
+    "vice_president": False,
+    "double_time": False,
+    "current_level": 0,
+    "target_level": 0,
+    "start_level": 0,
+    "end_level": 0,
+    "number": 0,
+    "training_speed": 0.0,
+}
+# Bonus column -> calculator parameter
+BONUS_PARAMS = {
+    "base_bonus": "base_bonus",
+    "zinman": "zinman_level",
+    "pet": "pet_level",
+    "president": "president",
+    "vice_president": "vice_president",
+    "double_time": "double_time",
+    "training_speed": "training_speed",
+}
+BUILDING_BONUSES = ("base_bonus", "zinman", "pet", "president", "vice_president", "double_time")
+_COSTS = [*RESOURCES, "base_time"]
+
+DEFAULT_CHUNKSIZE = 50_000
+
+
+def _column(chunk, name):
+    default = NUMERIC_DEFAULTS[name]
+    if name not in chunk:
+        return np.full(len(chunk), default)
+    col = chunk[name]
+    if isinstance(default, bool):
+        if col.dtype == object:
+            col = col.astype(str).str.strip().str.lower().isin(["1", "true", "yes", "y"])
+        return col.fillna(False).astype(bool).to_numpy()
+    values = pd.to_numeric(col, errors="coerce")
+    unparsed = col[values.isna() & col.notna()]
+    unparsed = unparsed[unparsed.astype(str).str.strip() != ""]
+    if len(unparsed):
+        raise ValueError(f"Row {unparsed.index[0] + 1}, {name}: {unparsed.iloc[0]!r} is not a number.")
+    return values.fillna(default).to_numpy()
+
+
+def _check_rows(index, column, check, *values):
+    """Run ``check`` on each distinct tuple of ``values``; raise for the first row it rejects."""
+    factors = [pd.factorize(v) for v in values]
+    keys = np.ravel_multi_index([codes for codes, _ in factors], [max(len(u), 1) for _, u in factors])
+    uniques = [u.tolist() for _, u in factors]
+    for row in np.flatnonzero(~pd.Series(keys).duplicated().to_numpy()):
+        try:
+            check(*(u[codes[row]] for (codes, _), u in zip(factors, uniques)))
+        except ValueError as e:
+            raise ValueError(f"Row {index[row] + 1}, {column}: {e}")
+
+
+def _present(chunk, name):
+    if name not in chunk:
+        return np.zeros(len(chunk), dtype=bool)
+    col = chunk[name]
+    return (col.notna() & (col.astype(str).str.strip() != "")).to_numpy()
+
+
+def _check_promotion(troop, start, end):
+    if start and start >= end:
+        raise ValueError(f"End level must be greater than start level for {troop}")
+
+
+def plan_lines(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Unreduced cost of every plan row of ``chunk``, before any bonus.
+
+    One row per plan item with ``player``, ``kind``, ``item``, the
+    ``calculator`` (:data:`wos.specs.CALCULATORS` name) that prices it, the
+    bonus columns that apply to it (the others are left at their defaults)
+    and the summed costs ``RESOURCES`` and ``base_time``. Raises
+    ``ValueError`` for the first invalid row.
+    """
+    lines = pd.DataFrame({"player": chunk["player"].to_numpy(), "kind": "", "item": "", "calculator": ""})
+    for name in BONUS_PARAMS:
+        lines[name] = np.full(len(chunk), NUMERIC_DEFAULTS[name])
+    costs = np.zeros((len(chunk), len(_COSTS)), dtype=np.int64)
+
+    is_building = _present(chunk, "building")
+    if is_building.any():
+        b = chunk[is_building]
+        names = b["building"]
+        currents, targets = _column(b, "current_level"), _column(b, "target_level")
+        for column, check, *values in (
+            ("building", _check_building_name, names),
+            ("current_level", lambda n, v: _whole(v, f"{n}: Start level", 0, MAX_BUILDING_LEVEL), names, currents),
+            ("target_level", lambda n, v: _whole(v, f"{n}: Target level", 0, MAX_BUILDING_LEVEL), names, targets),
+            ("target_level", _check_building, names, currents, targets),
+            ("base_bonus", lambda v: _check_amount(v, "Base Construction Speed Bonus"), _column(b, "base_bonus")),
+            ("zinman", _check_zinman, _column(b, "zinman")),
+            ("pet", lambda v: _whole(v, "Pet level", 0, len(PET_SPEED_BONUSES) - 1), _column(b, "pet")),
+        ):
+            _check_rows(b.index, column, check, *values)
+        names = names.tolist()
+        currents, targets = currents.astype(int).tolist(), targets.astype(int).tolist()
+        costs[is_building] = specs.BUILDINGS.line_costs([(n, c, t, 1) for n, c, t in zip(names, currents, targets)])
+        lines.loc[is_building, "kind"] = "building"
+        lines.loc[is_building, "item"] = names
+        lines.loc[is_building, "calculator"] = specs.BUILDINGS.name
+        for name in BUILDING_BONUSES:
+            lines.loc[is_building, name] = _column(b, name).astype(type(NUMERIC_DEFAULTS[name]))
+
+    is_troop = _present(chunk, "troop") & ~is_building
+    if is_troop.any():
+        t = chunk[is_troop]
+        names = t["troop"]
+        starts, ends, numbers = _column(t, "start_level"), _column(t, "end_level"), _column(t, "number")
+        for column, check, *values in (
+            ("troop", _check_troop, names),
+            ("start_level", lambda n, v: v == 0 or _whole(v, f"{n}: Start level", 1, MAX_TIER), names, starts),
+            ("end_level", lambda n, v: _whole(v, f"{n}: End level", 1, MAX_TIER), names, ends),
+            ("end_level", _check_promotion, names, starts, ends),
+            ("number", lambda n, v: _whole(v, f"Number of {n}", 0, MAX_TROOPS), names, numbers),
+            ("training_speed", lambda v: _check_amount(v, "Training speed"), _column(t, "training_speed")),
+        ):
+            _check_rows(t.index, column, check, *values)
+        names = names.tolist()
+        starts, ends, numbers = starts.astype(int), ends.astype(int).tolist(), numbers.astype(np.int64).tolist()
+        promote = starts > 0
+        orders = [(n, s if p else None, e, k) for n, s, p, e, k in zip(names, starts.tolist(), promote, ends, numbers)]
+        columns = [_COSTS.index(c) for c in specs.TROOPS.resources] + [_COSTS.index("base_time")]
+        costs[np.ix_(is_troop, columns)] = specs.TROOPS.line_costs(orders)
+        lines.loc[is_troop, "kind"] = np.where(promote, "promote", "train")
+        lines.loc[is_troop, "item"] = names
+        lines.loc[is_troop, "calculator"] = specs.TROOPS.name
+        lines.loc[is_troop, "training_speed"] = _column(t, "training_speed")
+
+    lines[_COSTS] = costs
+    return lines[lines["kind"] != ""].reset_index(drop=True)
+
+
+def price_lines(lines: pd.DataFrame) -> pd.DataFrame:
+    """Bonuses applied to each row of :func:`plan_lines` output, as ``resources``, ``base_time`` and ``time``.
+
+    Each row is priced as one plan, with :meth:`wos.engine.Calculator.apply_rows`.
+    """
+    out = pd.DataFrame(0, index=lines.index, columns=OUTPUT_COLUMNS[3:], dtype=np.int64)
+    for name, rows in lines.groupby("calculator", sort=False).groups.items():
+        calculator = specs.CALCULATORS[name]
+        part = lines.loc[rows]
+        columns = ["base_time" if c == calculator.time else c for c in calculator.schema.columns]
+        priced = calculator.apply_rows(part[columns].to_numpy(),
+                                       **{p: part[c].to_numpy() for c, p in BONUS_PARAMS.items()})
+        out.loc[rows, list(calculator.resources)] = priced["resources"]
+        out.loc[rows, "base_time"] = priced["base_time"]
+        out.loc[rows, "time"] = priced["time"]
+    return out
+
+
+def price_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Price every row of ``chunk`` on its own; returns a frame with :data:`OUTPUT_COLUMNS`."""
+    lines = plan_lines(chunk)
+    return pd.concat([lines[OUTPUT_COLUMNS[:3]], price_lines(lines)], axis=1)
+
+
+def iter_chunks(source, fmt: str = None, chunksize: int = DEFAULT_CHUNKSIZE):
+    """Yield DataFrame chunks from a CSV or Parquet path or file object."""
+    name = getattr(source, "name", source)
+    if fmt is None:
+        fmt = "parquet" if str(name).lower().endswith((".parquet", ".pq")) else "csv"
+    if fmt == "parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Reading Parquet plans requires pyarrow (pip install pyarrow)")
+        start = 0
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunksize):
+            # Number the rows through the file, as read_csv does.
+            yield batch.to_pandas().set_axis(pd.RangeIndex(start, start + batch.num_rows))
+            start += batch.num_rows
+    else:
+        yield from pd.read_csv(source, chunksize=chunksize, skipinitialspace=True)
+
+
+def run_batch(source, rows_out=None, fmt: str = None, chunksize: int = DEFAULT_CHUNKSIZE) -> pd.DataFrame:
+    """Price every plan in ``source`` and return the per-player totals.
+
+    A player's rows of one kind with the same bonuses are summed before the
+    bonuses are applied, as :func:`wos.calculators.building_upgrade`,
+    :func:`~wos.calculators.troop_training` and
+    :func:`~wos.calculators.troop_promotion` do for one plan, so the totals
+    match the calculators. Per-row results (each row priced on its own) are
+    written to ``rows_out`` (a path or text file object) as CSV, one chunk
+    at a time, if given.
+    """
+    keys = ["player", "kind", "calculator", *BONUS_PARAMS]
+    sums = None
+    header = True
+    for chunk in iter_chunks(source, fmt, chunksize):
+        lines = plan_lines(chunk)
+        if rows_out is not None:
+            priced = pd.concat([lines[OUTPUT_COLUMNS[:3]], price_lines(lines)], axis=1)
+            priced.to_csv(rows_out, mode="w" if header else "a", header=header, index=False)
+            header = False
+        group = lines.groupby(keys, sort=False)[_COSTS].sum()
+        sums = group if sums is None else sums.add(group, fill_value=0)
+    if sums is None or sums.empty:
+        return pd.DataFrame(columns=OUTPUT_COLUMNS[:1] + OUTPUT_COLUMNS[3:])
+    sums = sums.astype(np.int64).reset_index()
+    totals = pd.concat([sums[["player"]], price_lines(sums)], axis=1)
+    return totals.groupby("player", sort=False).sum().reset_index()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m wos.batch", description="Price a file of player upgrade plans.")
+    parser.add_argument("plans", help="CSV or Parquet file of plan rows")
+    parser.add_argument("--format", choices=["csv", "parquet"], help="input format (default: from extension)")
+    parser.add_argument("--rows", help="write per-row results to this CSV")
+    parser.add_argument("--summary", help="write per-player totals to this CSV (default: stdout)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    args = parser.parse_args(argv)
+
+    summary = run_batch(args.plans, args.rows, args.format, args.chunksize)
+    summary.to_csv(args.summary or sys.stdout, index=False)
+    total = summary.drop(columns=["player"]).sum()
+    print("TOTAL " + " ".join(f"{k}={v:,}" for k, v in total.items()), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
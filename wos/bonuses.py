@@ -0,0 +1,29 @@
+"""Construction bonus formulas.
+
+Every function accepts scalars or NumPy arrays so the same formula serves a
+single page calculation and a vectorised batch. The bonuses are applied to
+costs and times by :mod:`wos.engine`, rounded as in :mod:`wos.fixed`.
+"""
+
+import numpy as np
+
+from wos.constants import DOUBLE_TIME_BONUS, PET_SPEED_BONUSES, PRESIDENT_BONUS, VICE_PRESIDENT_BONUS
+
+_PET = np.array(PET_SPEED_BONUSES, dtype=float)
+
+
+def pet_speed_bonus(pet_level):
+    return _PET[np.asarray(pet_level, dtype=np.intp)]
+
+
+def construction_speed_bonus(base_bonus=0.0, pet_level=0, president=False,
+                             vice_president=False, double_time=False):
+    """Total construction speed bonus in percent."""
+    return (
+        np.asarray(base_bonus, dtype=float)
+        + pet_speed_bonus(pet_level)
+        + PRESIDENT_BONUS * np.asarray(president, dtype=bool)
+        + VICE_PRESIDENT_BONUS * np.asarray(vice_president, dtype=bool)
+        + DOUBLE_TIME_BONUS * np.asarray(double_time, dtype=bool)
+    )
+
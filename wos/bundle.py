@@ -0,0 +1,196 @@
+"""Static client-side bundle: the calculators without a server round trip.
+
+Every widget change on a Streamlit page reruns the page's script on the
+server. ``python -m wos.bundle`` instead writes a static site (``static/``
+by default) with three files:
+
+* ``tables.json``: the building and troop prefix totals compiled by
+  :mod:`wos.specs`, plus the bonus constants (Zinman multipliers, pet,
+  president, vice president and double-time bonuses) and the input limits;
+* ``calc.js``: the same formulas as :mod:`wos.calculators` in JavaScript,
+  with the integer arithmetic of :mod:`wos.fixed` (Zinman basis points on the
+  summed costs, ``1 / (1 + bonus)`` time reduction, double time doubling the
+  result, each rounded down once);
+* ``index.html``: Building Upgrade and Troops calculators that recalculate
+  in the browser on every change.
+
+Any static file server can host it. Run Streamlit with
+``--server.enableStaticServing true`` to serve it at ``/app/static/`` next to
+the app; the home page then links to it. ``--check`` compares ``calc.js``
+with the Python calculators on random inputs (needs ``node``).
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+
+from wos import specs
+from wos.catalog import get_table
+from wos.constants import (
+    BUILDING_NAMES,
+    COST_COLUMNS,
+    DATA_DIR,
+    DOUBLE_TIME_BONUS,
+    MAX_BUILDING_LEVEL,
+    MAX_TIER,
+    MAX_TROOPS,
+    PET_SPEED_BONUSES,
+    PRESIDENT_BONUS,
+    RESOURCES,
+    TROOP_COLUMNS,
+    TROOP_RESOURCES,
+    TROOP_TYPES,
+    VICE_PRESIDENT_BONUS,
+)
+from wos.fixed import ZINMAN_COST_BP
+
+CLIENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "client")
+STATIC_DIR = os.path.join(os.path.dirname(DATA_DIR), "static")
+
+
+def tables() -> dict:
+    """The contents of ``tables.json``."""
+    prefix, _ = specs.BUILDINGS.compiled()
+    buildings = {}
+    for i, name in enumerate(BUILDING_NAMES):
+        table = get_table(name)
+        buildings[name] = {
+            "levels": table.levels.tolist(),
+            "prefix": prefix[i, :len(table.values)].tolist(),
+        }
+    prefix, valid = specs.TROOPS.compiled()
+    troops = {
+        troop: {"tiers": [int(t) for t in valid[i].nonzero()[0]], "prefix": prefix[i].tolist()}
+        for i, troop in enumerate(TROOP_TYPES)
+    }
+    return {
+        "version": 2,
+        "constants": {
+            "resources": list(RESOURCES),
+            "cost_columns": list(COST_COLUMNS),
+            "troop_resources": list(TROOP_RESOURCES),
+            "troop_columns": list(TROOP_COLUMNS),
+            "zinman_cost_bp": ZINMAN_COST_BP,
+            "pet_speed_bonuses": PET_SPEED_BONUSES,
+            "president_bonus": PRESIDENT_BONUS,
+            "vice_president_bonus": VICE_PRESIDENT_BONUS,
+            "double_time_bonus": DOUBLE_TIME_BONUS,
+            "max_building_level": MAX_BUILDING_LEVEL,
+            "max_tier": MAX_TIER,
+            "max_troops": MAX_TROOPS,
+        },
+        "buildings": buildings,
+        "troops": troops,
+    }
+
+
+def build(out: str = STATIC_DIR) -> list:
+    """Write the bundle to ``out``; returns the paths written."""
+    os.makedirs(out, exist_ok=True)
+    written = []
+    for name in ("index.html", "calc.js"):
+        written.append(shutil.copyfile(os.path.join(CLIENT_DIR, name), os.path.join(out, name)))
+    path = os.path.join(out, "tables.json")
+    with open(path + ".tmp", "w") as f:
+        json.dump(tables(), f, separators=(",", ":"))
+    os.replace(path + ".tmp", path)
+    written.append(path)
+    return written
+
+
+def _cases(n, seed=0):
+    from wos import calculators
+
+    rnd = random.Random(seed)
+    for _ in range(n):
+        selections = {}
+        for name in rnd.sample(BUILDING_NAMES, rnd.randint(1, 4)):
+            top = get_table(name).max_level
+            current = rnd.randint(0, top)
+            # Mostly valid ranges, some invalid ones to compare the errors too.
+            selections[name] = [current, rnd.randint(current + 1, top + 2) if rnd.random() < 0.95 else current]
+        bonuses = {
+            "base_bonus": rnd.choice([0, 7.5, 33.3, 120, -5]),
+            "zinman_level": rnd.randint(0, 5),
+            "pet_level": rnd.randint(0, 5),
+            "president": rnd.random() < 0.5,
+            "vice_president": rnd.random() < 0.5,
+            "double_time": rnd.random() < 0.5,
+        }
+        try:
+            expected = calculators.building_upgrade({k: tuple(v) for k, v in selections.items()}, **bonuses)
+        except ValueError:
+            expected = None
+        yield {"kind": "buildings", "args": [selections, bonuses], "expected": expected}
+
+        speed = rnd.choice([0, 12.5, 80, -5])
+        promote = rnd.random() < 0.5
+        orders = []
+        for _ in range(rnd.randint(1, 3)):
+            troop, number = rnd.choice(list(TROOP_TYPES)), rnd.randint(0, 10 ** 6)
+            if rnd.random() < 0.05:
+                number = rnd.choice([2.5, -1, 10 ** 10])
+            if promote:
+                start = rnd.randint(1, 10)
+                end = rnd.randint(start + 1, 11) if rnd.random() < 0.9 else start
+                orders.append({"troop": troop, "start_level": start, "end_level": end, "number": number})
+            else:
+                orders.append({"troop": troop, "level": rnd.randint(1, 11), "number": number})
+        try:
+            expected = (calculators.troop_promotion if promote else calculators.troop_training)(orders, speed)
+        except ValueError:
+            expected = None
+        yield {"kind": "troops", "args": [orders, speed], "expected": expected}
+
+
+_CHECK_JS = """
+const WoS = require(process.argv[1]);
+const data = require(process.argv[2]);
+const cases = JSON.parse(require("fs").readFileSync(0, "utf8"));
+const out = cases.map((c) => {
+  try {
+    return c.kind === "buildings" ? WoS.buildingUpgrade(data, ...c.args) : WoS.troops(data, ...c.args);
+  } catch (e) {
+    return null;
+  }
+});
+process.stdout.write(JSON.stringify(out));
+"""
+
+
+def check(out: str = STATIC_DIR, n: int = 2000) -> int:
+    """Compare ``calc.js`` with the Python calculators on ``n`` random inputs; returns mismatches."""
+    cases = list(_cases(n))
+    result = subprocess.run(
+        ["node", "-e", _CHECK_JS, os.path.join(out, "calc.js"), os.path.join(out, "tables.json")],
+        input=json.dumps(cases), capture_output=True, text=True, check=True,
+    )
+    mismatches = 0
+    for case, got in zip(cases, json.loads(result.stdout)):
+        if got != case["expected"]:
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"mismatch: {case['kind']} {case['args']}: {got} != {case['expected']}", file=sys.stderr)
+    return mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m wos.bundle", description=__doc__.splitlines()[0])
+    parser.add_argument("--out", default=STATIC_DIR, help="output directory (default: static/)")
+    parser.add_argument("--check", action="store_true", help="compare calc.js with the Python calculators")
+    args = parser.parse_args(argv)
+
+    for path in build(args.out):
+        print(f"wrote {path} ({os.path.getsize(path):,} bytes)")
+    if args.check:
+        mismatches = check(args.out)
+        print(f"{mismatches} mismatches")
+        sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
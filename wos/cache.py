@@ -0,0 +1,128 @@
+"""Bounded LRU/TTL cache for calculator results, shared by all sessions.
+
+Results are keyed on a canonical form of the call's arguments, so
+``{"Furnace": (30, 35)}`` with ``base_bonus=10`` and with ``base_bonus=10.0``
+hit the same entry. The whole cache is dropped when any data file changes;
+the files are checked at most once per ``check_interval`` seconds.
+"""
+
+import functools
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from wos.catalog import catalog
+
+
+def canonical(value):
+    """A JSON-stable form of ``value``: numbers as floats, dicts sorted."""
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if hasattr(value, "item"):  # NumPy scalars
+        return canonical(value.item())
+    if isinstance(value, dict):
+        return sorted((str(k), canonical(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        items = [canonical(v) for v in value]
+        # Orders are order-independent; tuples (level ranges) are not.
+        if isinstance(value, list) and all(isinstance(v, dict) for v in value):
+            items.sort(key=json.dumps)
+        return items
+    raise TypeError(f"Cannot build a cache key from {type(value).__name__}")
+
+
+def _copy(value):
+    # Results are small trees of dicts, lists and scalars.
+    if isinstance(value, dict):
+        return {k: _copy(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy(v) for v in value]
+    return value
+
+
+class ResultCache:
+    def __init__(self, maxsize: int = 4096, ttl: float = 3600.0, check_interval: float = 1.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._fingerprint = None
+        self._checked = float("-inf")
+
+    def _check_data(self, now):
+        if now - self._checked < self.check_interval:
+            return
+        self._checked = now
+        fingerprint = catalog.fingerprint()
+        if fingerprint != self._fingerprint:
+            self._entries.clear()
+            self._fingerprint = fingerprint
+
+    def get(self, key):
+        """Return ``(True, value)`` on a hit, ``(False, None)`` otherwise."""
+        now = time.monotonic()
+        with self._lock:
+            self._check_data(now)
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, _copy(entry[1])
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value):
+        now = time.monotonic()
+        with self._lock:
+            self._check_data(now)
+            self._entries[key] = (now, _copy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+            self._checked = float("-inf")
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+results = ResultCache()
+
+
+def cached(fn=None, *, cache: ResultCache = None):
+    """Memoise ``fn`` in ``cache`` (default: the shared :data:`results`)."""
+    if fn is None:
+        return functools.partial(cached, cache=cache)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        target = cache if cache is not None else results
+        key = json.dumps([fn.__module__, fn.__qualname__, canonical(tuple(args)), canonical(kwargs)])
+        hit, value = target.get(key)
+        if hit:
+            return value
+        value = fn(*args, **kwargs)
+        target.put(key, value)
+        return value
+
+    wrapper.uncached = fn
+    return wrapper
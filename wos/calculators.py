@@ -0,0 +1,244 @@
+"""Headless calculators behind the Streamlit pages and the JSON API.
+
+Each function takes plain Python values and returns a JSON-serialisable
+dict, so the pages, ``wos.api`` and bots all share one implementation.
+Invalid input, including values of the wrong type or out of range, raises
+``ValueError``. Results are memoised in the shared :data:`wos.cache.results`
+cache.
+"""
+
+import math
+import numbers
+
+from wos import fc_planner, projection, specs, svs
+from wos.cache import cached
+from wos.catalog import table_key
+from wos.constants import (
+    BUILDING_NAMES,
+    COST_COLUMNS,
+    MAX_BUILDING_LEVEL,
+    MAX_TIER,
+    MAX_TROOPS,
+    PET_SPEED_BONUSES,
+    RESOURCES,
+    TROOP_TYPES,
+    ZINMAN_COST_REDUCTION,
+)
+
+_BUILDING_KEYS = {table_key(n) for n in BUILDING_NAMES}
+
+
+def _whole(value, label, low, high) -> int:
+    if isinstance(value, bool) or not isinstance(value, numbers.Real) or not low <= value <= high or value % 1:
+        raise ValueError(f"{label} must be a whole number from {low:,} to {high:,}.")
+    return int(value)
+
+
+def _check_amount(value, label):
+    """A finite, non-negative number: a speed bonus, income or stock."""
+    if isinstance(value, bool) or not isinstance(value, numbers.Real) or not math.isfinite(value):
+        raise ValueError(f"{label} must be a number.")
+    if value < 0:
+        raise ValueError(f"{label} cannot be negative.")
+
+
+def _check_building_name(name):
+    if not isinstance(name, str) or table_key(name) not in _BUILDING_KEYS:
+        raise ValueError(f"Unknown building: {name}")
+
+
+def _check_building(name, current, target):
+    _check_building_name(name)
+    _whole(current, f"{name}: Start level", 0, MAX_BUILDING_LEVEL)
+    _whole(target, f"{name}: Target level", 0, MAX_BUILDING_LEVEL)
+    if current >= target:
+        raise ValueError(f"{name}: Start level must be less than target level.")
+
+
+def _check_selections(selections):
+    if not isinstance(selections, dict):
+        raise ValueError("Buildings must map building names to [current, target] levels.")
+    for name, levels in selections.items():
+        if not isinstance(levels, (list, tuple)) or len(levels) != 2:
+            raise ValueError(f"{name}: Levels must be [current, target].")
+        _check_building(name, *levels)
+
+
+def _check_zinman(zinman_level):
+    if isinstance(zinman_level, bool) or not isinstance(zinman_level, numbers.Real) \
+            or zinman_level not in ZINMAN_COST_REDUCTION:
+        raise ValueError(f"Zinman level must be 0-{len(ZINMAN_COST_REDUCTION) - 1}")
+
+
+def _check_troop(name):
+    if not isinstance(name, str) or (name not in TROOP_TYPES and name.lower() not in TROOP_TYPES.values()):
+        raise ValueError(f"Unknown troop type: {name}")
+
+
+def _check_orders(orders, levels):
+    """Validate troop ``orders`` with tier fields ``levels``; returns them as ``(troop, tiers, number)``."""
+    if not isinstance(orders, list) or not all(isinstance(o, dict) for o in orders):
+        raise ValueError("Orders must be a list of objects.")
+    out = []
+    for i, o in enumerate(orders):
+        for k in ("troop", *levels, "number"):
+            if k not in o:
+                raise ValueError(f"orders[{i}]: missing field: {k}")
+        _check_troop(o["troop"])
+        tiers = [_whole(o[k], f"{o['troop']}: {k.replace('_', ' ').capitalize()}", 1, MAX_TIER) for k in levels]
+        out.append((o["troop"], tiers, _whole(o["number"], f"Number of {o['troop']}", 0, MAX_TROOPS)))
+    return out
+
+
+@cached
+def building_totals(selections) -> dict:
+    """Unreduced costs of upgrading several buildings, per building and in total.
+
+    This is the expensive part of :func:`building_upgrade` and does not
+    depend on any bonus, so every bonus scenario shares one cached copy.
+    """
+    _check_selections(selections)
+    costs = specs.BUILDINGS.line_costs([(name, cur, tgt, 1) for name, (cur, tgt) in selections.items()])
+    buildings = dict(zip(selections, costs.tolist()))
+    return {
+        "buildings": buildings,
+        "resources": {r: sum(c[i] for c in buildings.values()) for i, r in enumerate(RESOURCES)},
+        "base_time": sum(c[-1] for c in buildings.values()),
+    }
+
+
+@cached
+def building_upgrade(selections, base_bonus=0.0, zinman_level=0, pet_level=0,
+                     president=False, vice_president=False, double_time=False) -> dict:
+    """Total cost and build time of upgrading several buildings.
+
+    ``selections`` maps building name -> ``(current_level, target_level)``.
+    Zinman reduces every resource except fire crystals; speed bonuses reduce
+    the summed base time. Only the bonuses are applied here; the sums come
+    from :func:`building_totals`.
+    """
+    _check_amount(base_bonus, "Base Construction Speed Bonus")
+    _check_zinman(zinman_level)
+    _whole(pet_level, "Pet level", 0, len(PET_SPEED_BONUSES) - 1)
+
+    totals = building_totals(selections)
+    return specs.BUILDINGS.apply(
+        list(totals["buildings"].values()),
+        base_bonus=base_bonus, zinman_level=zinman_level, pet_level=pet_level,
+        president=president, vice_president=vice_president, double_time=double_time,
+    )
+
+
+def building_scenarios(selections, scenarios) -> list:
+    """:func:`building_upgrade` for each bonus scenario, side by side.
+
+    ``scenarios`` is a list of dicts of :func:`building_upgrade` keyword
+    arguments, each with an optional ``"name"``. Each scenario is cached
+    separately on top of the shared :func:`building_totals`, so changing one
+    scenario recomputes only that one.
+    """
+    out = []
+    for i, scenario in enumerate(scenarios):
+        bonuses = {k: v for k, v in scenario.items() if k != "name"}
+        out.append({"name": scenario.get("name", f"Scenario {i + 1}"), **building_upgrade(selections, **bonuses)})
+    return out
+
+
+@cached
+def fire_crystals(selections) -> dict:
+    """Fire crystals per building and in total; ``selections`` as above."""
+    _check_selections(selections)
+    costs = specs.BUILDINGS.line_costs([(name, start, end, 1) for name, (start, end) in selections.items()])
+    per_building = dict(zip(selections, costs[:, COST_COLUMNS.index("firecrystals")].tolist()))
+    return {"buildings": per_building, "total": sum(per_building.values())}
+
+
+@cached
+def fire_crystal_plan(current, target_level, budget=None) -> dict:
+    """Cheapest prerequisite-valid plan to a furnace level; see :func:`wos.fc_planner.plan`.
+
+    ``current`` maps building name -> current level; ``budget`` is the fire
+    crystals on hand (``None`` for unlimited).
+    """
+    if not isinstance(current, dict):
+        raise ValueError("Current levels must map building names to levels.")
+    for name, level in current.items():
+        _check_building_name(name)
+        _whole(level, f"{name}: Current level", 0, MAX_BUILDING_LEVEL)
+    target_level = _whole(target_level, "Target level", 1, MAX_BUILDING_LEVEL)
+    if budget is not None:
+        _check_amount(budget, "Fire crystal budget")
+    return fc_planner.plan(current, target_level, budget)
+
+
+@cached
+def building_affordability(selections, income, stock=None, zinman_level=0) -> dict:
+    """When each upgrade step becomes affordable; see :func:`wos.projection.project`.
+
+    ``income`` is resources per hour and ``stock`` the resources on hand.
+    """
+    _check_selections(selections)
+    _check_zinman(zinman_level)
+    for label, values in (("Income", income), ("Stockpile", stock or {})):
+        if not isinstance(values, dict):
+            raise ValueError(f"{label} must map resources to amounts.")
+        for r, v in values.items():
+            if r not in RESOURCES:
+                raise ValueError(f"{label}: unknown resource: {r}")
+            _check_amount(v, label)
+    return projection.project(selections, income, stock, zinman_level)
+
+
+@cached
+def troop_training(orders, training_speed=0.0) -> dict:
+    """Cost and time of training troops.
+
+    ``orders`` is a list of ``{"troop", "level", "number"}`` dicts.
+    """
+    _check_amount(training_speed, "Training speed")
+    lines = [(troop, None, level, number) for troop, (level,), number in _check_orders(orders, ["level"])]
+    return specs.TROOPS.evaluate(lines, training_speed=training_speed)
+
+
+@cached
+def troop_promotion(orders, training_speed=0.0) -> dict:
+    """Cost and time of promoting troops.
+
+    ``orders`` is a list of ``{"troop", "start_level", "end_level", "number"}``.
+    """
+    _check_amount(training_speed, "Training speed")
+    lines = []
+    for troop, (start, end), number in _check_orders(orders, ["start_level", "end_level"]):
+        if start >= end:
+            raise ValueError(f"End level must be greater than start level for {troop}")
+        lines.append((troop, start, end, number))
+    return specs.TROOPS.evaluate(lines, training_speed=training_speed)
+
+
+@cached
+def svs_plan(inventory, buildings=None, troops=None, construction_speed=0.0, training_speed=0.0,
+             zinman_level=0) -> dict:
+    """Allocation of speedups and resources maximising SvS prep points; see :func:`wos.svs.optimize`."""
+    for label, value in (("Inventory", inventory), ("Buildings", buildings or {}), ("Troops", troops or {})):
+        if not isinstance(value, dict):
+            raise ValueError(f"{label} must be an object.")
+    for name, amount in inventory.items():
+        _check_amount(amount, f"Inventory {name}")
+    for name, levels in (buildings or {}).items():
+        _check_building_name(name)
+        if not isinstance(levels, (list, tuple)) or len(levels) != 2:
+            raise ValueError(f"{name}: Levels must be [current, target].")
+        for level in levels:
+            _whole(level, f"{name}: Level", 0, MAX_BUILDING_LEVEL)
+    for troop, spec in (troops or {}).items():
+        _check_troop(troop)
+        if not isinstance(spec, dict) or not isinstance(spec.get("owned") or {}, dict):
+            raise ValueError(f"{troop}: Expected {{\"max_tier\": tier, \"owned\": {{tier: count}}}}.")
+        _whole(spec.get("max_tier", 0), f"{troop}: Max tier", 0, MAX_TIER)
+        for tier, count in (spec.get("owned") or {}).items():
+            _whole(int(tier) if isinstance(tier, str) and tier.isdigit() else tier, f"{troop}: Owned tier", 1, MAX_TIER)
+            _whole(count, f"{troop}: Owned troops", 0, MAX_TROOPS)
+    _check_zinman(zinman_level)
+    _check_amount(construction_speed, "Construction speed")
+    _check_amount(training_speed, "Training speed")
+    return svs.optimize(inventory, buildings, troops, construction_speed, training_speed, zinman_level)
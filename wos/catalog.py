@@ -0,0 +1,324 @@
+"""Process-wide catalog of the game tables in ``data/``.
+
+Every CSV is parsed once into a level-indexed ``int64`` array and shared by
+all Streamlit sessions of the process. A table is re-read only when the
+modification time of its file changes.
+
+If ``data/tables.wos`` (built by ``python -m wos.compiled``) is up to date
+with a CSV, that table is memory-mapped from it instead of parsed, so
+worker processes share one copy of the data.
+
+With :meth:`Catalog.watch` (``WOS_DATA_WATCH=<seconds>`` in the
+environment), a daemon thread polls the data files instead and swaps in a
+complete, validated set of tables at once; requests then read the current
+set without touching the file system. :mod:`wos.validate` publishes updates.
+"""
+
+import csv
+import errno
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+from wos import metrics
+from wos.constants import DATA_DIR
+
+# Present in the data directory while an update is being published.
+PUBLISH_MARKER = ".publishing"
+PUBLISH_TIMEOUT = 60.0
+
+
+def table_key(name: str) -> str:
+    """Map a display name ("Infantry Camp") to its table key ("infantrycamp")."""
+    return name.lower().replace(" ", "")
+
+
+def _parse_int(value: str) -> int:
+    value = value.strip().replace(",", "")
+    if not value:
+        return 0
+    return int(float(value))
+
+
+class Table:
+    """One game table, indexed by level.
+
+    ``values[level, col]`` holds the value of ``columns[col]`` at ``level``.
+    Row 0 and any level absent from the file are zero.
+    """
+
+    def __init__(self, key, columns, levels, values, mtime=0.0, cumulative=None, issues=()):
+        self.key = key
+        self.columns = tuple(columns)
+        self.levels = levels
+        self.values = values
+        self.mtime = mtime
+        self.issues = list(issues)
+        self._index = {c: i for i, c in enumerate(self.columns)}
+        self._cumulative = cumulative
+
+    @property
+    def min_level(self) -> int:
+        return int(self.levels[0])
+
+    @property
+    def max_level(self) -> int:
+        return int(self.levels[-1])
+
+    def col(self, name: str) -> int:
+        return self._index[name]
+
+    def column(self, name: str) -> np.ndarray:
+        return self.values[:, self._index[name]]
+
+    @property
+    def cumulative(self) -> np.ndarray:
+        """Running totals: ``cumulative[l] == values[1:l + 1].sum(axis=0)``."""
+        if self._cumulative is None:
+            self._cumulative = np.cumsum(self.values, axis=0)
+        return self._cumulative
+
+    def clamp(self, level: int) -> int:
+        return min(max(int(level), 0), len(self.values) - 1)
+
+    def row(self, level: int) -> dict:
+        return {c: int(v) for c, v in zip(self.columns, self.values[level])}
+
+
+def read_table(path: str, key: str = None) -> Table:
+    """Parse one CSV into a :class:`Table`. Column names are lower-cased.
+
+    Raises ``ValueError`` (with file and line) for cells that are not
+    integers or a missing ``level`` column. Short rows are kept with the
+    missing cells set to zero and reported in ``Table.issues``.
+    """
+    if key is None:
+        key = os.path.splitext(os.path.basename(path))[0]
+    mtime = os.stat(path).st_mtime
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = [h.strip().lower() for h in next(reader)]
+        rows = [(reader.line_num, r) for r in reader if r and any(c.strip() for c in r)]
+
+    if "level" not in header:
+        raise ValueError(f"{path}: no 'level' column")
+    if not rows:
+        raise ValueError(f"{path}: no rows")
+    level_col = header.index("level")
+    columns = [h for i, h in enumerate(header) if i != level_col]
+    issues = []
+    parsed = []
+    for line, r in rows:
+        try:
+            cells = [_parse_int(c) for c in r]
+        except ValueError as e:
+            raise ValueError(f"{path}:{line}: {e}") from None
+        if len(cells) < len(header):
+            issues.append(f"{path}:{line}: row has {len(cells)} of {len(header)} columns")
+        parsed.append(cells)
+
+    levels = np.array([cells[level_col] for cells in parsed], dtype=np.int64)
+    values = np.zeros((int(levels.max()) + 1, len(columns)), dtype=np.int64)
+    for cells, level in zip(parsed, levels):
+        # Short rows (a truncated last line) leave the missing cells at zero.
+        cells = [c for i, c in enumerate(cells) if i != level_col]
+        values[level, :len(cells)] = cells[:len(columns)]
+    return Table(key, columns, np.sort(levels), values, mtime, issues=issues)
+
+
+class Catalog:
+    """Lazily loaded, mtime-checked collection of :class:`Table` objects."""
+
+    def __init__(self, data_dir: str = DATA_DIR):
+        self.data_dir = data_dir
+        self._tables = {}
+        self._lock = threading.Lock()
+        self._artifact = None
+        self._artifact_mtime = None
+        # Hot reload: (fingerprint, tables, load errors) being served, or None.
+        self._snapshot = None
+        self._rejected = None
+        self._watching = False
+        self.issues = []
+        # Called after every swap, to rebuild derived arrays off the request path.
+        self.listeners = []
+
+    def _compiled(self, key: str, mtime: float):
+        """The table from the compiled artifact, if it was built from this mtime."""
+        from wos import compiled
+
+        path = os.path.join(self.data_dir, compiled.ARTIFACT_NAME)
+        try:
+            artifact_mtime = os.stat(path).st_mtime
+        except FileNotFoundError:
+            return None
+        if artifact_mtime != self._artifact_mtime:
+            try:
+                self._artifact = compiled.load(path)
+            except ValueError:
+                self._artifact = {}
+            self._artifact_mtime = artifact_mtime
+        table = self._artifact.get(key)
+        if table is not None and table.mtime == mtime:
+            return table
+        return None
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.data_dir, key + ".csv")
+
+    def keys(self) -> list:
+        return sorted(
+            os.path.splitext(f)[0] for f in os.listdir(self.data_dir) if f.endswith(".csv")
+        )
+
+    def get(self, key: str) -> Table:
+        """Return the table for ``key``, re-reading it if its file changed.
+
+        Raises ``FileNotFoundError`` if there is no such file.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return self._served(snapshot, key)
+        path = self.path(key)
+        mtime = os.stat(path).st_mtime
+        table = self._tables.get(key)
+        if table is not None and table.mtime == mtime:
+            return table
+        with self._lock:
+            table = self._tables.get(key)
+            if table is None or table.mtime != mtime:
+                with metrics.span("data_load", table=key):
+                    table = self._compiled(key, mtime)
+                    source = "compiled" if table is not None else "csv"
+                    if table is None:
+                        table = read_table(path, key)
+                metrics.count("data_loads", table=key, source=source)
+                self._tables[key] = table
+        return table
+
+    def get_many(self, keys) -> tuple:
+        """The tables for ``keys``; while watching, all from the same snapshot."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return tuple(self.get(k) for k in keys)
+        return tuple(self._served(snapshot, k) for k in keys)
+
+    def _served(self, snapshot, key):
+        table = snapshot[1].get(key)
+        if table is None:
+            raise snapshot[2].get(key) or FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), self.path(key))
+        return table
+
+    def load_all(self) -> dict:
+        return {key: self.get(key) for key in self.keys()}
+
+    def fingerprint(self) -> tuple:
+        """``(name, mtime)`` of every data file; changes whenever any file does.
+
+        While watching, the fingerprint of the tables being served.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot[0]
+        return self._files_fingerprint()
+
+    def _files_fingerprint(self) -> tuple:
+        with os.scandir(self.data_dir) as entries:
+            return tuple(sorted(
+                (e.name, e.stat().st_mtime) for e in entries if e.name.endswith(".csv")
+            ))
+
+    # --- Hot reload ---
+
+    def reload(self) -> bool:
+        """Load and validate every table, then serve them all at once.
+
+        The new set replaces the old one in a single assignment, so a request
+        sees either the old tables or the new ones, never a mix. A set with
+        validation errors the served one does not have is rejected and the
+        old tables stay. Returns whether the new set was swapped in.
+        """
+        from wos import validate
+
+        fingerprint = self._files_fingerprint()
+        with self._lock, metrics.span("data_reload"):
+            tables, failures, issues = {}, {}, []
+            for key in self.keys():
+                path = self.path(key)
+                try:
+                    table = self._compiled(key, os.stat(path).st_mtime) or read_table(path, key)
+                except (OSError, ValueError) as e:
+                    failures[key] = e
+                    issues.append(validate.issue("error", key, validate.strip_path(str(e), path)))
+                    continue
+                tables[key] = table
+            issues += validate.check(tables)
+        if fingerprint != self._files_fingerprint():
+            return False  # changed while loading: the next poll retries
+        if self._snapshot is not None:
+            added = validate.errors(issues) - validate.errors(self.issues)
+            if added:
+                self._rejected = fingerprint
+                metrics.count("data_reloads", result="rejected")
+                for table, message in sorted(added):
+                    print(f"wos: data update rejected: {table}: {message}", file=sys.stderr)
+                return False
+        self._snapshot = (fingerprint, tables, failures)
+        self.issues = issues
+        metrics.count("data_reloads", result="swapped")
+        for listener in self.listeners:
+            try:
+                listener()
+            except (OSError, ValueError):
+                pass
+        return True
+
+    def _publishing(self) -> bool:
+        try:
+            return time.time() - os.stat(os.path.join(self.data_dir, PUBLISH_MARKER)).st_mtime < PUBLISH_TIMEOUT
+        except FileNotFoundError:
+            return False
+
+    def poll(self) -> bool:
+        """:meth:`reload` if the data files changed and no update is being published."""
+        if self._publishing():
+            return False
+        fingerprint = self._files_fingerprint()
+        served = self._snapshot[0] if self._snapshot is not None else None
+        if fingerprint in (served, self._rejected):
+            return False
+        return self.reload()
+
+    def watch(self, interval: float = 1.0):
+        """Serve validated snapshots, polled every ``interval`` seconds by a daemon thread.
+
+        Once per process; the first snapshot is loaded before returning.
+        """
+        if self._watching:
+            return
+        self._watching = True
+        self.reload()
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.poll()
+                except OSError:
+                    pass
+
+        threading.Thread(target=loop, name="wos-data-watch", daemon=True).start()
+
+
+catalog = Catalog()
+
+if os.environ.get("WOS_DATA_WATCH"):
+    catalog.watch(float(os.environ["WOS_DATA_WATCH"]))
+
+
+def get_table(name: str) -> Table:
+    """Return the shared table for a building/troop name or table key."""
+    return catalog.get(table_key(name))
@@ -0,0 +1,130 @@
+// WoS calculators for the browser: the same formulas as wos.calculators,
+// evaluated on the tables in tables.json (written by `python -m wos.bundle`).
+// Keep the arithmetic in step with the Python side (wos.fixed: integer costs
+// and seconds, basis-point multipliers, one round-down): `python -m
+// wos.bundle --check` compares the two on random inputs.
+const WoS = (() => {
+  const BP = 10000;
+
+  // Floor division of non-negative integers; exact while the operands stay below 2**53.
+  function idiv(a, b) {
+    return (a - (a % b)) / b;
+  }
+
+  function toBp(percent) {
+    return Math.floor(percent * 100 + 0.5);
+  }
+
+  function reduceTime(seconds, bonusBp, double = false) {
+    return idiv(seconds * BP * (double ? 2 : 1), BP + bonusBp);
+  }
+
+  // Input checks with the same limits and messages as wos.calculators.
+  function whole(value, label, low, high) {
+    if (typeof value !== "number" || !Number.isInteger(value) || value < low || value > high) {
+      throw new Error(`${label} must be a whole number from ${low.toLocaleString("en")} to ${high.toLocaleString("en")}.`);
+    }
+    return value;
+  }
+
+  function amount(value, label) {
+    if (typeof value !== "number" || !Number.isFinite(value)) throw new Error(`${label} must be a number.`);
+    if (value < 0) throw new Error(`${label} cannot be negative.`);
+  }
+
+  function clamp(level, prefix) {
+    return Math.min(Math.max(Math.trunc(level), 0), prefix.length - 1);
+  }
+
+  function speedBonus(data, { base_bonus = 0, pet_level = 0, president = false, vice_president = false,
+                              double_time = false } = {}) {
+    const c = data.constants;
+    return base_bonus + c.pet_speed_bonuses[pet_level] + c.president_bonus * president
+      + c.vice_president_bonus * vice_president + c.double_time_bonus * double_time;
+  }
+
+  // selections: {building: [current, target]}; bonuses as in building_upgrade().
+  function buildingUpgrade(data, selections, bonuses = {}) {
+    const c = data.constants;
+    const zinman = bonuses.zinman_level ?? 0;
+    amount(bonuses.base_bonus ?? 0, "Base Construction Speed Bonus");
+    const maxZinman = Object.keys(c.zinman_cost_bp).length - 1;
+    if (typeof zinman !== "number" || !(zinman in c.zinman_cost_bp)) {
+      throw new Error(`Zinman level must be 0-${maxZinman}`);
+    }
+    whole(bonuses.pet_level ?? 0, "Pet level", 0, c.pet_speed_bonuses.length - 1);
+    const multiplier = c.zinman_cost_bp[zinman];
+    const resources = Object.fromEntries(c.resources.map((r) => [r, 0]));
+    let baseTime = 0;
+    for (const [name, levels] of Object.entries(selections)) {
+      const table = data.buildings[name];
+      if (!table) throw new Error(`Unknown building: ${name}`);
+      if (!Array.isArray(levels) || levels.length !== 2) throw new Error(`${name}: Levels must be [current, target].`);
+      const current = whole(levels[0], `${name}: Start level`, 0, c.max_building_level);
+      const target = whole(levels[1], `${name}: Target level`, 0, c.max_building_level);
+      if (current >= target) throw new Error(`${name}: Start level must be less than target level.`);
+      const hi = table.prefix[clamp(target, table.prefix)];
+      const lo = table.prefix[clamp(current, table.prefix)];
+      c.resources.forEach((r, i) => {
+        resources[r] += hi[i] - lo[i];
+      });
+      baseTime += hi[c.resources.length] - lo[c.resources.length];
+    }
+    for (const r of c.resources) {
+      if (r !== "firecrystals") resources[r] = idiv(resources[r] * multiplier, BP);
+    }
+    const bonus = speedBonus(data, bonuses);
+    const time = reduceTime(baseTime, toBp(bonus), bonuses.double_time);
+    return { resources, base_time: baseTime, time, speed_bonus: bonus };
+  }
+
+  function troopRow(data, troop, tier) {
+    const table = data.troops[troop];
+    const row = table.prefix[tier];
+    if (!row) throw new Error(`Troop tiers must be between 1 and ${table.prefix.length - 1}`);
+    if (!table.tiers.includes(tier)) throw new Error(`Level data missing for ${troop} tier ${tier}`);
+    return row;
+  }
+
+  // orders: [{troop, level, number}] to train or [{troop, start_level, end_level, number}] to promote.
+  function troops(data, orders, trainingSpeed = 0) {
+    const c = data.constants;
+    amount(trainingSpeed, "Training speed");
+    const totals = new Array(c.troop_resources.length + 1).fill(0);
+    for (const o of orders) {
+      if (!data.troops[o.troop]) throw new Error(`Unknown troop type: ${o.troop}`);
+      const promote = o.start_level !== undefined && o.start_level !== null;
+      const levels = promote ? ["start_level", "end_level"] : ["level"];
+      const tiers = levels.map((k) => {
+        const label = k.replace("_", " ");
+        return whole(o[k], `${o.troop}: ${label[0].toUpperCase()}${label.slice(1)}`, 1, c.max_tier);
+      });
+      const number = whole(o.number, `Number of ${o.troop}`, 0, c.max_troops);
+      if (promote && tiers[0] >= tiers[1]) {
+        throw new Error(`End level must be greater than start level for ${o.troop}`);
+      }
+      const end = troopRow(data, o.troop, tiers[tiers.length - 1]);
+      const start = promote ? troopRow(data, o.troop, tiers[0]) : null;
+      end.forEach((v, i) => { totals[i] += (v - (start ? start[i] : 0)) * number; });
+    }
+    const baseTime = totals[totals.length - 1];
+    return {
+      resources: Object.fromEntries(c.troop_resources.map((r, i) => [r, totals[i]])),
+      base_time: baseTime,
+      time: reduceTime(baseTime, toBp(trainingSpeed)),
+    };
+  }
+
+  function formatSeconds(seconds) {
+    const s = Math.trunc(seconds);
+    const days = Math.floor(s / 86400);
+    const rest = s - days * 86400;
+    const pad = (n) => String(n).padStart(2, "0");
+    const hms = `${pad(Math.floor(rest / 3600))}:${pad(Math.floor((rest % 3600) / 60))}:${pad(rest % 60)}`;
+    return days > 0 ? `${days}d ${hms}` : hms;
+  }
+
+  return { buildingUpgrade, troops, speedBonus, toBp, reduceTime, formatSeconds };
+})();
+
+if (typeof module !== "undefined") module.exports = WoS;
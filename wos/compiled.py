@@ -0,0 +1,137 @@
+"""Precompiled binary form of the game tables.
+
+``python -m wos.compiled`` parses every CSV in ``data/`` and writes
+``data/tables.wos``: one file holding, per table, the level-indexed
+``int64`` values and their running totals. The catalog memory-maps it, so
+loading needs no parsing and every worker process shares the same pages.
+A table is used only while its CSV's mtime equals the one recorded here.
+
+Compiling does not run the :mod:`wos.validate` checks: parse problems such
+as short rows are kept as the table's ``issues`` and printed as warnings.
+Run ``python -m wos.validate`` for the full checks.
+
+Layout (little-endian)::
+
+    8 bytes   magic b"WOSTBL01"
+    8 bytes   header length N (uint64)
+    N bytes   JSON header: {"tables": {key: {"columns", "levels", "rows",
+              "values", "cumulative", "mtime", "issues"}}}
+    ...       int64 blocks, each 64-byte aligned; "values" and
+              "cumulative" are their byte offsets
+"""
+
+import argparse
+import json
+import os
+import struct
+import sys
+
+import numpy as np
+
+from wos.catalog import Table, read_table
+from wos.constants import DATA_DIR
+
+ARTIFACT_NAME = "tables.wos"
+MAGIC = b"WOSTBL01"
+_ALIGN = 64
+
+
+def _align(n: int) -> int:
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def build(data_dir: str = DATA_DIR, out: str = None) -> dict:
+    """Compile every CSV in ``data_dir``; returns ``{key: Table}``.
+
+    The artifact is written to a temporary file and renamed into place, so
+    readers never see a partial file. Raises ``ValueError`` if a CSV does
+    not parse; the tables are not otherwise validated.
+    """
+    out = out or os.path.join(data_dir, ARTIFACT_NAME)
+    keys = sorted(os.path.splitext(f)[0] for f in os.listdir(data_dir) if f.endswith(".csv"))
+    tables = {k: read_table(os.path.join(data_dir, k + ".csv"), k) for k in keys}
+
+    header = {"tables": {}}
+    blocks = []
+    offset = 0
+    for key, table in tables.items():
+        entry = {
+            "columns": list(table.columns),
+            "levels": [int(l) for l in table.levels],
+            "rows": len(table.values),
+            "mtime": table.mtime,
+            "issues": table.issues,
+        }
+        for name, arr in (("values", table.values), ("cumulative", table.cumulative)):
+            arr = np.ascontiguousarray(arr, dtype="<i8")
+            offset = _align(offset)
+            entry[name] = offset
+            blocks.append((offset, arr))
+            offset += arr.nbytes
+        header["tables"][key] = entry
+
+    header_bytes = json.dumps(header).encode()
+    data_start = _align(len(MAGIC) + 8 + len(header_bytes))
+    tmp = out + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        for block_offset, arr in blocks:
+            f.seek(data_start + block_offset)
+            f.write(arr.tobytes())
+    os.replace(tmp, out)
+    return tables
+
+
+def load(path: str) -> dict:
+    """Memory-map an artifact; returns ``{key: Table}`` backed by the file.
+
+    Raises ``ValueError`` if the file is not a valid artifact.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path}: not a compiled tables file")
+        (length,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(length))
+    data_start = _align(len(MAGIC) + 8 + length)
+    buf = np.memmap(path, dtype=np.uint8, mode="r")
+
+    tables = {}
+    for key, entry in header["tables"].items():
+        shape = (entry["rows"], len(entry["columns"]))
+
+        def view(offset, shape=shape):
+            start = data_start + offset
+            return buf[start:start + shape[0] * shape[1] * 8].view("<i8").reshape(shape)
+
+        tables[key] = Table(
+            key,
+            entry["columns"],
+            np.array(entry["levels"], dtype=np.int64),
+            view(entry["values"]),
+            entry["mtime"],
+            cumulative=view(entry["cumulative"]),
+            issues=entry["issues"],
+        )
+    return tables
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m wos.compiled", description=__doc__.splitlines()[0])
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--out", help=f"artifact path (default: <data-dir>/{ARTIFACT_NAME})")
+    args = parser.parse_args(argv)
+    try:
+        tables = build(args.data_dir, args.out)
+    except ValueError as e:
+        raise SystemExit(f"error: {e}")
+    for table in tables.values():
+        for issue in table.issues:
+            print(f"warning: {issue}", file=sys.stderr)
+    out = args.out or os.path.join(args.data_dir, ARTIFACT_NAME)
+    print(f"Compiled {len(tables)} tables into {out} ({os.path.getsize(out):,} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Game constants and paths shared by the calculators and the pages.
+
+Plain Python only: the pages import this at startup to draw their widgets,
+so it must not pull in NumPy, pandas or the data tables.
+"""
+
+import os
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+BUILDING_NAMES = [
+    "Furnace",
+    "Embassy",
+    "Infantry Camp",
+    "Marksman Camp",
+    "Lancer Camp",
+    "Command Center",
+    "Infirmary",
+]
+MAX_BUILDING_LEVEL = 55
+
+RESOURCES = ("meat", "wood", "coal", "iron", "firecrystals")
+COST_COLUMNS = RESOURCES + ("time",)
+
+# Zinman skill level -> cost multiplier (all resources except fire crystals)
+ZINMAN_COST_REDUCTION = {
+    0: 1.00,
+    1: 0.97,
+    2: 0.94,
+    3: 0.91,
+    4: 0.88,
+    5: 0.85,
+}
+
+# Pet skill level -> construction speed bonus (%)
+PET_SPEED_BONUSES = [0, 5, 7, 9, 12, 15]
+
+PRESIDENT_BONUS = 10
+VICE_PRESIDENT_BONUS = 10
+DOUBLE_TIME_BONUS = 20
+
+# Display name -> table key
+TROOP_TYPES = {
+    "Infantry": "infantry",
+    "Lancers": "lancer",
+    "Marksmen": "marksman",
+}
+
+# Base training time per troop in seconds, by tier
+BASE_TRAIN_TIME = {
+    1: 12,
+    2: 17,
+    3: 24,
+    4: 32,
+    5: 44,
+    6: 60,
+    7: 83,
+    8: 113,
+    9: 131,
+    10: 152,
+    11: 180,
+}
+
+TROOP_RESOURCES = ("meat", "wood", "coal", "iron")
+TROOP_COLUMNS = TROOP_RESOURCES + ("time",)
+MAX_TIER = max(BASE_TRAIN_TIME)
+# Largest troop count per order; keeps every cost within 64-bit integers.
+MAX_TROOPS = 10 ** 9
+
+# SvS prep phase points. They change between seasons: check the event's list.
+SVS_POINTS = {
+    "speedup_minute": 30,  # per minute of construction or training speedup used
+    "fire_crystal": 2000,  # per fire crystal spent on buildings
+    "troop_power": 1,  # per point of troop power gained by training or promoting
+}
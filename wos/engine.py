@@ -0,0 +1,235 @@
+"""Declarative calculators compiled into vectorised evaluators.
+
+A calculator is described, not coded:
+
+* a :class:`Schema` names one table per item (a building, a troop type, a
+  gear slot, ...), the cost columns, and whether the rows are ``per_level``
+  costs (an upgrade pays every level in the range) or ``cumulative`` totals
+  (an upgrade pays the difference);
+* modifiers scale the result from the calculator's keyword parameters:
+  :class:`Multiplier` scales cost columns per line, :class:`SpeedBonus`
+  reduces the summed time column;
+* ``resources`` and ``time`` pick the output columns.
+
+Modifiers work in :mod:`wos.fixed` basis points on the summed integer
+columns, so every output is an exact integer rounded down once.
+
+Both kinds of table compile into one ``(item, level, column)`` array of
+prefix totals ``P``, so any line ``(item, start, end, count)`` costs
+``(P[end] - P[start]) * count`` and a whole request is a few NumPy
+operations. The compiled array is rebuilt only when a table is reloaded.
+"""
+
+import threading
+
+import numpy as np
+
+from wos import fixed
+from wos.catalog import catalog, table_key
+
+
+class Schema:
+    """Tables and columns of a calculator.
+
+    ``items`` maps display name -> table key. ``constants`` supplies columns
+    missing from the tables as ``{column: {level: value}}`` (e.g. troop base
+    training time). With ``clamp``, levels past the end of a table cost
+    nothing more; otherwise a level absent from the table is an error, and
+    ``label`` names the levels in the message.
+    """
+
+    def __init__(self, items, columns, kind="per_level", constants=None, clamp=False, label="Levels"):
+        if kind not in ("per_level", "cumulative"):
+            raise ValueError(f"Unknown table kind: {kind}")
+        self.items = dict(items)
+        self.columns = tuple(columns)
+        self.kind = kind
+        self.constants = dict(constants or {})
+        self.clamp = clamp
+        self.label = label
+
+
+class Multiplier:
+    """Scale ``columns`` (default: every output resource but ``exclude``).
+
+    The factor is ``values[params[param]]`` basis points.
+    """
+
+    def __init__(self, param, values, columns=None, exclude=()):
+        self.param = param
+        self.values = values
+        self.columns = columns
+        self.exclude = tuple(exclude)
+
+
+class SpeedBonus:
+    """Divide the summed ``column`` by ``1 + percent / 100`` (see :func:`wos.fixed.reduce_time`).
+
+    ``percent`` is a function of the calculator's parameters. With
+    ``double``, the time doubles when that parameter is true. ``report``
+    names an output key for the bonus itself.
+    """
+
+    def __init__(self, column, percent, double=None, report=None):
+        self.column = column
+        self.percent = percent
+        self.double = double
+        self.report = report
+
+
+class Calculator:
+    def __init__(self, name, schema, modifiers=(), resources=(), time=None):
+        self.name = name
+        self.schema = schema
+        self.modifiers = tuple(modifiers)
+        self.resources = tuple(resources)
+        self.time = time
+        self._lock = threading.Lock()
+        self._tables = None
+        self._index = {}
+        for i, (display, key) in enumerate(schema.items.items()):
+            self._index[display] = self._index[key] = i
+        self._resource_cols = [schema.columns.index(c) for c in self.resources]
+        self._time_col = schema.columns.index(time) if time else None
+        # Per multiplier: parameter value -> basis points for each output resource.
+        self._factors = []
+        for m in self.modifiers:
+            if isinstance(m, Multiplier):
+                mask = [c in (m.columns or self.resources) and c not in m.exclude for c in self.resources]
+                self._factors.append((m.param, {k: [v if x else fixed.BP for x in mask] for k, v in m.values.items()}))
+        # Recompile right after a hot reload rather than in the next request.
+        catalog.listeners.append(self.compiled)
+
+    # --- Compilation ---
+
+    def _table_values(self, table):
+        depth = max([len(table.values)] + [max(v) + 1 for v in self.schema.constants.values()])
+        values = np.zeros((depth, len(self.schema.columns)), dtype=np.int64)
+        for j, column in enumerate(self.schema.columns):
+            if column in self.schema.constants:
+                for level, value in self.schema.constants[column].items():
+                    values[level, j] = value
+            else:
+                values[:len(table.values), j] = table.column(column)
+        return values
+
+    def compiled(self):
+        """``(prefix, valid)``: prefix totals per ``(item, level, column)`` and known levels."""
+        tables = catalog.get_many(self.schema.items.values())
+        if self._tables is not None and all(a is b for a, b in zip(tables, self._tables)):
+            return self._prefix, self._valid
+        with self._lock:
+            rows = [self._table_values(t) for t in tables]
+            depth = max(len(r) for r in rows)
+            prefix = np.zeros((len(rows), depth, len(self.schema.columns)), dtype=np.int64)
+            valid = np.zeros((len(rows), depth), dtype=bool)
+            for i, (table, values) in enumerate(zip(tables, rows)):
+                n = len(values)
+                if self.schema.kind == "per_level":
+                    prefix[i, :n] = np.cumsum(values, axis=0)
+                    prefix[i, n:] = prefix[i, n - 1]
+                else:
+                    prefix[i, :n] = values
+                levels = table.levels[table.levels < depth]
+                valid[i, levels] = True
+            self._prefix, self._valid = prefix, valid
+            self._tables = tables
+        return self._prefix, self._valid
+
+    # --- Evaluation ---
+
+    def prefix(self, name) -> tuple:
+        """``(P, valid)`` of one item: its prefix totals by level and the levels its table has."""
+        prefix, valid = self.compiled()
+        index = self._item(name)
+        return prefix[index], valid[index]
+
+    def max_level(self, name) -> int:
+        """Last level in ``name``'s table."""
+        return int(np.flatnonzero(self.prefix(name)[1])[-1])
+
+    def clamp(self, name, level) -> int:
+        """``level`` limited to ``0 .. max_level(name)``."""
+        return min(max(int(level), 0), self.max_level(name))
+
+    def _item(self, name):
+        index = self._index.get(name)
+        if index is None and isinstance(name, str):
+            index = self._index.get(table_key(name))
+        if index is None:
+            raise ValueError(f"Unknown item for {self.name}: {name}")
+        return index
+
+    def _gather(self, prefix, valid, names, idx, levels):
+        depth = prefix.shape[1] - 1
+        if self.schema.clamp:
+            levels = np.clip(levels, 0, depth)
+        elif ((levels < 0) | (levels > depth)).any():
+            raise ValueError(f"{self.schema.label} must be between 1 and {depth}")
+        elif not valid[idx, levels].all():
+            bad = [(n, int(l)) for n, l, ok in zip(names, levels, valid[idx, levels]) if not ok]
+            raise ValueError(f"Level data missing for {bad}")
+        return prefix[idx, levels]
+
+    def line_costs(self, lines) -> np.ndarray:
+        """``(n, len(columns))`` int64 costs of ``(item, start, end, count)`` lines.
+
+        ``start`` ``None`` prices ``end`` from nothing (e.g. training a troop
+        rather than promoting one).
+        """
+        prefix, valid = self.compiled()
+        if not lines:
+            return np.zeros((0, len(self.schema.columns)), dtype=np.int64)
+        names = [line[0] for line in lines]
+        idx = np.array([self._item(n) for n in names], dtype=np.intp)
+        ends = np.array([line[2] for line in lines], dtype=np.intp)
+        costs = self._gather(prefix, valid, names, idx, ends)
+        starts = [line[1] for line in lines]
+        sel = [i for i, start in enumerate(starts) if start is not None]
+        if sel:
+            costs[sel] -= self._gather(prefix, valid, [names[i] for i in sel], idx[sel],
+                                       np.array([starts[i] for i in sel], dtype=np.intp))
+        counts = np.array([line[3] for line in lines], dtype=np.int64)
+        return costs * counts[:, None]
+
+    def apply(self, costs, **params) -> dict:
+        """Modifiers and output spec applied to the sum of :meth:`line_costs` rows."""
+        costs = np.asarray(costs, dtype=np.int64).reshape(-1, len(self.schema.columns))
+        out = self.apply_rows(costs.sum(axis=0, keepdims=True), **params)
+        result = {"resources": dict(zip(self.resources, out["resources"][0].tolist()))}
+        if self._time_col is not None:
+            result.update({k: v[0].item() for k, v in out.items() if k != "resources"})
+        return result
+
+    def apply_rows(self, totals, **params) -> dict:
+        """:meth:`apply` for many plans at once.
+
+        Row ``i`` of ``totals`` is the summed cost of plan ``i``; each
+        parameter is one value for all plans or an array with one value per
+        plan. Returns arrays:
+        ``resources`` ``(n, len(resources))``, ``base_time`` and ``time``.
+        """
+        totals = np.asarray(totals, dtype=np.int64).reshape(-1, len(self.schema.columns))
+        resources = totals[:, self._resource_cols]
+        scale = 1
+        for param, factors in self._factors:
+            keys = np.broadcast_to(np.asarray(params[param]), (len(totals),)).tolist()
+            resources = resources * np.array([factors[k] for k in keys], dtype=np.int64).reshape(resources.shape)
+            scale *= fixed.BP
+        out = {"resources": resources // scale}
+        if self._time_col is not None:
+            base_time = totals[:, self._time_col]
+            time, reports = base_time, {}
+            for m in self.modifiers:
+                if isinstance(m, SpeedBonus) and m.column == self.time:
+                    percent = np.broadcast_to(np.asarray(m.percent(**params), dtype=float), base_time.shape)
+                    double = np.asarray(params.get(m.double, False), dtype=bool) if m.double else False
+                    time = fixed.reduce_time(time, fixed.to_bp(percent), double)
+                    if m.report:
+                        reports[m.report] = percent
+            out.update(base_time=base_time, time=time, **reports)
+        return out
+
+    def evaluate(self, lines, **params) -> dict:
+        """Price ``lines`` (see :meth:`line_costs`) with the modifiers for ``params``."""
+        return self.apply(self.line_costs(lines), **params)
@@ -0,0 +1,191 @@
+"""Fire-crystal planning over the furnace prerequisite graph.
+
+Every ``(building, level)`` is a node. A level needs the previous level of
+the same building plus the entries of :data:`PREREQUISITES`, and no other
+building may be above the furnace. Each requirement is a lower bound on a
+level and costs are non-negative, so the cheapest valid plan for a target is
+the least fixpoint of those bounds: no search over alternatives is needed.
+The steps are then put in a valid build order with a topological sort.
+
+Per-level fire crystals and base time come from the prefix totals of
+:data:`wos.specs.BUILDINGS`, so pricing a plan is a handful of array
+lookups per building.
+"""
+
+import heapq
+from math import inf
+
+from wos import specs
+from wos.constants import BUILDING_NAMES
+
+# building -> {required building: offset}: level L needs the other at L - offset.
+PREREQUISITES = {
+    "Furnace": {"Embassy": 1},
+}
+
+# Levels above 30 are grouped into fire-crystal levels of five (35 = FC1).
+FC_BASE_LEVEL = 30
+FC_STEP = 5
+
+_FC = specs.BUILDINGS.schema.columns.index("firecrystals")
+_TIME = specs.BUILDINGS.schema.columns.index("time")
+
+
+def fc_label(level: int) -> str:
+    """``"FC1"`` for 35, ``"FC1-2"`` for 32, the plain number up to 30."""
+    if level <= FC_BASE_LEVEL:
+        return str(level)
+    fc, step = divmod(level - FC_BASE_LEVEL, FC_STEP)
+    return f"FC{fc}" if step == 0 else f"FC{fc + 1}-{step}"
+
+
+def _requirements(name, level, prerequisites):
+    reqs = {other: level - offset for other, offset in prerequisites.get(name, {}).items()}
+    if name != "Furnace":
+        reqs["Furnace"] = max(reqs.get("Furnace", 0), level)
+    return reqs
+
+
+def required_levels(current: dict, targets: dict, prerequisites=PREREQUISITES) -> dict:
+    """Lowest level of every building that reaches ``targets`` validly.
+
+    ``current`` maps building -> level (missing buildings count as level 1).
+    Raises ``ValueError`` if a requirement is above a building's max level.
+    """
+    levels = {name: specs.BUILDINGS.clamp(name, current.get(name, 1)) for name in BUILDING_NAMES}
+    pending = []
+    for name, level in targets.items():
+        if level > levels[name]:
+            levels[name] = level
+            pending.append(name)
+    while pending:
+        name = pending.pop()
+        max_level = specs.BUILDINGS.max_level(name)
+        if levels[name] > max_level:
+            raise ValueError(f"{name} cannot go above level {max_level}")
+        for other, level in _requirements(name, levels[name], prerequisites).items():
+            if level > levels[other]:
+                levels[other] = level
+                pending.append(other)
+    return levels
+
+
+def _order(current, levels, prerequisites):
+    """Upgrade steps ``(building, level)`` from ``current`` to ``levels``, in a valid order."""
+    rank = {name: i for i, name in enumerate(BUILDING_NAMES)}
+    start = {name: specs.BUILDINGS.clamp(name, current.get(name, 1)) for name in BUILDING_NAMES}
+    nodes = {(n, l) for n in BUILDING_NAMES for l in range(start[n] + 1, levels[n] + 1)}
+    blockers = {}
+    unlocks = {node: [] for node in nodes}
+    for name, level in nodes:
+        deps = [(name, level - 1)] + list(_requirements(name, level, prerequisites).items())
+        deps = [d for d in deps if d in nodes]
+        blockers[(name, level)] = len(deps)
+        for dep in deps:
+            unlocks[dep].append((name, level))
+
+    ready = [(level, rank[name], name) for (name, level), n in blockers.items() if n == 0]
+    heapq.heapify(ready)
+    order = []
+    while ready:
+        level, _, name = heapq.heappop(ready)
+        order.append((name, level))
+        for node in unlocks[(name, level)]:
+            blockers[node] -= 1
+            if blockers[node] == 0:
+                heapq.heappush(ready, (node[1], rank[node[0]], node[0]))
+    return order
+
+
+def _cost(start, levels):
+    """Total ``(firecrystals, base seconds)`` of moving every building from ``start`` to ``levels``."""
+    fc = time = 0
+    for name, level in levels.items():
+        if level > start[name]:
+            cum = specs.BUILDINGS.prefix(name)[0]
+            fc += int(cum[level, _FC] - cum[start[name], _FC])
+            time += int(cum[level, _TIME] - cum[start[name], _TIME])
+    return fc, time
+
+
+def reachable_furnace_level(current: dict, budget, prerequisites=PREREQUISITES) -> int:
+    """Highest furnace level whose cheapest valid plan costs at most ``budget`` FC."""
+    start = required_levels(current, {}, prerequisites)
+    best = start["Furnace"]
+    for level in range(best + 1, specs.BUILDINGS.max_level("Furnace") + 1):
+        fc, _ = _cost(start, required_levels(current, {"Furnace": level}, prerequisites))
+        if fc > budget:
+            break
+        best = level
+    return best
+
+
+def alternatives(current: dict, budget=None, prerequisites=PREREQUISITES) -> list:
+    """Each building's next fire-crystal level, ranked by FC per hour of construction.
+
+    Every option is priced with its own prerequisites. Options that cost no
+    fire crystals or are already maxed are left out. Affordable options come
+    first, then the fewest fire crystals per hour of base construction time
+    (the ``time`` column). The tables have no data on the time an upgrade
+    saves afterwards, so "FC per hour saved" cannot be computed; the hours
+    the upgrade itself takes stand in for it.
+    """
+    start = required_levels(current, {}, prerequisites)
+    budget = inf if budget is None else budget
+    options = []
+    for name in BUILDING_NAMES:
+        level = max(start[name], FC_BASE_LEVEL)
+        target = min(specs.BUILDINGS.max_level(name), FC_BASE_LEVEL + ((level - FC_BASE_LEVEL) // FC_STEP + 1) * FC_STEP)
+        if target <= start[name]:
+            continue
+        try:
+            levels = required_levels(start, {name: target}, prerequisites)
+        except ValueError:
+            continue
+        fc, time = _cost(start, levels)
+        if fc == 0:
+            continue
+        options.append({
+            "building": name,
+            "from": start[name],
+            "to": target,
+            "firecrystals": fc,
+            "time": time,
+            "fc_per_hour": fc / (time / 3600) if time else None,
+            "affordable": fc <= budget,
+        })
+    options.sort(key=lambda o: (not o["affordable"], o["fc_per_hour"] or inf, o["firecrystals"]))
+    return options
+
+
+def plan(current: dict, target_level: int, budget=None, prerequisites=PREREQUISITES) -> dict:
+    """Cheapest valid plan taking the furnace from ``current`` to ``target_level``.
+
+    ``budget`` is the fire crystals on hand (``None`` for unlimited). The
+    result lists the steps in build order, the total FC and base time, the
+    highest furnace level the budget reaches, and the next upgrades ranked
+    by :func:`alternatives` from where the plan leaves off.
+    """
+    start = required_levels(current, {}, prerequisites)
+    if target_level <= start["Furnace"]:
+        raise ValueError(f"Target level must be above the current furnace level ({start['Furnace']})")
+    levels = required_levels(current, {"Furnace": target_level}, prerequisites)
+
+    order = _order(start, levels, prerequisites)
+    costs = specs.BUILDINGS.line_costs([(name, level - 1, level, 1) for name, level in order])
+    steps = [
+        {"building": name, "level": level, "firecrystals": int(cost[_FC]), "time": int(cost[_TIME])}
+        for (name, level), cost in zip(order, costs)
+    ]
+    fc, time = _cost(start, levels)
+    remaining = None if budget is None else budget - fc
+    return {
+        "target": target_level,
+        "levels": levels,
+        "steps": steps,
+        "firecrystals": fc,
+        "time": time,
+        "affordable": remaining is None or remaining >= 0,
+        "reachable": None if budget is None else reachable_furnace_level(current, budget, prerequisites),
+        "alternatives": alternatives(levels, remaining, prerequisites),
+    }
@@ -0,0 +1,51 @@
+"""Fixed-point arithmetic shared by every calculator.
+
+Costs and times are integers (resource units, seconds). Multipliers and
+speed bonuses are integer basis points (1 bp = 0.01%, so ``10_000`` is
+100%), and every scaled quantity is computed exactly and then rounded down
+once: ``cost * bp // BP``, ``seconds * BP // (BP + bonus_bp)``. There is no
+float in the chain, so a result is the same on every machine, page, worker
+and in the browser (``wos/client/calc.js`` follows the same rules).
+
+The functions take Python ints or NumPy integer arrays alike. Plain Python
+only: the pages import :func:`format_seconds` at startup.
+"""
+
+from wos.constants import ZINMAN_COST_REDUCTION
+
+BP = 10_000
+
+
+def to_bp(percent):
+    """Basis points of ``percent``, rounded half up (``12.345`` -> ``1235``)."""
+    bp = (percent * 100 + 0.5) // 1
+    return bp.astype("int64") if hasattr(bp, "astype") else int(bp)
+
+
+# Zinman skill level -> cost multiplier in basis points
+ZINMAN_COST_BP = {level: to_bp(m * 100) for level, m in ZINMAN_COST_REDUCTION.items()}
+
+
+def scale(values, bp):
+    """``values * bp / BP``, rounded down."""
+    return values * bp // BP
+
+
+def reduce_time(seconds, bonus_bp, double=False):
+    """Seconds after a ``bonus_bp`` speed bonus, doubled with ``double``, rounded down."""
+    return seconds * BP * (1 + double) // (BP + bonus_bp)
+
+
+def base_budget(seconds, bonus_bp, double=False):
+    """Largest base time whose :func:`reduce_time` fits in ``seconds``."""
+    return ((seconds // 1 + 1) * (BP + bonus_bp) - 1) // (BP * (1 + double))
+
+
+def format_seconds(seconds) -> str:
+    """``"HH:MM:SS"``, with a ``"Nd "`` prefix from one day on."""
+    seconds = int(seconds)
+    days, rest = divmod(seconds, 86400)
+    hours, rest = divmod(rest, 3600)
+    minutes, seconds = divmod(rest, 60)
+    hms = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+    return f"{days}d {hms}" if days > 0 else hms
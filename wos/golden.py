@@ -0,0 +1,450 @@
+"""Golden outputs: pinned results of the calculators on fixed inputs.
+
+``golden.json`` next to this module records, for a fixed, seeded set of
+inputs (building upgrades, troop training and promotion, affordability,
+schedules, inverse queries, camp simulations, batch pricing and SvS plans),
+two results per case:
+
+``before``
+    The output before the fixed-point switch. For building upgrades and
+    troop training and promotion it comes from :data:`BASELINE`, the float
+    arithmetic of the original pages (commit b469d1d) transcribed here. The
+    other calculators did not exist there; their ``before`` is what they
+    returned on the commit just before the switch (886d504). Cases added
+    later take their first output.
+``expected``
+    The current output, written only where it differs from ``before``.
+
+So every intended change of a result is in the file. The rounding policy
+of :mod:`wos.fixed` accounts for all of them:
+
+* times are whole seconds, rounded down once. The original pages showed
+  ``int()`` of the float time, which is the same value for every building
+  and troop case here;
+* a float total just below a whole number no longer loses a unit (one
+  building case: iron ``4135999`` becomes ``4136000``; the affordability
+  costs and shortfalls likewise);
+* the scheduler and camp simulator round each step or batch duration down,
+  so their timelines end a few seconds earlier, and the SvS minutes follow
+  the whole-second troop times.
+
+``python -m wos.golden`` recomputes every case and reports the ones whose
+output changed, bit for bit; ``--deltas`` lists each ``before`` ->
+``expected`` difference; ``--update`` pins the current outputs as
+``expected`` after an intended change and never touches ``before``.
+
+Usage::
+
+    python -m wos.golden            # exit status 1 on any difference
+    python -m wos.golden --deltas
+    python -m wos.golden --update
+"""
+
+import argparse
+import importlib
+import json
+import math
+import os
+import random
+import sys
+
+from wos.constants import (
+    BASE_TRAIN_TIME,
+    BUILDING_NAMES,
+    DATA_DIR,
+    DOUBLE_TIME_BONUS,
+    PET_SPEED_BONUSES,
+    PRESIDENT_BONUS,
+    RESOURCES,
+    TROOP_RESOURCES,
+    TROOP_TYPES,
+    VICE_PRESIDENT_BONUS,
+    ZINMAN_COST_REDUCTION,
+)
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden.json")
+
+_MAX_LEVEL = {"Infantry Camp": 39}
+
+
+def _selections(rnd, k=4):
+    out = {}
+    for name in rnd.sample(BUILDING_NAMES, rnd.randint(1, k)):
+        current = rnd.randint(0, _MAX_LEVEL.get(name, 55) - 1)
+        out[name] = [current, rnd.randint(current + 1, _MAX_LEVEL.get(name, 55))]
+    return out
+
+
+def _orders(rnd, promote):
+    orders = []
+    for troop in rnd.sample(list(TROOP_TYPES), rnd.randint(1, 3)):
+        number = rnd.choice([1, 7, 999, 12_345, 10 ** 6])
+        if promote:
+            start = rnd.randint(1, 10)
+            orders.append({"troop": troop, "start_level": start, "end_level": rnd.randint(start + 1, 11),
+                           "number": number})
+        else:
+            orders.append({"troop": troop, "level": rnd.randint(1, 11), "number": number})
+    return orders
+
+
+def _bonuses(rnd):
+    return {
+        "base_bonus": rnd.choice([0, 7.5, 12.34, 33.3, 120]),
+        "zinman_level": rnd.randint(0, 5),
+        "pet_level": rnd.randint(0, 5),
+        "president": rnd.random() < 0.5,
+        "vice_president": rnd.random() < 0.5,
+        "double_time": rnd.random() < 0.5,
+    }
+
+
+def _resources(rnd, scale, low=0):
+    return {r: rnd.choice([low, 1, 3]) * scale for r in RESOURCES}
+
+
+def _batch(rows):
+    """:func:`wos.batch.price_chunk` on plan ``rows``, as records."""
+    import pandas as pd
+
+    from wos.batch import price_chunk
+
+    return price_chunk(pd.DataFrame(rows)).to_dict("records")
+
+
+def _batch_vs_calculators(plans):
+    """Totals where :func:`wos.batch.run_batch` and the calculators disagree (none, if consistent).
+
+    Each plan is ``{"player", "buildings", "bonuses", "train", "promote",
+    "training_speed"}``; the calculators price its parts one call each.
+    """
+    import io
+
+    import pandas as pd
+
+    from wos import calculators
+    from wos.batch import run_batch
+
+    rows, expected = [], {}
+    for plan in plans:
+        bonuses = plan["bonuses"]
+        columns = {"zinman": bonuses["zinman_level"], "pet": bonuses["pet_level"],
+                   **{k: v for k, v in bonuses.items() if k not in ("zinman_level", "pet_level")}}
+        rows += [{"player": plan["player"], "building": name, "current_level": current, "target_level": target,
+                  **columns} for name, (current, target) in plan["buildings"].items()]
+        rows += [{"player": plan["player"], "troop": o["troop"], "start_level": o.get("start_level", 0),
+                  "end_level": o.get("end_level", o.get("level")), "number": o["number"],
+                  "training_speed": plan["training_speed"]} for o in plan["train"] + plan["promote"]]
+        parts = [calculators.building_upgrade(plan["buildings"], **bonuses),
+                 calculators.troop_training(plan["train"], plan["training_speed"]),
+                 calculators.troop_promotion(plan["promote"], plan["training_speed"])]
+        expected[plan["player"]] = {
+            **{r: sum(p["resources"].get(r, 0) for p in parts) for r in RESOURCES},
+            "base_time": sum(p["base_time"] for p in parts), "time": sum(p["time"] for p in parts),
+        }
+    totals = run_batch(io.StringIO(pd.DataFrame(rows).to_csv(index=False)), chunksize=7)
+    return [f"{row['player']}.{k}: {row[k]} != {v}" for row in totals.to_dict("records")
+            for k, v in expected[row["player"]].items() if row[k] != v]
+
+
+def _batch_errors(plans):
+    """The ``ValueError`` message :func:`wos.batch.run_batch` gives for each named plan, or ``None``."""
+    import io
+
+    import pandas as pd
+
+    from wos.batch import run_batch
+
+    out = {}
+    for name, rows in plans.items():
+        try:
+            run_batch(io.StringIO(pd.DataFrame(rows).to_csv(index=False)), chunksize=2)
+            out[name] = None
+        except ValueError as e:
+            out[name] = str(e)
+    return out
+
+
+# --- The arithmetic of the pages before the fixed-point switch (commit b469d1d) ---
+
+
+def _baseline_building_upgrade(selections, base_bonus=0.0, zinman_level=0, pet_level=0,
+                               president=False, vice_president=False, double_time=False):
+    """``pages/building_upgrade.py`` at b469d1d: float Zinman factors per row, ``int()`` of the totals."""
+    import pandas as pd
+
+    total_resources = pd.Series(dtype=float)
+    total_base_time = 0.0
+    for name, (current, target) in selections.items():
+        df = pd.read_csv(os.path.join(DATA_DIR, name.lower().replace(" ", "") + ".csv"))
+        upgrade_df = df[(df["level"] > current) & (df["level"] <= target)]
+        if upgrade_df.empty:
+            continue
+        cost_df = upgrade_df[list(RESOURCES)].copy()
+        cost_df = cost_df.astype({c: float for c in cost_df.columns if c != "firecrystals"})
+        cost_df.loc[:, cost_df.columns != "firecrystals"] *= ZINMAN_COST_REDUCTION[zinman_level]
+        total_resources = total_resources.add(cost_df.sum(), fill_value=0)
+        total_base_time += upgrade_df["time"].sum()
+    speed_bonus = (float(base_bonus) + PET_SPEED_BONUSES[pet_level] + (PRESIDENT_BONUS if president else 0)
+                   + (VICE_PRESIDENT_BONUS if vice_president else 0) + (DOUBLE_TIME_BONUS if double_time else 0))
+    final_time = total_base_time * (1 / (1 + speed_bonus / 100))
+    if double_time:
+        final_time *= 2
+    total_resources = total_resources.fillna(0).astype(int)
+    return {
+        "resources": {r: int(total_resources.get(r, 0)) for r in RESOURCES},
+        "base_time": int(total_base_time),
+        "time": int(final_time),
+        "speed_bonus": speed_bonus,
+    }
+
+
+def _baseline_troops(orders, training_speed, promote):
+    """``pages/troops_calculator.py`` at b469d1d: exact integer costs, float time reduction."""
+    import pandas as pd
+
+    def parse_int(x):
+        return int(x.replace(",", "")) if isinstance(x, str) else int(x)
+
+    totals = {r: 0 for r in TROOP_RESOURCES}
+    base_time = 0
+    for order in orders:
+        df = pd.read_csv(os.path.join(DATA_DIR, TROOP_TYPES[order["troop"]] + ".csv"))
+        row = {int(level): r for level, r in zip(df["Level"], df.to_dict("records"))}
+        if promote:
+            steps = range(order["start_level"] + 1, order["end_level"] + 1)
+        else:
+            steps = [order["level"]]
+        for level in steps:
+            for r in TROOP_RESOURCES:
+                before = parse_int(row[level - 1][r.capitalize()]) if promote else 0
+                totals[r] += (parse_int(row[level][r.capitalize()]) - before) * order["number"]
+            before = BASE_TRAIN_TIME[level - 1] if promote else 0
+            base_time += (BASE_TRAIN_TIME[level] - before) * order["number"]
+    return {
+        "resources": totals,
+        "base_time": base_time,
+        "time": int(base_time * (1 / (1 + training_speed / 100))),
+    }
+
+
+BASELINE = {
+    "wos.calculators.building_upgrade": _baseline_building_upgrade,
+    "wos.calculators.troop_training": lambda orders, speed: _baseline_troops(orders, speed, False),
+    "wos.calculators.troop_promotion": lambda orders, speed: _baseline_troops(orders, speed, True),
+}
+
+
+def cases(seed=0):
+    """Yield ``(function, args, kwargs)`` for every golden case."""
+    rnd = random.Random(seed)
+    for _ in range(150):
+        yield "wos.calculators.building_upgrade", [_selections(rnd)], _bonuses(rnd)
+    for _ in range(100):
+        speed = rnd.choice([0, 12.5, 33.3, 80, 123.45])
+        yield "wos.calculators.troop_training", [_orders(rnd, False), speed], {}
+        yield "wos.calculators.troop_promotion", [_orders(rnd, True), speed], {}
+    for _ in range(20):
+        yield ("wos.calculators.building_affordability", [_selections(rnd, 2), _resources(rnd, 10 ** 6, low=1)],
+               {"stock": _resources(rnd, 10 ** 7), "zinman_level": rnd.randint(0, 5)})
+    for _ in range(10):
+        bonuses = _bonuses(rnd)
+        yield ("wos.scheduler.schedule", [_selections(rnd, 3)],
+               {"queues": rnd.randint(1, 2), "income": _resources(rnd, 10 ** 6, low=1),
+                "stock": _resources(rnd, 10 ** 7), **bonuses})
+    for _ in range(30):
+        name = rnd.choice(BUILDING_NAMES)
+        yield ("wos.inverse.reachable_level", [name, rnd.randint(1, 30), _resources(rnd, 10 ** 8)],
+               {"time_budget": rnd.choice([None, 3600, 10 ** 6, 10 ** 7]), "zinman_level": rnd.randint(0, 5),
+                "speed_bonus": rnd.choice([0, 12.5, 80]), "double_time": rnd.random() < 0.5})
+    for _ in range(10):
+        stock = {r: rnd.choice([10 ** 5, 10 ** 8]) for r in ("meat", "wood", "coal", "iron")}
+        budget, speed = rnd.choice([None, 3600, 86400]), rnd.choice([0, 12.5, 80])
+        yield "wos.inverse.max_trainable", [stock], {"time_budget": budget, "training_speed": speed}
+        yield "wos.inverse.max_promotable", [rnd.randint(1, 10), stock], {"time_budget": budget, "training_speed": speed}
+    for _ in range(10):
+        orders = _orders(rnd, rnd.random() < 0.5)
+        yield ("wos.training.simulate", [orders, rnd.choice([100, 350, 1000])],
+               {"training_speed": rnd.choice([0, 12.5, 80]),
+                "speedups": [{"start": 3600, "end": 7200, "speed": 20}],
+                "capacity_events": [{"start": 0, "end": 5400, "multiplier": 1.5}]})
+    rows = []
+    for player in range(20):
+        for name, (current, target) in _selections(rnd).items():
+            bonuses = _bonuses(rnd)
+            rows.append({"player": f"p{player}", "building": name, "current_level": current, "target_level": target,
+                         "zinman": bonuses.pop("zinman_level"), "pet": bonuses.pop("pet_level"), **bonuses})
+        for order in _orders(rnd, rnd.random() < 0.5):
+            rows.append({"player": f"p{player}", "troop": order["troop"],
+                         "start_level": order.get("start_level", 0),
+                         "end_level": order.get("end_level", order.get("level")),
+                         "number": order["number"], "training_speed": rnd.choice([0, 12.5, 80])})
+    yield "wos.golden._batch", [rows], {}
+    for _ in range(3):
+        troops = {t: {"max_tier": rnd.randint(6, 11), "owned": {rnd.randint(1, 5): 10 ** 4}} for t in TROOP_TYPES}
+        inventory = {**{r: 10 ** 9 for r in ("meat", "wood", "coal", "iron")}, "firecrystals": 2000,
+                     "construction_minutes": 30_000, "training_minutes": 20_000, "general_minutes": 10_000}
+        yield ("wos.calculators.svs_plan", [inventory, _selections(rnd, 3), troops],
+               {"construction_speed": 50, "training_speed": 40, "zinman_level": rnd.randint(0, 5)})
+    plans = [{"player": f"p{player}", "buildings": _selections(rnd), "bonuses": _bonuses(rnd),
+              "train": _orders(rnd, False), "promote": _orders(rnd, True),
+              "training_speed": rnd.choice([0, 12.5, 33.3, 80])} for player in range(20)]
+    yield "wos.golden._batch_vs_calculators", [plans], {}
+    valid = [{"player": "a", "building": "Furnace", "current_level": 30, "target_level": 35},
+             {"player": "b", "troop": "Infantry", "end_level": 10, "number": 100}]
+    invalid = {
+        "reversed range": {"building": "Furnace", "current_level": 35, "target_level": 30},
+        "target past the last level": {"building": "Furnace", "current_level": 30, "target_level": 57},
+        "fractional level": {"building": "Furnace", "current_level": 30, "target_level": 34.5},
+        "unknown building": {"building": "Castle", "current_level": 1, "target_level": 2},
+        "level not a number": {"building": "Furnace", "current_level": "thirty", "target_level": 35},
+        "pet level": {"building": "Furnace", "current_level": 30, "target_level": 35, "pet": 9},
+        "zinman level": {"building": "Furnace", "current_level": 30, "target_level": 35, "zinman": 9},
+        "negative base bonus": {"building": "Furnace", "current_level": 30, "target_level": 35, "base_bonus": -5},
+        "unknown troop": {"troop": "Dragons", "end_level": 10, "number": 1},
+        "tier past the last": {"troop": "Infantry", "end_level": 12, "number": 1},
+        "reversed promotion": {"troop": "Infantry", "start_level": 10, "end_level": 9, "number": 1},
+        "negative number": {"troop": "Infantry", "end_level": 10, "number": -1},
+        "negative training speed": {"troop": "Infantry", "end_level": 10, "number": 1, "training_speed": -100},
+    }
+    plans = {"valid": valid, **{name: valid + [{"player": "c", **row}] for name, row in invalid.items()}}
+    yield "wos.golden._batch_errors", [plans], {}
+
+
+def _plain(value):
+    """JSON-compatible copy of ``value`` (NumPy scalars and tuples included)."""
+    if isinstance(value, dict):
+        return {str(k): _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and math.isinf(value):
+        return "inf" if value > 0 else "-inf"
+    return value
+
+
+def run(case):
+    function, args, kwargs = case
+    module, name = function.rsplit(".", 1)
+    try:
+        return _plain(getattr(importlib.import_module(module), name)(*args, **kwargs))
+    except ValueError as e:
+        return {"error": str(e)}
+
+
+def compute(seed=0) -> list:
+    return [{"function": f, "args": a, "kwargs": k, "expected": run((f, a, k))} for f, a, k in cases(seed)]
+
+
+def _diff(got, expected, path=""):
+    """Paths (``a.b[0]``) where ``got`` and ``expected`` differ."""
+    if isinstance(got, dict) and isinstance(expected, dict):
+        return [p for k in sorted(set(got) | set(expected))
+                for p in _diff(got.get(k), expected.get(k), f"{path}.{k}" if path else k)]
+    if isinstance(got, list) and isinstance(expected, list) and len(got) == len(expected):
+        return [p for i, (g, e) in enumerate(zip(got, expected)) for p in _diff(g, e, f"{path}[{i}]")]
+    return [] if got == expected and type(got) is type(expected) else [path]
+
+
+def _sorted(case):
+    """``case`` with sorted keys, except in ``args`` and ``kwargs``: their order is part of the input."""
+    def sort(value):
+        if isinstance(value, dict):
+            return {k: sort(value[k]) for k in sorted(value)}
+        if isinstance(value, list):
+            return [sort(v) for v in value]
+        return value
+
+    return {k: case[k] if k in ("args", "kwargs") else sort(case[k]) for k in sorted(case)}
+
+
+def _load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def check(path=GOLDEN_PATH, verbose=True) -> int:
+    """Recompute the cases in ``path``; returns the number that changed."""
+    changed = 0
+    for case in _load(path)["cases"]:
+        got = json.loads(json.dumps(run((case["function"], case["args"], case["kwargs"]))))
+        paths = _diff(got, case.get("expected", case["before"]))
+        if paths:
+            changed += 1
+            if verbose and changed <= 10:
+                print(f"{case['function']}{tuple(case['args'])}: {', '.join(paths[:5])}"
+                      + (f" (+{len(paths) - 5} more)" if len(paths) > 5 else ""), file=sys.stderr)
+    return changed
+
+
+def deltas(path=GOLDEN_PATH) -> list:
+    """``(function, path, before, expected)`` for every pinned value that differs from its ``before``."""
+    out = []
+    for case in _load(path)["cases"]:
+        if "expected" in case:
+            for p in _diff(case["expected"], case["before"]):
+                out.append((case["function"], p, _get(case["before"], p), _get(case["expected"], p)))
+    return out
+
+
+def _get(value, path):
+    for part in path.replace("[", ".[").split("."):
+        if value is None or not part:
+            continue
+        value = value[int(part[1:-1])] if part.startswith("[") else value.get(part)
+    return value
+
+
+def update(path=GOLDEN_PATH, seed=0) -> int:
+    """Pin the current outputs as ``expected``; returns the number of cases.
+
+    ``before`` is kept for the cases already in ``path``. A new case gets
+    the :data:`BASELINE` formula's output if there is one, else the current
+    output.
+    """
+    pinned = _load(path)["cases"] if os.path.exists(path) else []
+    out = []
+    for i, case in enumerate(compute(seed)):
+        key = [case["function"], case["args"], case["kwargs"]]
+        if i < len(pinned):
+            if [pinned[i]["function"], pinned[i]["args"], pinned[i]["kwargs"]] != json.loads(json.dumps(key)):
+                raise ValueError(f"case {i} ({case['function']}) no longer matches {path}; add new cases at the end")
+            before = pinned[i]["before"]
+        elif case["function"] in BASELINE:
+            before = _plain(BASELINE[case["function"]](*case["args"], **case["kwargs"]))
+        else:
+            before = case["expected"]
+        expected = json.loads(json.dumps(case.pop("expected")))
+        case["before"] = json.loads(json.dumps(before))
+        if _diff(expected, case["before"]):
+            case["expected"] = expected
+        out.append(case)
+    with open(path + ".tmp", "w") as f:
+        json.dump({"cases": [_sorted(c) for c in out], "seed": seed}, f, indent=1)
+        f.write("\n")
+    os.replace(path + ".tmp", path)
+    return len(out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m wos.golden", description=__doc__.splitlines()[0])
+    parser.add_argument("--update", action="store_true", help="pin the current outputs as expected")
+    parser.add_argument("--deltas", action="store_true", help="list the values that differ from before")
+    parser.add_argument("--file", default=GOLDEN_PATH, help="golden file (default: wos/golden.json)")
+    args = parser.parse_args(argv)
+
+    if args.update:
+        print(f"wrote {update(args.file)} cases to {args.file}")
+        return
+    if args.deltas:
+        for function, path, before, expected in deltas(args.file):
+            print(f"{function} {path}: {before!r} -> {expected!r}")
+        return
+    changed = check(args.file)
+    print(f"{changed} changed")
+    sys.exit(1 if changed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Inverse queries: what can a stockpile of resources and time buy?
+
+Building costs are non-decreasing running totals, so the highest reachable
+level is a binary search (``np.searchsorted``) over each resource's
+cumulative column. Troop costs are a fixed price per troop, so the number
+of troops is the stockpile divided by that price, limited by the scarcest
+resource.
+"""
+
+import numpy as np
+
+from wos import fixed, specs
+from wos.constants import COST_COLUMNS, RESOURCES, TROOP_RESOURCES, TROOP_TYPES
+
+
+def _budget(stock, resources):
+    return np.array([float(stock.get(r, np.inf)) for r in resources])
+
+
+def reachable_level(name, current, stock, time_budget=None, zinman_level=0,
+                    speed_bonus=0.0, double_time=False) -> dict:
+    """Highest level of ``name`` reachable from ``current``.
+
+    ``stock`` maps resources to amounts on hand (missing resources are
+    unlimited); ``time_budget`` is construction time available in seconds,
+    after the speed bonus. Returns the level, the cost of getting there and
+    what stops it from going higher.
+    """
+    top = specs.BUILDINGS.max_level(name)
+    current = specs.BUILDINGS.clamp(name, current)
+    cum = specs.BUILDINGS.prefix(name)[0][:top + 1, [specs.BUILDINGS.schema.columns.index(c) for c in COST_COLUMNS]]
+    have = _budget(stock, RESOURCES)
+    bp = np.array([fixed.BP if r == "firecrystals" else fixed.ZINMAN_COST_BP[zinman_level] for r in RESOURCES])
+
+    # Largest level L with (cum[L] - cum[current]) * bp // BP <= have, per resource.
+    limits = {}
+    for i, r in enumerate(RESOURCES):
+        ceiling = cum[current, i] + ((int(have[i]) + 1) * fixed.BP - 1) // int(bp[i]) if np.isfinite(have[i]) else np.inf
+        limits[r] = int(np.searchsorted(cum[:, i], ceiling, side="right")) - 1
+    if time_budget is not None:
+        base_budget = fixed.base_budget(time_budget, fixed.to_bp(speed_bonus), double_time)
+        limits["time"] = int(np.searchsorted(cum[:, -1], cum[current, -1] + base_budget, side="right")) - 1
+    limits["max level"] = top
+
+    level = max(current, min(limits.values()))
+    limited_by = [k for k, v in limits.items() if v == level] if level < top else ["max level"]
+    cost = cum[level] - cum[current]
+    cost[:len(RESOURCES)] = fixed.scale(cost[:len(RESOURCES)], bp)
+    return {
+        "level": level,
+        "limited_by": limited_by,
+        "cost": dict(zip(COST_COLUMNS, cost.tolist())),
+    }
+
+
+def _max_count(costs, stock, time_budget, training_speed):
+    """Max whole troops per row of ``costs``; the last column is base time."""
+    have = _budget(stock, TROOP_RESOURCES)
+    res = costs[..., :len(TROOP_RESOURCES)].astype(float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        counts = np.where(res > 0, np.floor(have / res), np.inf).min(axis=-1)
+        if time_budget is not None:
+            base_budget = fixed.base_budget(time_budget, fixed.to_bp(training_speed))
+            counts = np.minimum(counts, np.where(costs[..., -1] > 0, np.floor(base_budget / costs[..., -1]), np.inf))
+    return counts
+
+
+def max_trainable(stock, time_budget=None, training_speed=0.0) -> dict:
+    """``{troop: {tier: max troops}}`` trainable from ``stock``.
+
+    ``None`` means unlimited (nothing in ``stock`` constrains it).
+    """
+    result = {}
+    for troop in TROOP_TYPES:
+        arr, valid = specs.TROOPS.prefix(troop)
+        tiers = np.flatnonzero(valid)
+        counts = _max_count(arr[tiers], stock, time_budget, training_speed)
+        result[troop] = {int(t): (int(c) if np.isfinite(c) else None) for t, c in zip(tiers, counts)}
+    return result
+
+
+def max_promotable(start_level, stock, time_budget=None, training_speed=0.0) -> dict:
+    """``{troop: {end tier: max troops}}`` promotable from ``start_level``."""
+    result = {}
+    for troop in TROOP_TYPES:
+        arr, valid = specs.TROOPS.prefix(troop)
+        if not 0 <= start_level < len(valid) or not valid[start_level]:
+            raise ValueError(f"Level data missing for level {start_level} in {troop}")
+        ends = np.flatnonzero(valid)
+        ends = ends[ends > start_level]
+        counts = _max_count(arr[ends] - arr[start_level], stock, time_budget, training_speed)
+        result[troop] = {int(t): (int(c) if np.isfinite(c) else None) for t, c in zip(ends, counts)}
+    return result
+
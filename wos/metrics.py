@@ -0,0 +1,165 @@
+"""Timing spans and counters, exported in Prometheus text format.
+
+Disabled unless ``WOS_METRICS=1``; then :func:`span` returns a shared no-op
+context manager and :func:`count` returns immediately, so instrumented hot
+paths cost one function call. When enabled:
+
+* ``WOS_METRICS_PORT=9108`` serves ``/metrics`` from a background thread
+  (one per process), for the Streamlit app;
+* the JSON API also exposes ``GET /metrics``;
+* ``WOS_METRICS_LOG=1`` additionally logs every span and counter as a JSON
+  line on the ``wos.metrics`` logger.
+"""
+
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+
+ENABLED = os.environ.get("WOS_METRICS", "") not in ("", "0")
+LOG = os.environ.get("WOS_METRICS_LOG", "") not in ("", "0")
+
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+logger = logging.getLogger("wos.metrics")
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_server = None
+_NOOP = contextlib.nullcontext()
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def count(name: str, amount: int = 1, **labels):
+    """Increment counter ``wos_<name>_total``."""
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+    if LOG:
+        logger.info(json.dumps({"counter": name, "labels": labels, "amount": amount}))
+
+
+def observe(name: str, seconds: float, **labels):
+    """Record one duration in histogram ``wos_<name>_seconds``."""
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = [[0] * len(BUCKETS), 0, 0.0]
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                hist[0][i] += 1
+        hist[1] += 1
+        hist[2] += seconds
+    if LOG:
+        logger.info(json.dumps({"span": name, "labels": labels, "seconds": seconds}))
+
+
+@contextlib.contextmanager
+def _span(name, labels):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+def span(name: str, **labels):
+    """Time the ``with`` block into histogram ``wos_<name>_seconds``."""
+    if not ENABLED:
+        return _NOOP
+    return _span(name, labels)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def render() -> str:
+    """All metrics in Prometheus text exposition format."""
+    with _lock:
+        counters = dict(_counters)
+        histograms = {k: (list(v[0]), v[1], v[2]) for k, v in _histograms.items()}
+
+    lines = []
+    for name in sorted({n for n, _ in counters}):
+        lines.append(f"# TYPE wos_{name}_total counter")
+        for (n, labels), value in sorted(counters.items()):
+            if n == name:
+                lines.append(f"wos_{name}_total{_format_labels(labels)} {value}")
+    for name in sorted({n for n, _ in histograms}):
+        lines.append(f"# TYPE wos_{name}_seconds histogram")
+        for (n, labels), (buckets, total, seconds) in sorted(histograms.items()):
+            if n != name:
+                continue
+            for bound, c in zip(BUCKETS, buckets):
+                lines.append(f"wos_{name}_seconds_bucket{_format_labels(labels, [('le', bound)])} {c}")
+            lines.append(f"wos_{name}_seconds_bucket{_format_labels(labels, [('le', '+Inf')])} {total}")
+            lines.append(f"wos_{name}_seconds_count{_format_labels(labels)} {total}")
+            lines.append(f"wos_{name}_seconds_sum{_format_labels(labels)} {seconds:.6f}")
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def _handler():
+    # http.server is only needed when serving; keep it off the import path.
+    from http.server import BaseHTTPRequestHandler
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def start_server(port: int, host: str = "127.0.0.1"):
+    """Serve ``/metrics`` on ``host:port`` from a daemon thread (once per process)."""
+    from http.server import ThreadingHTTPServer
+
+    global _server
+    with _lock:
+        if _server is not None:
+            return _server
+        _server = ThreadingHTTPServer((host, port), _handler())
+    threading.Thread(target=_server.serve_forever, name="wos-metrics", daemon=True).start()
+    return _server
+
+
+if ENABLED and os.environ.get("WOS_METRICS_PORT"):
+    try:
+        start_server(int(os.environ["WOS_METRICS_PORT"]))
+    except OSError as e:
+        logger.warning("Could not start metrics server: %s", e)
@@ -0,0 +1,217 @@
+"""Player profiles: saved page inputs, keyed by profile name.
+
+Profiles live in a local SQLite database (``WOS_PROFILES_DB``, default
+``data/profiles.sqlite3``) with one row per ``(profile, field)``. Saving
+writes only the fields that changed, so leveling up one building is a
+single-row upsert. Fields are the pages' widget keys, e.g. ``zinman_level``
+or ``Furnace_curr``, with JSON values.
+
+The store is single-tenant: a name is the only key, with no owner or
+session scoping, so anyone using the app who enters a profile's name can
+load and overwrite it. Run it for one player or a trusted group.
+
+Profiles can be exported to and imported from JSON. A shared link carries
+the fields themselves as a compact ``?p=`` token, so it works without
+access to the database.
+"""
+
+import base64
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from wos.constants import DATA_DIR
+
+DB_PATH = os.environ.get("WOS_PROFILES_DB") or os.path.join(DATA_DIR, "profiles.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS profile_fields (
+    profile TEXT NOT NULL,
+    field TEXT NOT NULL,
+    value TEXT NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (profile, field)
+) WITHOUT ROWID
+"""
+
+_MAX_TOKEN_BYTES = 64 * 1024
+
+
+class ProfileStore:
+    def __init__(self, path: str = DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def names(self) -> list:
+        with self._lock:
+            rows = self._connect().execute("SELECT DISTINCT profile FROM profile_fields ORDER BY profile")
+            return [r[0] for r in rows]
+
+    def load(self, name: str) -> dict:
+        with self._lock:
+            rows = self._connect().execute("SELECT field, value FROM profile_fields WHERE profile = ?", (name,))
+            return {field: json.loads(value) for field, value in rows}
+
+    def save(self, name: str, fields: dict) -> int:
+        """Upsert ``fields`` into profile ``name``; returns the number of rows written."""
+        if not fields:
+            return 0
+        now = time.time()
+        rows = [(name, k, json.dumps(v), now) for k, v in fields.items()]
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT INTO profile_fields (profile, field, value, updated) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (profile, field) DO UPDATE SET value = excluded.value, updated = excluded.updated",
+                rows,
+            )
+            conn.execute("COMMIT")
+        return len(rows)
+
+    def delete(self, name: str):
+        with self._lock:
+            self._connect().execute("DELETE FROM profile_fields WHERE profile = ?", (name,))
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def store() -> ProfileStore:
+    """The process-wide store, opened on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ProfileStore()
+        return _store
+
+
+def _check_fields(fields):
+    if not isinstance(fields, dict) or not all(
+        isinstance(k, str) and (v is None or isinstance(v, (bool, int, float, str))) for k, v in fields.items()
+    ):
+        raise ValueError("Profile fields must be a flat object of numbers, booleans and strings")
+    return fields
+
+
+def export_json(name: str, fields: dict) -> str:
+    return json.dumps({"version": 1, "profile": name, "fields": fields}, indent=2, sort_keys=True)
+
+
+def import_json(text) -> tuple:
+    """``(profile name, fields)`` from :func:`export_json` output; raises ``ValueError``."""
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Not a profile file: {e}")
+    if not isinstance(data, dict) or data.get("version") != 1:
+        raise ValueError("Not a profile file (expected version 1)")
+    return str(data.get("profile") or ""), _check_fields(data.get("fields"))
+
+
+def encode_share(fields: dict) -> str:
+    """URL-safe token carrying ``fields``."""
+    raw = zlib.compress(json.dumps(fields, separators=(",", ":"), sort_keys=True).encode(), 9)
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_share(token: str) -> dict:
+    """Fields from :func:`encode_share`; raises ``ValueError`` on a bad token."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        inflater = zlib.decompressobj()
+        data = inflater.decompress(raw, _MAX_TOKEN_BYTES)
+        if inflater.unconsumed_tail:
+            raise ValueError("Shared profile is too large")
+        fields = json.loads(data)
+    except (ValueError, zlib.error) as e:
+        raise ValueError(f"Invalid shared profile link: {e}")
+    return _check_fields(fields)
+
+
+def snapshot(state, keys) -> dict:
+    """The ``keys`` present in ``state`` (e.g. ``st.session_state``)."""
+    return {k: state[k] for k in keys if k in state}
+
+
+def restore(state, fields: dict, keys):
+    """Copy the ``keys`` saved in ``fields`` into ``state``, before the widgets are drawn."""
+    for k in keys:
+        if k in fields:
+            state[k] = fields[k]
+
+
+def changes(current: dict, saved: dict) -> dict:
+    """Fields of ``current`` that differ from ``saved``."""
+    return {k: v for k, v in current.items() if k not in saved or saved[k] != v}
+
+
+def sidebar(st, keys):
+    """Profile controls in the Streamlit sidebar, keeping ``keys`` of the session in sync.
+
+    ``st`` is the ``streamlit`` module (this package does not import it).
+    Call before drawing the page's widgets: it restores the active profile,
+    a ``?p=`` shared link or an imported file into ``st.session_state``, then
+    saves whichever of ``keys`` changed since the last save.
+    """
+    state = st.session_state
+    if "profile_name" not in state:
+        state.profile_name = state.get("active_profile") or st.query_params.get("profile", "")
+    with st.sidebar:
+        st.header("👤 Player profile")
+        name = st.text_input("Profile name", key="profile_name",
+                             help="Your inputs are saved under this name and restored next time.").strip()
+        st.caption("Profiles are shared by everyone using this app: anyone who enters the same name "
+                   "loads and overwrites it. Use the share link to pass inputs on.")
+        if name != state.get("active_profile"):
+            state.active_profile = name
+            state.profile_saved = store().load(name) if name else {}
+            restore(state, state.profile_saved, keys)
+
+        token = st.query_params.get("p")
+        if token and token != state.get("shared_token"):
+            state.shared_token = token
+            try:
+                restore(state, decode_share(token), keys)
+            except ValueError as e:
+                st.error(str(e))
+
+        uploaded = st.file_uploader("Import profile", type=["json"], key="profile_import")
+        if uploaded is not None and uploaded.file_id != state.get("imported_file"):
+            state.imported_file = uploaded.file_id
+            try:
+                restore(state, import_json(uploaded.getvalue())[1], keys)
+            except ValueError as e:
+                st.error(str(e))
+
+        current = snapshot(state, keys)
+        if name:
+            changed = changes(current, state.profile_saved)
+            if changed:
+                store().save(name, changed)
+                state.profile_saved = {**state.profile_saved, **changed}
+
+        st.download_button("Export profile", export_json(name, current), file_name=f"{name or 'profile'}.json",
+                           mime="application/json")
+        if st.button("Create share link"):
+            st.query_params["p"] = state.shared_token = encode_share(current)
+            st.caption("The address bar now holds a link to these inputs.")
@@ -0,0 +1,88 @@
+"""Time-to-afford projection for building upgrade plans.
+
+The steps of a plan are paid in order: every level of the first selected
+building (in :data:`~wos.constants.BUILDING_NAMES` order), then every level
+of the next one. With stockpile ``s`` and hourly income ``r``, step ``k`` is
+affordable once ``s + r * t`` covers the running total ``C[k]`` of the steps
+up to and including it, i.e. at ``t = max((C[k] - s) / r)`` over the
+resources. That closed form is
+evaluated for all steps at once over the cumulative cost array; the resource
+attaining the maximum is the step's bottleneck.
+
+Only resources are projected. Builder queues and construction time are
+:mod:`wos.scheduler`'s job.
+"""
+
+import numpy as np
+
+from wos import specs
+from wos.catalog import table_key
+from wos.constants import BUILDING_NAMES, RESOURCES
+
+_ORDER = {table_key(n): i for i, n in enumerate(BUILDING_NAMES)}
+
+
+def plan_steps(selections, zinman_level=0):
+    """``(names, levels, costs)`` for every step of ``selections``, in paying order.
+
+    ``costs`` is an ``(n, len(RESOURCES))`` int64 array of Zinman-reduced
+    costs, rounded down per step.
+    """
+    names, levels = [], []
+    for name in sorted(selections, key=lambda n: _ORDER[table_key(n)]):
+        current, target = selections[name]
+        steps = range(specs.BUILDINGS.clamp(name, current) + 1, specs.BUILDINGS.clamp(name, target) + 1)
+        names += [name] * len(steps)
+        levels += steps
+    if not names:
+        return [], np.zeros(0, dtype=np.intp), np.zeros((0, len(RESOURCES)), dtype=np.int64)
+    steps = specs.BUILDINGS.line_costs([(name, level - 1, level, 1) for name, level in zip(names, levels)])
+    costs = specs.BUILDINGS.apply_rows(steps, zinman_level=zinman_level)["resources"]
+    return names, np.array(levels, dtype=np.intp), costs
+
+
+def afford_times(cumulative, stock, income):
+    """Seconds until each row of ``cumulative`` is covered, and its bottleneck.
+
+    ``stock`` and ``income`` (per hour) are arrays over the resource columns.
+    Returns ``(seconds, bottleneck)``: ``inf`` where a needed resource has no
+    income, and bottleneck ``-1`` where the stockpile already covers the row.
+    """
+    need = np.maximum(np.asarray(cumulative, dtype=float) - stock, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        waits = np.where(need > 0, need / (np.asarray(income, dtype=float) / 3600), 0.0)
+    seconds = waits.max(axis=1) if len(waits) else np.zeros(0)
+    bottleneck = np.where(seconds > 0, waits.argmax(axis=1), -1) if len(waits) else np.zeros(0, dtype=np.intp)
+    return seconds, bottleneck
+
+
+def project(selections, income, stock=None, zinman_level=0) -> dict:
+    """When each step of ``selections`` becomes affordable.
+
+    ``income`` is resources per hour and ``stock`` the current stockpile,
+    dicts keyed by :data:`wos.constants.RESOURCES` (missing resources are
+    0). Times are seconds from now, ``None`` for never.
+    """
+    income_v = np.array([float(income.get(r, 0)) for r in RESOURCES])
+    stock_v = np.array([float((stock or {}).get(r, 0)) for r in RESOURCES])
+    names, levels, costs = plan_steps(selections, zinman_level)
+    cumulative = np.cumsum(costs, axis=0)
+    seconds, bottleneck = afford_times(cumulative, stock_v, income_v)
+
+    steps = [
+        {
+            "building": name,
+            "level": int(level),
+            "cost": dict(zip(RESOURCES, (int(c) for c in cost))),
+            "afford_at": float(t) if np.isfinite(t) else None,
+            "bottleneck": RESOURCES[b] if b >= 0 else None,
+        }
+        for name, level, cost, t, b in zip(names, levels, costs.tolist(), seconds, bottleneck.tolist())
+    ]
+    total = cumulative[-1] if len(cumulative) else np.zeros(len(RESOURCES))
+    return {
+        "steps": steps,
+        "afford_at": steps[-1]["afford_at"] if steps else 0.0,
+        "bottlenecks": {r: int(np.count_nonzero(bottleneck == i)) for i, r in enumerate(RESOURCES)},
+        "shortfall": {r: int(max(t - s, 0)) for r, t, s in zip(RESOURCES, total, stock_v)},
+    }
@@ -0,0 +1,153 @@
+"""Upgrade-order scheduling over builder queues and resource income.
+
+Each selected building is a chain of level steps that must be built in
+order, one step at a time. Steps run on ``queues`` parallel builders, pay
+their (Zinman-reduced) cost when they start, and can only start once the
+stockpile plus hourly income covers that cost.
+
+The scheduler is an event-driven list scheduler: whenever a builder frees
+up, it picks the next step by a priority rule. It runs two rules — longest
+remaining chain first, and earliest affordable start first — and keeps the
+schedule that finishes sooner. It also reports a lower bound on completion
+(work per queue, longest chain, slowest resource) to show how close it is.
+"""
+
+import numpy as np
+
+from wos import specs
+from wos.constants import RESOURCES
+
+_INF = float("inf")
+
+
+def _steps(selections, **bonuses):
+    """Per building: list of ``(level, duration_seconds, cost_tuple)``.
+
+    Each step is priced on its own by :data:`wos.specs.BUILDINGS` with ``bonuses``.
+    """
+    chains = {}
+    for name, (current, target) in selections.items():
+        levels = range(specs.BUILDINGS.clamp(name, current) + 1, specs.BUILDINGS.clamp(name, target) + 1)
+        priced = specs.BUILDINGS.apply_rows(specs.BUILDINGS.line_costs([(name, l - 1, l, 1) for l in levels]), **bonuses)
+        chains[name] = [
+            (level, float(d), tuple(float(x) for x in c))
+            for level, d, c in zip(levels, priced["time"].tolist(), priced["resources"].tolist())
+        ]
+    return chains
+
+
+def _afford_at(t, stock, income, cost):
+    """Earliest time >= t when ``stock`` (as of t) plus income covers ``cost``."""
+    wait = 0.0
+    for s, rate, c in zip(stock, income, cost):
+        if c > s:
+            if rate <= 0:
+                return _INF
+            wait = max(wait, (c - s) / rate)
+    return t + wait
+
+
+def _simulate(chains, queues, stock, income, rule):
+    names = list(chains)
+    remaining = {n: sum(d for _, d, _ in chains[n]) for n in names}
+    position = dict.fromkeys(names, 0)
+    busy_until = dict.fromkeys(names, 0.0)
+    free_at = [0.0] * queues
+    stock = list(stock)
+    now = 0.0  # Time of the last start; starts are non-decreasing.
+    timeline = []
+
+    total = sum(len(c) for c in chains.values())
+    while len(timeline) < total:
+        q = min(range(queues), key=free_at.__getitem__)
+        t0 = max(free_at[q], now)
+        stock_t0 = [s + r * (t0 - now) for s, r in zip(stock, income)]
+
+        best = None
+        for n in names:
+            if position[n] == len(chains[n]):
+                continue
+            level, duration, cost = chains[n][position[n]]
+            ready = max(t0, busy_until[n])
+            stock_ready = [s + r * (ready - t0) for s, r in zip(stock_t0, income)]
+            start = _afford_at(ready, stock_ready, income, cost)
+            if rule == "critical_path":
+                key = (start == _INF, -remaining[n], start)
+            else:
+                key = (start, -remaining[n])
+            if best is None or key < best[0]:
+                best = (key, n, start)
+
+        _, n, start = best
+        if start == _INF:
+            level, _, cost = chains[n][position[n]]
+            short = [r for r, c, s, i in zip(RESOURCES, cost, stock_t0, income) if c > s and i <= 0]
+            raise ValueError(f"{n} level {level} can never be afforded: no income for {', '.join(short)}")
+        level, duration, cost = chains[n][position[n]]
+        stock = [s + r * (start - now) - c for s, r, c in zip(stock, income, cost)]
+        now = start
+        end = start + duration
+        timeline.append({
+            "building": n,
+            "level": level,
+            "queue": q + 1,
+            "start": start,
+            "end": end,
+            "wait": start - max(free_at[q], busy_until[n]),
+        })
+        free_at[q] = end
+        busy_until[n] = end
+        position[n] += 1
+        remaining[n] -= duration
+
+    makespan = max((s["end"] for s in timeline), default=0.0)
+    return makespan, timeline
+
+
+def lower_bound(chains, queues, stock, income) -> float:
+    durations = [sum(d for _, d, _ in c) for c in chains.values()]
+    if not durations:
+        return 0.0
+    bound = max(sum(durations) / queues, max(durations))
+    totals = np.sum([c for chain in chains.values() for _, _, c in chain], axis=0)
+    for need, have, rate in zip(totals, stock, income):
+        if need > have:
+            bound = max(bound, (need - have) / rate if rate > 0 else _INF)
+    return float(bound)
+
+
+def schedule(selections, queues=1, income=None, stock=None, base_bonus=0.0, zinman_level=0,
+             pet_level=0, president=False, vice_president=False, double_time=False) -> dict:
+    """Plan the build order of ``selections`` (name -> ``(current, target)``).
+
+    ``income`` is resources per hour and ``stock`` the current stockpile,
+    both dicts keyed by :data:`wos.constants.RESOURCES`; missing resources
+    count as 0 (pass ``None`` to ignore resources entirely). Times in the
+    result are seconds from now.
+    """
+    if queues < 1:
+        raise ValueError("At least one builder queue is required")
+    if income is None and stock is None:
+        income_s = [0.0] * len(RESOURCES)
+        stock_v = [_INF] * len(RESOURCES)
+    else:
+        income_s = [float((income or {}).get(r, 0)) / 3600 for r in RESOURCES]
+        stock_v = [float((stock or {}).get(r, 0)) for r in RESOURCES]
+
+    chains = _steps(selections, base_bonus=base_bonus, zinman_level=zinman_level, pet_level=pet_level,
+                    president=president, vice_president=vice_president, double_time=double_time)
+
+    best = None
+    for rule in ("critical_path", "earliest_start"):
+        makespan, timeline = _simulate(chains, queues, stock_v, income_s, rule)
+        if best is None or makespan < best[0]:
+            best = (makespan, timeline, rule)
+
+    makespan, timeline, rule = best
+    return {
+        "steps": timeline,
+        "makespan": makespan,
+        "lower_bound": lower_bound(chains, queues, stock_v, income_s),
+        "serial_time": sum(d for c in chains.values() for _, d, _ in c),
+        "rule": rule,
+    }
@@ -0,0 +1,187 @@
+"""Multi-process serving: several Streamlit workers behind a sticky proxy.
+
+A single ``streamlit run`` process runs every session's reruns on one
+interpreter. ``python -m wos.serve`` instead starts ``--workers`` Streamlit
+processes on consecutive local ports, plus a small asyncio TCP proxy on the
+public port.
+
+* Affinity: a Streamlit session lives in one worker's memory, so the proxy
+  pins each browser to one worker with a ``wos_worker`` cookie. It sets the
+  cookie on the first response and reads it from later requests, including
+  the websocket upgrade. New browsers go to the worker with the fewest open
+  connections; if a worker dies, its browsers move to a live one.
+* Shared data: the game tables are compiled into ``data/tables.wos``
+  (:mod:`wos.compiled`) before the workers start. Every worker memory-maps
+  that one file read-only, so the tables sit in the page cache once and no
+  worker parses a CSV.
+* Data updates: workers watch ``data/`` (``WOS_DATA_WATCH``, every second by
+  default), so tables published with ``python -m wos.validate --publish``
+  are validated and swapped in without a restart.
+* Sizing: one worker per core (the default is the CPUs this process may use).
+  Reruns are CPU-bound and a worker runs one rerun at a time under the GIL,
+  so more workers than cores adds memory (about 150 MB each) without adding
+  throughput.
+
+::
+
+    python -m wos.serve --workers 4 --port 8501
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import re
+import signal
+import subprocess
+import sys
+
+from wos import compiled
+from wos.constants import DATA_DIR
+
+ROOT = os.path.dirname(DATA_DIR)
+COOKIE = "wos_worker"
+_COOKIE_RE = re.compile(rb"^cookie:.*?\b" + COOKIE.encode() + rb"=(\d+)", re.IGNORECASE | re.MULTILINE)
+_HEAD_LIMIT = 64 * 1024
+
+
+def default_workers() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def start_workers(n, base_port, script="home.py", host="127.0.0.1"):
+    """Start ``n`` headless Streamlit processes on ``base_port``, ``base_port + 1``, ..."""
+    procs = []
+    for i in range(n):
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+        env.setdefault("WOS_DATA_WATCH", "1")
+        if env.get("WOS_METRICS_PORT"):
+            env["WOS_METRICS_PORT"] = str(int(env["WOS_METRICS_PORT"]) + i)
+        procs.append(subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", os.path.join(ROOT, script),
+             "--server.port", str(base_port + i), "--server.address", host,
+             "--server.headless", "true", "--browser.gatherUsageStats", "false"],
+            cwd=ROOT, env=env,
+        ))
+    return procs
+
+
+class Proxy:
+    """TCP proxy pinning each browser to one worker via the ``wos_worker`` cookie."""
+
+    def __init__(self, workers, host="127.0.0.1"):
+        self.workers = list(workers)  # worker ports
+        self.host = host
+        self.connections = dict.fromkeys(range(len(self.workers)), 0)
+        self._turn = itertools.count()
+
+    def _pick(self, head):
+        match = _COOKIE_RE.search(head)
+        pinned = int(match.group(1)) if match else None
+        # The pinned worker first, then the least busy ones, taking turns on ties.
+        n, turn = len(self.workers), next(self._turn)
+        order = sorted(self.connections, key=lambda i: (i != pinned, self.connections[i], (i - turn) % n))
+        return pinned, order
+
+    async def _connect(self, order):
+        for index in order:
+            # Count the connection before awaiting so concurrent new clients spread out.
+            self.connections[index] += 1
+            try:
+                reader, writer = await asyncio.open_connection(self.host, self.workers[index])
+            except OSError:
+                self.connections[index] -= 1
+                continue
+            return index, reader, writer
+        raise OSError("No worker is accepting connections")
+
+    async def handle(self, client_reader, client_writer):
+        try:
+            head = await client_reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            client_writer.close()
+            return
+        pinned, order = self._pick(head)
+        try:
+            index, worker_reader, worker_writer = await self._connect(order)
+        except OSError:
+            client_writer.write(b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            await client_writer.drain()
+            client_writer.close()
+            return
+
+        try:
+            worker_writer.write(head)
+            set_cookie = None if pinned == index else index
+            await asyncio.gather(
+                self._pipe(client_reader, worker_writer),
+                self._pipe(worker_reader, client_writer, set_cookie),
+            )
+        finally:
+            self.connections[index] -= 1
+            for writer in (worker_writer, client_writer):
+                writer.close()
+
+    async def _pipe(self, reader, writer, set_cookie=None):
+        try:
+            if set_cookie is not None:
+                head = await reader.readuntil(b"\r\n\r\n")
+                status, _, rest = head.partition(b"\r\n")
+                cookie = f"Set-Cookie: {COOKIE}={set_cookie}; Path=/; HttpOnly; SameSite=Lax\r\n".encode()
+                writer.write(status + b"\r\n" + cookie + rest)
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                writer.write(data)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            if writer.can_write_eof():
+                try:
+                    writer.write_eof()
+                except OSError:
+                    pass
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port, limit=_HEAD_LIMIT)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m wos.serve", description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=default_workers(),
+                        help="Streamlit worker processes (default: one per available core)")
+    parser.add_argument("--host", default="127.0.0.1", help="address the proxy listens on")
+    parser.add_argument("--port", type=int, default=8501, help="port the proxy listens on")
+    parser.add_argument("--worker-port", type=int, default=8601, help="port of the first worker")
+    parser.add_argument("--script", default="home.py", help="Streamlit entry script")
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    tables = compiled.build()
+    print(f"Compiled {len(tables)} tables for shared read-only loading", file=sys.stderr)
+    procs = start_workers(args.workers, args.worker_port, args.script)
+    proxy = Proxy([args.worker_port + i for i in range(args.workers)])
+    print(f"Serving {args.workers} workers on http://{args.host}:{args.port}", file=sys.stderr)
+
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        asyncio.run(proxy.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for p in procs:
+            p.terminate()
+        for p in procs:
+            p.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Calculator definitions for :mod:`wos.engine`.
+
+Each entry says which tables a calculator reads and which bonuses apply. A
+new calculator (hero or chief gear, say) is a new entry here plus its data
+file; the engine does the rest.
+"""
+
+from wos.bonuses import construction_speed_bonus
+from wos.catalog import table_key
+from wos.constants import (
+    BASE_TRAIN_TIME,
+    BUILDING_NAMES,
+    COST_COLUMNS,
+    RESOURCES,
+    TROOP_COLUMNS,
+    TROOP_RESOURCES,
+    TROOP_TYPES,
+)
+from wos.engine import Calculator, Multiplier, Schema, SpeedBonus
+from wos.fixed import ZINMAN_COST_BP
+
+BUILDINGS = Calculator(
+    "buildings",
+    Schema({n: table_key(n) for n in BUILDING_NAMES}, COST_COLUMNS, kind="per_level", clamp=True),
+    modifiers=[
+        Multiplier("zinman_level", ZINMAN_COST_BP, exclude=("firecrystals",)),
+        SpeedBonus(
+            "time",
+            lambda base_bonus=0.0, pet_level=0, president=False, vice_president=False, double_time=False, **_:
+                construction_speed_bonus(base_bonus, pet_level, president, vice_president, double_time),
+            double="double_time",
+            report="speed_bonus",
+        ),
+    ],
+    resources=RESOURCES,
+    time="time",
+)
+
+TROOPS = Calculator(
+    "troops",
+    Schema(TROOP_TYPES, TROOP_COLUMNS, kind="cumulative", constants={"time": BASE_TRAIN_TIME}, label="Troop tiers"),
+    modifiers=[SpeedBonus("time", lambda training_speed=0.0, **_: training_speed)],
+    resources=TROOP_RESOURCES,
+    time="time",
+)
+
+# Power per troop by tier; training gains the tier's power, promotion the difference.
+TROOP_POWER = Calculator(
+    "troop_power",
+    Schema(TROOP_TYPES, ("power",), kind="cumulative", label="Troop tiers"),
+    resources=("power",),
+)
+
+CALCULATORS = {c.name: c for c in (BUILDINGS, TROOPS, TROOP_POWER)}
@@ -0,0 +1,337 @@
+"""SvS prep phase: spend speedups, resources and fire crystals for the most points.
+
+Points come from speedup minutes used, fire crystals spent and troop power
+gained (:data:`~wos.constants.SVS_POINTS`). Every activity is finished with
+speedups: building time needs construction speedups, training and promotion
+time needs training speedups, and general speedups cover either.
+
+The allocation is a multi-constraint knapsack solved as a linear program:
+
+* each selected building gets one column per target level, costed with the
+  cumulative price of reaching it, plus a row allowing at most one target;
+* each troop type gets a column per tier to train and per ``(owned tier,
+  target tier)`` to promote, with rows limiting promotions to the troops
+  owned;
+* the resource, fire crystal and speedup inventories are the remaining
+  rows; two more columns move general speedups to either side.
+
+A small dense simplex solves it in milliseconds. The LP optimum is an upper
+bound. The plan rounds buildings down to whole levels, re-solves troops on
+what is left, rounds troop counts down, and greedily spends any remainder
+on further levels and troops. ``gap`` is how far the plan can be from
+optimal.
+"""
+
+import itertools
+
+import numpy as np
+
+from wos import fixed, specs
+from wos.constants import RESOURCES, SVS_POINTS, TROOP_RESOURCES, TROOP_TYPES
+
+# Row layout of the constraint matrix.
+_SPEEDUPS = ("construction_minutes", "training_minutes", "general_minutes")
+ROWS = TROOP_RESOURCES + ("firecrystals",) + _SPEEDUPS
+_C, _T, _G = (ROWS.index(s) for s in _SPEEDUPS)
+_EPS = 1e-9
+
+
+def _simplex(c, A, b, max_iter=20000):
+    """Maximise ``c @ x`` subject to ``A @ x <= b``, ``x >= 0``, with ``b >= 0``.
+
+    Dense tableau with Dantzig's rule, falling back to Bland's rule while
+    pivots are degenerate so it cannot cycle. Returns ``(x, objective)``.
+    """
+    m, n = A.shape
+    scale = np.maximum(np.abs(A).max(axis=1, initial=0), 1.0)
+    tableau = np.zeros((m + 1, n + m + 1))
+    tableau[:m, :n] = A / scale[:, None]
+    tableau[:m, n:n + m] = np.eye(m)
+    tableau[:m, -1] = b / scale
+    c_scale = max(np.abs(c).max(initial=0), 1.0)
+    tableau[-1, :n] = -c / c_scale
+    basis = np.arange(n, n + m)
+    degenerate = 0
+    for _ in range(max_iter):
+        costs = tableau[-1, :-1]
+        if degenerate > 50:
+            candidates = np.flatnonzero(costs < -_EPS)
+            if not len(candidates):
+                break
+            col = candidates[0]
+        else:
+            col = int(np.argmin(costs))
+            if costs[col] >= -_EPS:
+                break
+        column = tableau[:m, col]
+        positive = column > _EPS
+        if not positive.any():
+            raise ValueError("Unbounded plan: an activity costs nothing")
+        ratios = np.full(m, np.inf)
+        ratios[positive] = tableau[:m, -1][positive] / column[positive]
+        best = ratios.min()
+        ties = np.flatnonzero(ratios <= best + _EPS)
+        row = ties[np.argmin(basis[ties])]
+        degenerate = degenerate + 1 if best <= _EPS else 0
+        tableau[row] /= tableau[row, col]
+        others = np.arange(m + 1) != row
+        tableau[others] -= np.outer(tableau[others, col], tableau[row])
+        basis[row] = col
+    else:
+        raise RuntimeError("Simplex did not converge")
+    x = np.zeros(n + m)
+    x[basis] = tableau[:m, -1]
+    return x[:n], tableau[-1, -1] * c_scale
+
+
+def _building_columns(buildings, zinman_level, construction_speed, points):
+    """Per building: target levels and their cumulative ``ROWS`` costs and points."""
+    out = {}
+    for name, (current, target) in buildings.items():
+        current, target = specs.BUILDINGS.clamp(name, current), specs.BUILDINGS.clamp(name, target)
+        levels = np.arange(current + 1, target + 1)
+        if not len(levels):
+            continue
+        costs = specs.BUILDINGS.line_costs([(name, current, int(k), 1) for k in levels])
+        priced = specs.BUILDINGS.apply_rows(costs, zinman_level=zinman_level, base_bonus=construction_speed)
+        reduced = priced["resources"]
+        rows = np.zeros((len(levels), len(ROWS)))
+        rows[:, :len(TROOP_RESOURCES)] = reduced[:, [RESOURCES.index(r) for r in TROOP_RESOURCES]]
+        rows[:, ROWS.index("firecrystals")] = reduced[:, RESOURCES.index("firecrystals")]
+        rows[:, _C] = priced["time"] / 60
+        value = rows[:, ROWS.index("firecrystals")] * points["fire_crystal"] + rows[:, _C] * points["speedup_minute"]
+        out[name] = (current, levels, rows, value)
+    return out
+
+
+def _troop_columns(troops, training_speed, points):
+    """``(keys, rows, values, owned, costs)``: one column per training or promotion option.
+
+    ``costs`` are the options' :data:`wos.specs.TROOPS` line costs for one troop.
+    """
+    keys, lines = [], []
+    owned = {}
+    for troop, spec in troops.items():
+        if troop not in TROOP_TYPES:
+            raise ValueError(f"Unknown troop type: {troop}")
+        max_tier = int(spec.get("max_tier", 0))
+        for tier in range(1, max_tier + 1):
+            keys.append((troop, None, tier))
+            lines.append((troop, None, tier, 1))
+        for start, count in (spec.get("owned") or {}).items():
+            start = int(start)
+            if count <= 0:
+                continue
+            owned[(troop, start)] = float(count)
+            for end in range(start + 1, max_tier + 1):
+                keys.append((troop, start, end))
+                lines.append((troop, start, end, 1))
+    if not keys:
+        return [], np.zeros((0, len(ROWS))), np.zeros(0), owned, np.zeros((0, len(specs.TROOPS.schema.columns)))
+    costs = specs.TROOPS.line_costs(lines)
+    power = specs.TROOP_POWER.line_costs(lines)[:, 0]
+    rows = np.zeros((len(keys), len(ROWS)))
+    rows[:, :len(TROOP_RESOURCES)] = costs[:, :len(TROOP_RESOURCES)]
+    # Per-troop rate of fixed.reduce_time; the plan's totals are rounded down once in optimize().
+    rows[:, _T] = costs[:, -1] * fixed.BP / (fixed.BP + fixed.to_bp(training_speed)) / 60
+    values = power * points["troop_power"] + rows[:, _T] * points["speedup_minute"]
+    return keys, rows, values, owned, costs
+
+
+def _solve(budget, buildings, troop_keys, troop_rows, troop_values, owned):
+    """LP over the building targets and troop options; returns building and troop weights."""
+    names = list(buildings)
+    blocks = [buildings[n][2] for n in names] + [troop_rows]
+    n_build = sum(len(buildings[n][1]) for n in names)
+    n = n_build + len(troop_keys) + 2
+    owned_keys = list(owned)
+    m = len(ROWS) + len(names) + len(owned_keys)
+    A = np.zeros((m, n))
+    A[:len(ROWS), :n - 2] = np.vstack(blocks).T if n > 2 else np.zeros((len(ROWS), 0))
+    # General speedups moved to construction / training.
+    A[[_C, _G], n - 2] = (-1, 1)
+    A[[_T, _G], n - 1] = (-1, 1)
+    col = 0
+    for i, name in enumerate(names):
+        k = len(buildings[name][1])
+        A[len(ROWS) + i, col:col + k] = 1
+        col += k
+    for j, key in enumerate(troop_keys):
+        if key[1] is not None:
+            A[len(ROWS) + len(names) + owned_keys.index((key[0], key[1])), n_build + j] = 1
+    b = np.concatenate([budget, np.ones(len(names)), [owned[k] for k in owned_keys]])
+    c = np.concatenate([buildings[n][3] for n in names] + [troop_values, np.zeros(2)])
+    x, bound = _simplex(c, A, b)
+    weights, col = {}, 0
+    for name in names:
+        k = len(buildings[name][1])
+        weights[name] = x[col:col + k]
+        col += k
+    return weights, x[n_build:n_build + len(troop_keys)], bound
+
+
+def _spend(remaining, cost):
+    """Subtract ``cost`` from ``remaining`` (general speedups cover any overflow); False if it does not fit."""
+    after = remaining - cost
+    for side in (_C, _T):
+        if after[side] < 0:
+            after[_G] += after[side]
+            after[side] = 0
+    if (after < -1e-6).any():
+        return False
+    remaining[:] = after
+    return True
+
+
+def _max_units(remaining, row):
+    """Whole units of ``row`` that fit in ``remaining``."""
+    free = remaining[:_G].copy()
+    free[[_C, _T]] += remaining[_G]  # a row needs construction or training time, never both
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(row[:_G] > 0, np.floor(free / row[:_G] + 1e-9), np.inf).min()
+
+
+def optimize(inventory, buildings=None, troops=None, construction_speed=0.0, training_speed=0.0,
+             zinman_level=0, points=None) -> dict:
+    """Best SvS prep allocation of ``inventory``.
+
+    ``inventory`` maps ``meat``, ``wood``, ``coal``, ``iron``,
+    ``firecrystals`` and ``construction_minutes``, ``training_minutes``,
+    ``general_minutes`` to amounts (missing means 0). ``buildings`` maps
+    building name -> ``(current level, highest target)``; ``troops`` maps
+    troop type -> ``{"max_tier": t, "owned": {tier: count}}`` (owned troops
+    can be promoted). ``points`` overrides entries of
+    :data:`~wos.constants.SVS_POINTS`.
+    """
+    points = {**SVS_POINTS, **(points or {})}
+    budget = np.array([float(inventory.get(r, 0)) for r in ROWS])
+    if (budget < 0).any():
+        raise ValueError("Inventory cannot be negative.")
+    build_cols = _building_columns(buildings or {}, zinman_level, construction_speed, points)
+    troop_keys, troop_rows, troop_values, owned, troop_costs = _troop_columns(troops or {}, training_speed, points)
+
+    weights, _, bound = _solve(budget, build_cols, troop_keys, troop_rows, troop_values, owned)
+    best = None
+    for levels in _roundings(build_cols, weights):
+        plan = _complete(levels, budget, build_cols, troop_keys, troop_rows, troop_values, owned)
+        if plan is not None and (best is None or plan[0] > best[0]):
+            best = plan
+    _, levels, counts, remaining = best
+    # Each option's training time as the Troops page computes it for that many troops.
+    minutes = specs.TROOPS.apply_rows(troop_costs * counts.astype(np.int64)[:, None],
+                                      training_speed=training_speed)["time"] / 60
+    return _result(build_cols, levels, troop_keys, troop_values, counts, minutes, budget, remaining, bound)
+
+
+def _roundings(build_cols, weights, limit=243):
+    """Whole-level choices near the LP solution.
+
+    A building the LP takes in full keeps that level. One it takes in part
+    tries the level below, the highest level the LP's spend on it would
+    cover, and the highest level the LP touches.
+    """
+    options = {}
+    for name, (_, _, rows, _) in build_cols.items():
+        w = weights[name]
+        taken = np.flatnonzero(np.cumsum(w[::-1])[::-1] >= 1 - 1e-6)
+        floor = int(taken[-1]) if len(taken) else -1
+        choices = {floor}
+        support = np.flatnonzero(w > 1e-9)
+        if len(support) and support[-1] > floor:
+            covered = np.flatnonzero((rows <= w @ rows + 1e-6).all(axis=1))
+            choices.add(int(covered[-1]) if len(covered) else -1)
+            choices.add(int(support[-1]))
+        options[name] = sorted(choices)
+    names = list(options)
+    for combo in itertools.islice(itertools.product(*(options[n] for n in names)), limit):
+        yield dict(zip(names, combo))
+
+
+def _complete(levels, budget, build_cols, troop_keys, troop_rows, troop_values, owned):
+    """Whole-unit plan from building ``levels`` (target index, -1 for none); None if they do not fit."""
+    levels = dict(levels)
+    remaining = budget.copy()
+    for name, index in levels.items():
+        if index >= 0 and not _spend(remaining, build_cols[name][2][index]):
+            return None
+
+    # Troops on what the buildings left, rounded down.
+    counts = np.zeros(len(troop_keys))
+    if troop_keys:
+        _, x, _ = _solve(remaining, {}, troop_keys, troop_rows, troop_values, owned)
+        for j in np.flatnonzero(x > 1 - 1e-6):
+            counts[j] = min(np.floor(x[j] + 1e-6), _max_units(remaining, troop_rows[j]))
+            _spend(remaining, troop_rows[j] * counts[j])
+
+    # Spend what rounding left over: further levels first, then more troops.
+    while True:
+        best = None
+        for name, (_, targets, rows, value) in build_cols.items():
+            index = levels[name]
+            if index + 1 >= len(targets):
+                continue
+            gain = value[index + 1] - (value[index] if index >= 0 else 0)
+            if best is None or gain > best[0]:
+                probe = remaining.copy()
+                if _spend(probe, rows[index + 1] - (rows[index] if index >= 0 else 0)):
+                    best = (gain, name, probe)
+        if best is None:
+            break
+        levels[best[1]] += 1
+        remaining[:] = best[2]
+    owned_left = dict(owned)
+    for j, key in enumerate(troop_keys):
+        if key[1] is not None:
+            owned_left[key[:2]] -= counts[j]
+    for j in np.argsort(-troop_values):
+        key = troop_keys[j]
+        extra = _max_units(remaining, troop_rows[j])
+        if key[1] is not None:
+            extra = min(extra, owned_left[key[:2]])
+        if np.isfinite(extra) and extra > 0 and _spend(remaining, troop_rows[j] * extra):
+            counts[j] += extra
+            if key[1] is not None:
+                owned_left[key[:2]] -= extra
+
+    points = sum(build_cols[n][3][i] for n, i in levels.items() if i >= 0) + troop_values @ counts
+    return points, levels, counts, remaining
+
+
+def _result(build_cols, levels, troop_keys, troop_values, counts, troop_minutes, budget, remaining, bound):
+    plan_buildings = {}
+    by_source = {"buildings": 0.0, "training": 0.0, "promotion": 0.0}
+    for name, (current, targets, rows, value) in build_cols.items():
+        index = levels[name]
+        if index < 0:
+            continue
+        plan_buildings[name] = {
+            "from": current,
+            "to": int(targets[index]),
+            "firecrystals": int(rows[index, ROWS.index("firecrystals")]),
+            "minutes": float(rows[index, _C]),
+            "points": float(value[index]),
+        }
+        by_source["buildings"] += value[index]
+    training, promotion = [], []
+    for j in np.flatnonzero(counts):
+        troop, start, end = troop_keys[j]
+        item = {"troop": troop, "number": int(counts[j]), "minutes": float(troop_minutes[j]),
+                "points": float(troop_values[j] * counts[j])}
+        if start is None:
+            training.append({"tier": end, **item})
+            by_source["training"] += item["points"]
+        else:
+            promotion.append({"from": start, "to": end, **item})
+            by_source["promotion"] += item["points"]
+    total = sum(by_source.values())
+    return {
+        "points": int(total),
+        "upper_bound": int(bound + 1e-6),
+        "gap": max(0.0, (bound - total) / bound) if bound > 0 else 0.0,
+        "points_by_source": {k: int(v) for k, v in by_source.items()},
+        "buildings": plan_buildings,
+        "training": training,
+        "promotion": promotion,
+        "used": {r: float(u) for r, u in zip(ROWS, budget - remaining)},
+        "left": {r: float(v) for r, v in zip(ROWS, remaining)},
+    }
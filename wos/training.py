@@ -0,0 +1,133 @@
+"""Discrete-event simulation of the troop training camps.
+
+Each troop type trains in its own camp and the three camps run in parallel.
+A camp works through its orders in sequence, in batches of up to the
+training capacity; a batch of ``n`` troops takes ``n * base / (1 + speed /
+100)`` seconds, rounded down as in :mod:`wos.fixed`. Speedups and capacity
+events are time windows. Like the game, they apply to batches that *start*
+inside the window, because a batch's duration is fixed when it starts.
+
+Between two events every full batch of an order is identical, so the
+simulator steps over whole runs of batches at once rather than over
+batches or troops. A run is reported as ``start``, ``duration`` (per batch)
+and ``batches``: batch ``i`` ends exactly at ``start + (i + 1) * duration``.
+Use :func:`batch_timeline` to expand runs into individual batches.
+"""
+
+from math import ceil, inf
+
+from wos import specs
+from wos.constants import TROOP_TYPES
+from wos.fixed import reduce_time, to_bp
+
+
+def _per_troop_time(order):
+    if order.get("start_level") is not None:
+        line = (order["troop"], order["start_level"], order["end_level"], 1)
+    else:
+        line = (order["troop"], None, order["level"], 1)
+    return int(specs.TROOPS.line_costs([line])[0, specs.TROOPS.schema.columns.index("time")])
+
+
+def _check_windows(windows, field):
+    for w in windows:
+        if w["end"] <= w["start"]:
+            raise ValueError(f"Event window must end after it starts: {w}")
+        if field == "multiplier" and w[field] <= 0:
+            raise ValueError(f"Capacity multiplier must be positive: {w}")
+
+
+def _state(t, training_speed, capacity, speedups, capacity_events):
+    """Speed, capacity and the next event boundary after ``t``."""
+    speed = training_speed + sum(w["speed"] for w in speedups if w["start"] <= t < w["end"])
+    multiplier = 1.0
+    for w in capacity_events:
+        if w["start"] <= t < w["end"]:
+            multiplier *= w["multiplier"]
+    boundary = min((b for w in (*speedups, *capacity_events) for b in (w["start"], w["end"]) if b > t), default=inf)
+    return speed, max(1, int(capacity * multiplier)), boundary
+
+
+def _run_camp(orders, capacity, training_speed, speedups, capacity_events):
+    runs = []
+    t = 0
+    for index, order in orders:
+        per_troop = _per_troop_time(order)
+        remaining = int(order["number"])
+        while remaining > 0:
+            speed, cap, boundary = _state(t, training_speed, capacity, speedups, capacity_events)
+            size = min(cap, remaining)
+            duration = reduce_time(size * per_troop, to_bp(speed))
+            count = 1 if size < cap else remaining // cap
+            if size == cap and duration > 0 and boundary < inf:
+                # Batches starting at t, t + d, ... before the next boundary are identical.
+                count = min(count, max(1, ceil((boundary - t) / duration)))
+            runs.append({
+                "order": index,
+                "troop": order["troop"],
+                "start": t,
+                "duration": duration,
+                "batches": count,
+                "size": size,
+                "speed": speed,
+                "end": t + count * duration,
+            })
+            t += count * duration
+            remaining -= count * size
+    return runs
+
+
+def simulate(orders, capacity, training_speed=0.0, speedups=(), capacity_events=()) -> dict:
+    """Simulate training ``orders`` in parallel camps.
+
+    ``orders`` are troop orders as for :func:`wos.calculators.troop_training`
+    (``level``) or :func:`~wos.calculators.troop_promotion` (``start_level``
+    and ``end_level``), trained in list order within each camp.
+    ``speedups`` are ``{"start", "end", "speed"}`` windows (seconds from now,
+    extra training speed in percent); ``capacity_events`` are
+    ``{"start", "end", "multiplier"}`` windows. Returns per-camp runs and
+    finish times, the overall finish time and the number of batches.
+    """
+    if capacity < 1:
+        raise ValueError("Training capacity must be at least 1")
+    _check_windows(speedups, "speed")
+    _check_windows(capacity_events, "multiplier")
+    camps = {}
+    for index, order in enumerate(orders):
+        if order["troop"] not in TROOP_TYPES:
+            raise ValueError(f"Unknown troop type: {order['troop']}")
+        if order["number"] < 0:
+            raise ValueError(f"Number of {order['troop']} cannot be negative")
+        camps.setdefault(order["troop"], []).append((index, order))
+
+    result = {}
+    for troop, camp_orders in camps.items():
+        runs = _run_camp(camp_orders, capacity, training_speed, speedups, capacity_events)
+        result[troop] = {
+            "runs": runs,
+            "end": runs[-1]["end"] if runs else 0,
+            "batches": sum(r["batches"] for r in runs),
+            "troops": sum(r["batches"] * r["size"] for r in runs),
+        }
+    return {
+        "camps": result,
+        "end": max((c["end"] for c in result.values()), default=0),
+        "batches": sum(c["batches"] for c in result.values()),
+    }
+
+
+def batch_timeline(result):
+    """Yield every batch of a :func:`simulate` result as a dict, camp by camp."""
+    for troop, camp in result["camps"].items():
+        number = 0
+        for run in camp["runs"]:
+            for i in range(run["batches"]):
+                number += 1
+                yield {
+                    "troop": troop,
+                    "order": run["order"],
+                    "batch": number,
+                    "size": run["size"],
+                    "start": run["start"] + i * run["duration"],
+                    "end": run["start"] + (i + 1) * run["duration"],
+                }
@@ -0,0 +1,294 @@
+"""Validation, diff and atomic publishing of game-table updates.
+
+A game patch used to mean editing ``data/*.csv`` by hand and finding the
+mistakes at runtime ("Level data missing"). ``python -m wos.validate``
+checks the tables first:
+
+* schema: the file parses and has the columns its calculator reads;
+* levels: one row per level, from 1 with no gaps, up to level
+  :data:`~wos.constants.MAX_BUILDING_LEVEL` for buildings and tier
+  :data:`~wos.constants.MAX_TIER` for troops (a shorter table is a warning);
+* costs: no negative values, and no value lower than the level before,
+  within the regular levels and within the fire crystal levels (a building
+  level 31 costs less than level 30, as it is the first of five steps).
+
+Pointed at a staging directory (or files) with updated CSVs, it also
+reports every added, removed or changed cell against the published
+tables, and ``--publish`` installs them into ``data/``. An update that adds
+errors is refused unless ``--force``. Publishing writes a marker file,
+renames each CSV into place and rebuilds ``data/tables.wos`` if there is
+one; watching workers (:meth:`wos.catalog.Catalog.watch`) wait for the
+marker to go, then load, validate and swap the whole set at once.
+
+Usage::
+
+    python -m wos.validate                    # check data/
+    python -m wos.validate staging/           # check and diff an update
+    python -m wos.validate staging/ --publish
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+
+from wos import compiled
+from wos.catalog import PUBLISH_MARKER, read_table, table_key
+from wos.constants import (
+    BUILDING_NAMES,
+    COST_COLUMNS,
+    DATA_DIR,
+    MAX_BUILDING_LEVEL,
+    MAX_TIER,
+    TROOP_RESOURCES,
+    TROOP_TYPES,
+)
+from wos.fc_planner import FC_BASE_LEVEL
+
+# table key -> (required columns, last level, first level of each non-decreasing run)
+SCHEMAS = {table_key(n): (COST_COLUMNS, MAX_BUILDING_LEVEL, (1, FC_BASE_LEVEL + 1)) for n in BUILDING_NAMES}
+SCHEMAS.update({k: (("power",) + TROOP_RESOURCES, MAX_TIER, (1,)) for k in TROOP_TYPES.values()})
+
+
+def issue(severity, table, message) -> dict:
+    return {"severity": severity, "table": table, "message": message}
+
+
+def strip_path(message, path):
+    """``"line 40: ..."`` for a ``"<path>:40: ..."`` message from :func:`~wos.catalog.read_table`."""
+    if message.startswith(path + ":"):
+        rest = message[len(path) + 1:]
+        return f"line {rest}" if rest[:1].isdigit() else rest.lstrip()
+    return message
+
+
+def errors(issues) -> set:
+    """``{(table, message)}`` of the errors in ``issues``."""
+    return {(i["table"], i["message"]) for i in issues if i["severity"] == "error"}
+
+
+def _ranges(levels):
+    """``"3-5, 9"`` for ``[3, 4, 5, 9]``."""
+    out, start = [], None
+    for i, level in enumerate(levels):
+        if start is None:
+            start = level
+        if i + 1 == len(levels) or levels[i + 1] != level + 1:
+            out.append(str(start) if start == level else f"{start}-{level}")
+            start = None
+    return ", ".join(out)
+
+
+def check_table(key, table) -> list:
+    """Issues of one :class:`~wos.catalog.Table`."""
+    issues = [issue("error", key, strip_path(m, m.split(":", 1)[0])) for m in table.issues]
+    if key not in SCHEMAS:
+        return issues + [issue("warning", key, "not used by any calculator")]
+    required, last, runs = SCHEMAS[key]
+
+    missing = [c for c in required if c not in table.columns]
+    if missing:
+        issues.append(issue("error", key, f"missing columns: {', '.join(missing)}"))
+    levels = table.levels
+    duplicates = np.unique(levels[1:][np.diff(levels) == 0])
+    if len(duplicates):
+        issues.append(issue("error", key, f"duplicate levels: {_ranges(duplicates.tolist())}"))
+    present = np.unique(levels)
+    if present[0] != 1:
+        issues.append(issue("error", key, f"levels start at {present[0]}, not 1"))
+    gaps = np.setdiff1d(np.arange(1, present[-1] + 1), present)
+    if len(gaps):
+        issues.append(issue("error", key, f"missing levels: {_ranges(gaps.tolist())}"))
+    if present[-1] < last:
+        issues.append(issue("warning", key, f"stops at level {present[-1]} of {last}"))
+    elif present[-1] > last:
+        issues.append(issue("warning", key, f"goes past level {last} to {present[-1]}"))
+
+    columns = [c for c in required if c in table.columns]
+    values = table.values[:, [table.col(c) for c in columns]]
+    for level, j in zip(*np.nonzero(values < 0)):
+        issues.append(issue("error", key, f"level {level}: negative {columns[j]}"))
+    bounds = list(runs) + [len(values)]
+    for lo, hi in zip(bounds, bounds[1:]):
+        run = present[(present >= lo) & (present < hi)]
+        drops = np.diff(values[run], axis=0) < 0
+        for i in np.flatnonzero(drops.any(axis=1)):
+            names = ", ".join(c for c, d in zip(columns, drops[i]) if d)
+            issues.append(issue("error", key, f"level {run[i + 1]}: {names} lower than level {run[i]}"))
+    return issues
+
+
+def check(tables) -> list:
+    """Issues of a whole set of tables (``{key: Table}``), missing tables included."""
+    issues = [issue("error", key, "file missing") for key in SCHEMAS if key not in tables]
+    for key in sorted(tables):
+        issues += check_table(key, tables[key])
+    return issues
+
+
+def load(paths) -> tuple:
+    """``({key: Table}, issues)`` for ``{key: csv path}``; unreadable files become errors."""
+    tables, issues = {}, []
+    for key, path in sorted(paths.items()):
+        try:
+            tables[key] = read_table(path, key)
+        except (OSError, ValueError) as e:
+            issues.append(issue("error", key, strip_path(str(e), path)))
+    return tables, issues
+
+
+def csv_paths(*sources) -> dict:
+    """``{key: path}`` for the CSVs in each source directory or file."""
+    out = {}
+    for source in sources:
+        if os.path.isdir(source):
+            names = sorted(f for f in os.listdir(source) if f.endswith(".csv"))
+            out.update({os.path.splitext(f)[0]: os.path.join(source, f) for f in names})
+        else:
+            out[os.path.splitext(os.path.basename(source))[0]] = source
+    return out
+
+
+def diff(old, new) -> dict:
+    """Per table key: what changed from ``old`` to ``new`` (``{key: Table}`` each).
+
+    Unchanged tables are left out. ``cells`` lists ``{"level", "column",
+    "old", "new"}`` for the levels and columns in both versions.
+    """
+    out = {}
+    for key in sorted(set(old) | set(new)):
+        if key not in old or key not in new:
+            out[key] = {"status": "added" if key in new else "removed"}
+            continue
+        a, b = old[key], new[key]
+        change = {}
+        for name, x, y in (("columns", a.columns, b.columns), ("levels", a.levels.tolist(), b.levels.tolist())):
+            added, removed = [v for v in y if v not in x], [v for v in x if v not in y]
+            if added:
+                change[f"{name}_added"] = added
+            if removed:
+                change[f"{name}_removed"] = removed
+        columns = [c for c in a.columns if c in b.columns]
+        levels = np.intersect1d(a.levels, b.levels)
+        va = a.values[levels][:, [a.col(c) for c in columns]]
+        vb = b.values[levels][:, [b.col(c) for c in columns]]
+        cells = [
+            {"level": int(levels[i]), "column": columns[j], "old": int(va[i, j]), "new": int(vb[i, j])}
+            for i, j in zip(*np.nonzero(va != vb))
+        ]
+        if cells:
+            change["cells"] = cells
+        if change:
+            out[key] = {"status": "changed", **change}
+    return out
+
+
+def review(sources, data_dir=DATA_DIR) -> dict:
+    """Validate the CSVs in ``sources`` as an update to ``data_dir`` and diff them.
+
+    Returns ``{"issues", "new_errors", "diff", "tables"}``: the issues of the
+    updated set, the errors it adds to the published one, the :func:`diff`
+    and the updated tables by key.
+    """
+    current_paths = csv_paths(data_dir)
+    staged_paths = csv_paths(*sources)
+    current, current_issues = load(current_paths)
+    staged, staged_issues = load(staged_paths)
+    updated = {k: v for k, v in current.items() if k not in staged_paths}
+    updated.update(staged)
+    unreadable = set(staged_paths) - set(staged)
+    issues = [i for i in current_issues if i["table"] not in staged_paths] + staged_issues
+    issues += [i for i in check(updated) if i["table"] not in unreadable]
+    return {
+        "issues": issues,
+        "new_errors": sorted(errors(issues) - errors(current_issues + check(current))),
+        "diff": diff({k: v for k, v in current.items() if k not in unreadable}, updated),
+        "tables": staged_paths,
+    }
+
+
+def publish(sources, data_dir=DATA_DIR, force=False) -> dict:
+    """:func:`review` the update, then install its changed tables into ``data_dir``.
+
+    Nothing is installed if the update adds errors, unless ``force``. The
+    result is the review plus ``"published"``: the table keys installed.
+    """
+    report = review(sources, data_dir)
+    report["published"] = []
+    changed = [k for k in report["diff"] if k in report["tables"]]
+    if (report["new_errors"] and not force) or not changed:
+        return report
+    marker = os.path.join(data_dir, PUBLISH_MARKER)
+    with open(marker, "w"):
+        pass
+    try:
+        staged = []
+        for key in changed:
+            tmp = os.path.join(data_dir, key + ".csv.tmp")
+            shutil.copyfile(report["tables"][key], tmp)
+            staged.append((tmp, os.path.join(data_dir, key + ".csv")))
+        for tmp, path in staged:
+            os.replace(tmp, path)
+        if os.path.exists(os.path.join(data_dir, compiled.ARTIFACT_NAME)):
+            compiled.build(data_dir)
+    finally:
+        os.remove(marker)
+    report["published"] = changed
+    return report
+
+
+def format_report(report) -> str:
+    lines = []
+    for i in report["issues"]:
+        lines.append(f"{i['severity']}: {i['table']}: {i['message']}")
+    for key, change in report.get("diff", {}).items():
+        if change["status"] != "changed":
+            lines.append(f"{key}: {change['status']}")
+            continue
+        parts = [f"{len(change['cells'])} cells changed"] if "cells" in change else []
+        parts += [
+            f"{k.replace('_', ' ')} {_ranges(v) if k.startswith('levels') else ', '.join(v)}"
+            for k, v in change.items() if k not in ("status", "cells")
+        ]
+        lines.append(f"{key}: {', '.join(parts)}")
+        for c in change.get("cells", []):
+            pct = f" ({(c['new'] - c['old']) / c['old']:+.1%})" if c["old"] else ""
+            lines.append(f"  level {c['level']} {c['column']}: {c['old']:,} -> {c['new']:,}{pct}")
+    for table, message in report.get("new_errors", []):
+        lines.append(f"new error: {table}: {message}")
+    if "published" in report:
+        lines.append(f"published: {', '.join(report['published']) or 'nothing'}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m wos.validate", description=__doc__.splitlines()[0])
+    parser.add_argument("sources", nargs="*", help="directories or CSV files with updated tables")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--publish", action="store_true", help="install the update if it adds no errors")
+    parser.add_argument("--force", action="store_true", help="publish even if the update adds errors")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    if args.publish and not args.sources:
+        parser.error("--publish needs the updated tables")
+    if args.publish:
+        report = publish(args.sources, args.data_dir, args.force)
+    elif args.sources:
+        report = review(args.sources, args.data_dir)
+    else:
+        tables, issues = load(csv_paths(args.data_dir))
+        report = {"issues": issues + check(tables)}
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    if args.sources:
+        failed = report["new_errors"] and not (args.publish and args.force)
+    else:
+        failed = errors(report["issues"])
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()